@@ -0,0 +1,57 @@
+"""Synthetic driver records for benchmarks that don't need a live database."""
+
+import random
+
+from neo4j import Record
+from neo4j.graph import Graph, Node
+
+LABELS = ["Person", "Company", "Product", "Place"]
+TYPES = ["KNOWS", "WORKS_AT", "BOUGHT", "LIVES_IN"]
+
+
+def _properties(i: int, count: int) -> dict:
+    props = {"name": f"element-{i}", "rank": i}
+    for p in range(count - 2):
+        props[f"prop_{p}"] = f"value-{i}-{p}"
+    return props
+
+
+def make_nodes(graph: Graph, count: int, property_count: int = 6) -> list[Node]:
+    return [
+        Node(
+            graph,
+            f"4:00000000-0000-0000-0000-000000000000:{i}",
+            i,
+            [LABELS[i % len(LABELS)]],
+            _properties(i, property_count),
+        )
+        for i in range(count)
+    ]
+
+
+def node_records(count: int, property_count: int = 6) -> list[Record]:
+    nodes = make_nodes(Graph(), count, property_count)
+    return [Record([("n", n)]) for n in nodes]
+
+
+def relationship_records(
+    count: int, node_count: int | None = None, property_count: int = 4, seed: int = 0
+) -> list[Record]:
+    """`MATCH (n)-[r]->(n2) RETURN n, r, n2` shaped records over a random graph."""
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = make_nodes(graph, node_count or max(2, count // 4), property_count)
+    records = []
+    for i in range(count):
+        source, target = rng.sample(nodes, 2)
+        cls = graph.relationship_type(TYPES[i % len(TYPES)])
+        r = cls(
+            graph,
+            f"5:00000000-0000-0000-0000-000000000000:{i}",
+            i,
+            _properties(i, property_count),
+        )
+        r._start_node = source
+        r._end_node = target
+        records.append(Record([("n", source), ("r", r), ("n2", target)]))
+    return records
@@ -0,0 +1,92 @@
+"""Concurrent query throughput: threadpool + sync driver vs async driver.
+
+The sync path mimics the previous route behaviour, where each request
+occupied one of Starlette's threadpool workers (40 by default) for the whole
+Bolt round trip. The async path multiplexes every in-flight query on the
+event loop using async_query_db.
+
+Admission control is disabled for these calls, which run outside a request
+and so count as export calls, unless ADMISSION_EXPORT_MAX_IN_FLIGHT is set.
+Otherwise calls beyond its in-flight and queue limits are shed with a 503.
+
+Usage:
+    poetry run python benchmarks/concurrency.py --requests 2000 --concurrency 500
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Read when neo4j_python_server.admission is imported
+os.environ.setdefault("ADMISSION_EXPORT_MAX_IN_FLIGHT", "0")
+
+from neo4j_python_server.database import (
+    async_drivers,
+    async_query_db,
+    drivers,
+    query_db,
+)
+from neo4j_python_server.models import Neo4jCredentials
+
+QUERY = "call db.labels();"
+
+
+async def run_sync(creds, total, concurrency, workers):
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+
+        async def one():
+            async with semaphore:
+                await loop.run_in_executor(pool, query_db, creds, QUERY)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(total)))
+        return time.perf_counter() - start
+
+
+async def run_async(creds, total, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await async_query_db(creds, QUERY)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--threadpool", type=int, default=40)
+    args = parser.parse_args()
+
+    creds = Neo4jCredentials()
+
+    # Warm both pools so connection setup isn't measured
+    query_db(creds, QUERY)
+    await async_query_db(creds, QUERY)
+
+    sync_elapsed = await run_sync(
+        creds, args.requests, args.concurrency, args.threadpool
+    )
+    async_elapsed = await run_async(creds, args.requests, args.concurrency)
+
+    print(f"requests={args.requests} concurrency={args.concurrency}")
+    print(
+        f"sync (threadpool={args.threadpool}): {sync_elapsed:.2f}s "
+        f"{args.requests / sync_elapsed:.0f} req/s"
+    )
+    print(f"async: {async_elapsed:.2f}s {args.requests / async_elapsed:.0f} req/s")
+
+    drivers.close_all()
+    await async_drivers.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Serialisation time and payload size of export payloads per encoder.
+
+Compares FastAPI's default path (jsonable_encoder + json.dumps) with the
+encoders in neo4j_python_server.encoding. Runs on synthetic records.
+
+Usage:
+    poetry run python benchmarks/encoding.py --records 20000
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _fixtures import relationship_records
+from fastapi.encoders import jsonable_encoder
+from neo4j_python_server import encoding
+from neo4j_python_server.export import ExportFormat, export_relationships
+from neo4j_python_server.logger import logger
+
+
+def fastapi_default(payload) -> bytes:
+    return json.dumps(jsonable_encoder(payload)).encode()
+
+
+def stdlib_json(payload) -> bytes:
+    orjson, encoding.orjson = encoding.orjson, None
+    try:
+        return encoding.encode_json(payload)
+    finally:
+        encoding.orjson = orjson
+
+
+ENCODERS = {"fastapi": fastapi_default, "json": stdlib_json}
+if encoding.orjson is not None:
+    ENCODERS["orjson"] = encoding.encode_json
+if encoding.msgpack is not None:
+    ENCODERS["msgpack"] = encoding.encode_msgpack
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+    records = relationship_records(args.records)
+
+    print(f"{'format':<10} {'encoder':<8} {'ms':>9} {'KiB':>9}")
+    for format in ExportFormat:
+        payload = export_relationships(records, format)
+        for name, encode in ENCODERS.items():
+            seconds = min(
+                timeit.repeat(lambda: encode(payload), number=1, repeat=args.repeat)
+            )
+            size = len(encode(payload)) / 1024
+            print(f"{format.value:<10} {name:<8} {seconds * 1000:>9.1f} {size:>9.0f}")
+
+
+if __name__ == "__main__":
+    main()
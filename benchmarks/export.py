@@ -0,0 +1,46 @@
+"""Per-record cost of the export_* converters for each ExportFormat.
+
+Runs on synthetic records, so no database is needed.
+
+Usage:
+    poetry run python benchmarks/export.py --records 50000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _fixtures import node_records, relationship_records
+from neo4j_python_server.export import ExportFormat, export_nodes, export_relationships
+from neo4j_python_server.logger import logger
+
+
+def per_record_us(fn, records, format, repeat) -> float:
+    best = min(timeit.repeat(lambda: fn(records, format), number=1, repeat=repeat))
+    return best / len(records) * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+
+    nodes = node_records(args.records)
+    relationships = relationship_records(args.records)
+
+    print(f"{'format':<10} {'nodes us/rec':>14} {'rels us/rec':>14}")
+    for format in ExportFormat:
+        n = per_record_us(export_nodes, nodes, format, args.repeat)
+        r = per_record_us(export_relationships, relationships, format, args.repeat)
+        print(f"{format.value:<10} {n:>14.3f} {r:>14.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Server-side layout time per node count for each LayoutMethod.
+
+Lays out synthetic d3 relationship exports with an average degree of 8, then
+times a repeat request served from the layout cache. Needs numpy.
+
+Usage:
+    poetry run python benchmarks/layout.py --nodes 250 500 1000 2000 4000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _fixtures import relationship_records
+from neo4j_python_server.export import ExportFormat, export_relationships
+from neo4j_python_server.layout import LayoutMethod, layout_cache, layout_export
+from neo4j_python_server.logger import logger
+
+
+def timed_ms(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[250, 500, 1000, 2000])
+    args = parser.parse_args()
+
+    logger.setLevel(logging.WARNING)
+
+    print(
+        f"{'nodes':>6} {'edges':>7} {'method':<9} {'layout ms':>10} {'cached ms':>10}"
+    )
+    for count in args.nodes:
+        records = relationship_records(count * 4, node_count=count)
+        payload = export_relationships(records, ExportFormat.D3)
+        for method in LayoutMethod:
+            layout_cache.clear()
+            run = lambda: layout_export(payload, ExportFormat.D3, method)
+            cold = timed_ms(run)
+            warm = timed_ms(run)
+            print(
+                f"{len(payload['nodes']):>6} {len(payload['links']):>7} "
+                f"{method.value:<9} {cold:>10.1f} {warm:>10.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
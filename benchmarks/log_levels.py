@@ -0,0 +1,52 @@
+"""Export throughput at each log level.
+
+Log output goes to a null stream so only formatting cost is measured.
+
+Usage:
+    poetry run python benchmarks/log_levels.py --records 50000
+"""
+
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from _fixtures import node_records, relationship_records
+from neo4j_python_server.export import ExportFormat, export_nodes, export_relationships
+from neo4j_python_server.logger import logger, sh
+
+LEVELS = ["DEBUG", "INFO", "WARNING"]
+
+
+def records_per_second(fn, records, format, repeat) -> float:
+    best = min(timeit.repeat(lambda: fn(records, format), number=1, repeat=repeat))
+    return len(records) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    sh.setStream(open(os.devnull, "w"))
+
+    nodes = node_records(args.records)
+    relationships = relationship_records(args.records)
+
+    print(f"{'level':<8} {'format':<10} {'nodes rec/s':>12} {'rels rec/s':>12}")
+    for level in LEVELS:
+        logger.setLevel(level)
+        for format in ExportFormat:
+            n = records_per_second(export_nodes, nodes, format, args.repeat)
+            r = records_per_second(
+                export_relationships, relationships, format, args.repeat
+            )
+            print(f"{level:<8} {format.value:<10} {n:>12,.0f} {r:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
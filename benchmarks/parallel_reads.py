@@ -0,0 +1,66 @@
+"""Wall-clock time of a multi-label node read: one UNION query vs per-label
+partitions read in parallel.
+
+Reads from the database configured by the NEO4J_* environment variables.
+Defaults to every label in the database.
+
+Usage:
+    poetry run python benchmarks/parallel_reads.py --labels Person Company --parallelism 1 2 4 8
+"""
+
+import argparse
+import asyncio
+import time
+
+from neo4j_python_server.database import async_drivers, async_query_db
+from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.parallel import parallel_node_records
+from neo4j_python_server.queries import known_labels, nodes_query
+
+
+async def timed(coro) -> tuple[float, int]:
+    start = time.perf_counter()
+    records = await coro
+    return time.perf_counter() - start, len(records)
+
+
+async def serial(creds, labels) -> list:
+    records, _, _ = await async_query_db(creds, nodes_query(labels, []))
+    return records
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--labels", nargs="+", default=None)
+    parser.add_argument("--parallelism", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    creds = Neo4jCredentials()
+    labels = args.labels or sorted(await known_labels(creds))
+
+    # Warm the connection pool so connection setup isn't measured
+    await serial(creds, labels)
+
+    best, count = min([await timed(serial(creds, labels)) for _ in range(args.repeat)])
+    print(f"labels={len(labels)} nodes={count}")
+    print(f"{'mode':<14} {'seconds':>8} {'speedup':>8}")
+    print(f"{'serial':<14} {best:>8.2f} {1:>8.2f}")
+    for parallelism in args.parallelism:
+        elapsed, _ = min(
+            [
+                await timed(
+                    parallel_node_records(
+                        creds, labels, [], {}, parallelism=parallelism
+                    )
+                )
+                for _ in range(args.repeat)
+            ]
+        )
+        print(f"{f'parallel={parallelism}':<14} {elapsed:>8.2f} {best / elapsed:>8.2f}")
+
+    await async_drivers.close_all()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
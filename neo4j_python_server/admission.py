@@ -0,0 +1,252 @@
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from enum import Enum
+from fastapi import HTTPException
+from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import (
+    admission_in_flight,
+    admission_queued,
+    admission_shed_total,
+    stage,
+)
+from neo4j_python_server.models import Neo4jCredentials
+import asyncio
+import os
+
+
+class RouteClass(str, Enum):
+    METADATA = "metadata"
+    EXPORT = "export"
+    IMPORT = "import"
+
+
+@dataclass(frozen=True)
+class Limits:
+    """Admission limits for one route class, applied per target database.
+
+    max_in_flight: Database calls running at once. 0 disables admission
+        control for the class.
+    max_queue: Calls waiting for a slot before further calls are shed.
+    queue_seconds: Longest a call waits for a slot before it is shed.
+    retry_after: Retry-After header value, in seconds, of shed responses.
+    """
+
+    max_in_flight: int
+    max_queue: int
+    queue_seconds: float
+    retry_after: int
+
+    @classmethod
+    def from_env(cls, route_class: RouteClass, **defaults) -> "Limits":
+        """Read ADMISSION_<CLASS>_<LIMIT> variables, eg.
+        ADMISSION_EXPORT_MAX_IN_FLIGHT, falling back to defaults."""
+        prefix = f"ADMISSION_{route_class.name}_"
+        return cls(
+            max_in_flight=int(
+                os.environ.get(prefix + "MAX_IN_FLIGHT", defaults["max_in_flight"])
+            ),
+            max_queue=int(os.environ.get(prefix + "MAX_QUEUE", defaults["max_queue"])),
+            queue_seconds=float(
+                os.environ.get(prefix + "QUEUE_SECONDS", defaults["queue_seconds"])
+            ),
+            retry_after=int(
+                os.environ.get(prefix + "RETRY_AFTER_SECONDS", defaults["retry_after"])
+            ),
+        )
+
+
+# Limiters kept for distinct (route class, uri, database) targets. Idle ones
+# beyond this are forgotten, least recently used first, together with their
+# metrics series, so client supplied uris can't grow memory or label sets
+# without bound.
+ADMISSION_MAX_TARGETS = int(os.environ.get("ADMISSION_MAX_TARGETS", 64))
+
+LIMITS = {
+    # Cached after the first read, so a miss is cheap and worth admitting
+    RouteClass.METADATA: Limits.from_env(
+        RouteClass.METADATA,
+        max_in_flight=16,
+        max_queue=64,
+        queue_seconds=2,
+        retry_after=1,
+    ),
+    RouteClass.EXPORT: Limits.from_env(
+        RouteClass.EXPORT,
+        max_in_flight=8,
+        max_queue=32,
+        queue_seconds=10,
+        retry_after=2,
+    ),
+    RouteClass.IMPORT: Limits.from_env(
+        RouteClass.IMPORT,
+        max_in_flight=2,
+        max_queue=8,
+        queue_seconds=30,
+        retry_after=5,
+    ),
+}
+
+
+class Limiter:
+    """Bounded concurrency for one (route class, database) pair.
+
+    Calls beyond max_in_flight wait in FIFO order. A call is shed, with a
+    503 and Retry-After, when the queue is already full or when it has
+    waited queue_seconds without getting a slot, so overload fails fast
+    instead of piling up connections and timeouts against Neo4j.
+    """
+
+    def __init__(self, route_class: RouteClass, uri: str, database: str):
+        self.limits = LIMITS[route_class]
+        self.labels = (route_class.value, uri, database)
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "timeout": 0}
+        self._waiters = deque()
+
+    async def acquire(self):
+        if self.in_flight < self.limits.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            self._observe()
+            return
+        if len(self._waiters) >= self.limits.max_queue:
+            raise self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._observe()
+        try:
+            await asyncio.wait_for(waiter, self.limits.queue_seconds)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            raise self._shed("timeout")
+        except BaseException:
+            # Cancelled, eg. by the client disconnecting. Pass on a slot
+            # that was handed over just before.
+            self._remove(waiter)
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        """Hand the slot to the longest waiting call, or free it."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                self.admitted += 1
+                self._observe()
+                return
+        self.in_flight -= 1
+        self._observe()
+
+    def _remove(self, waiter):
+        if waiter in self._waiters:
+            self._waiters.remove(waiter)
+        self._observe()
+
+    def _shed(self, reason: str) -> HTTPException:
+        self.shed[reason] += 1
+        admission_shed_total.inc(self.labels + (reason,))
+        logger.warning(
+            "Shed %s call to %s (%s): %s", self.labels[0], *self.labels[1:], reason
+        )
+        return HTTPException(
+            status_code=503,
+            detail=f"Too many concurrent {self.labels[0]} requests for this database",
+            headers={"Retry-After": str(self.limits.retry_after)},
+        )
+
+    def idle(self) -> bool:
+        return self.in_flight == 0 and not self._waiters
+
+    def forget(self):
+        """Drop this limiter's metrics series."""
+        admission_in_flight.remove(self.labels)
+        admission_queued.remove(self.labels)
+        for reason in self.shed:
+            admission_shed_total.remove(self.labels + (reason,))
+
+    def _observe(self):
+        admission_in_flight.set(self.labels, self.in_flight)
+        admission_queued.set(self.labels, len(self._waiters))
+
+    def stats(self) -> dict:
+        route_class, uri, database = self.labels
+        return {
+            "route_class": route_class,
+            "uri": uri,
+            "database": database,
+            "in_flight": self.in_flight,
+            "queued": len(self._waiters),
+            "max_in_flight": self.limits.max_in_flight,
+            "max_queue": self.limits.max_queue,
+            "admitted": self.admitted,
+            "shed": dict(self.shed),
+        }
+
+
+_limiters = OrderedDict()
+
+# Route class of the current request, set by the classify dependency
+_route_class = ContextVar("route_class", default=RouteClass.EXPORT)
+
+
+def classify(route_class: RouteClass):
+    """Route dependency putting the route's database calls under the limits
+    of route_class. Routes without it count as EXPORT.
+
+    Usage:
+        @router.post("/labels/", dependencies=[Depends(classify(RouteClass.METADATA))])
+    """
+
+    async def dependency():
+        _route_class.set(route_class)
+
+    return dependency
+
+
+def limiter(creds: Neo4jCredentials, route_class: RouteClass) -> Limiter | None:
+    if LIMITS[route_class].max_in_flight <= 0:
+        return None
+    key = (route_class, creds.uri, creds.database)
+    current = _limiters.get(key)
+    if current is not None:
+        _limiters.move_to_end(key)
+        return current
+
+    current = _limiters[key] = Limiter(route_class, creds.uri, creds.database)
+    for k, entry in list(_limiters.items()):
+        if len(_limiters) <= ADMISSION_MAX_TARGETS:
+            break
+        if k != key and entry.idle():
+            del _limiters[k]
+            entry.forget()
+    return current
+
+
+@asynccontextmanager
+async def admit(creds: Neo4jCredentials):
+    """Hold an admission slot for creds' database for the duration of the
+    block, waiting for one if the current route class is at its limit.
+
+    Raises:
+        HTTPException: 503 with Retry-After if the call is shed.
+    """
+    current = limiter(creds, _route_class.get())
+    if current is None:
+        yield
+        return
+    with stage("admission"):
+        await current.acquire()
+    try:
+        yield
+    finally:
+        current.release()
+
+
+def stats() -> list[dict]:
+    return [entry.stats() for entry in _limiters.values()]
@@ -0,0 +1,85 @@
+from collections import OrderedDict
+from neo4j_python_server.logger import logger
+import asyncio
+import os
+import time
+
+
+class TTLCache:
+    """Size-bounded async cache with stale-while-revalidate refresh.
+
+    Entries younger than `ttl` seconds are returned as is. Entries older than
+    that but within `ttl + stale_ttl` are still returned, while a background
+    task reloads them. Anything older is reloaded before returning. The least
+    recently used entry is dropped once `max_entries` is exceeded.
+
+    Loads, including background refreshes, that were in flight when
+    `invalidate` ran return their value without caching it, so they can't
+    put back what was invalidated.
+    """
+
+    def __init__(self, ttl: float, stale_ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._refreshing = {}
+        self._generation = 0
+
+    async def get(self, key: tuple, loader):
+        """Return the cached value for key, calling `await loader()` to
+        (re)load it when missing or expired."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, loaded_at = entry
+            age = time.monotonic() - loaded_at
+            if age <= self.ttl + self.stale_ttl:
+                self._entries.move_to_end(key)
+                if age > self.ttl:
+                    self._refresh_in_background(key, loader)
+                return value
+        return await self._load(key, loader)
+
+    async def _load(self, key: tuple, loader):
+        generation = self._generation
+        value = await loader()
+        if generation != self._generation:
+            return value
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def _refresh_in_background(self, key: tuple, loader):
+        if key in self._refreshing:
+            return
+
+        async def refresh():
+            try:
+                await self._load(key, loader)
+            except Exception as e:
+                logger.error("Background refresh of %s failed: %s", key[-1], e)
+            finally:
+                self._refreshing.pop(key, None)
+
+        # Keep a reference so the task isn't garbage collected mid-refresh
+        self._refreshing[key] = asyncio.create_task(refresh())
+
+    def invalidate(self, prefix: tuple = ()) -> int:
+        """Drop every entry whose key starts with prefix. Returns the count dropped."""
+        self._generation += 1
+        keys = [k for k in self._entries if k[: len(prefix)] == prefix]
+        for k in keys:
+            del self._entries[k]
+        return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+metadata_cache = TTLCache(
+    ttl=float(os.environ.get("METADATA_CACHE_TTL_SECONDS", 60)),
+    stale_ttl=float(os.environ.get("METADATA_CACHE_STALE_SECONDS", 300)),
+    max_entries=int(os.environ.get("METADATA_CACHE_MAX_ENTRIES", 256)),
+)
@@ -0,0 +1,113 @@
+from neo4j_python_server.logger import logger
+from neo4j_python_server.models import Neo4jCredentials
+import asyncio
+import json
+import threading
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    is in flight wait for and share its result, or its exception. Nothing is
+    kept once the call completes, so this never serves stale results.
+    `hits` counts the calls that were served by another caller's call.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: tuple, fn, *args):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "in_flight": self.in_flight()}
+
+
+class AsyncSingleFlight(SingleFlight):
+    """SingleFlight for coroutines on one event loop.
+
+    The call runs as its own task, so a waiting request being cancelled, eg.
+    by its client disconnecting, doesn't cancel it for the others.
+    """
+
+    async def do(self, key: tuple, fn, *args):
+        task = self._calls.get(key)
+        if task is None:
+            self.misses += 1
+            task = self._calls[key] = asyncio.ensure_future(fn(*args))
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.hits += 1
+            logger.debug("Joined in-flight %s call", self.name)
+        return await asyncio.shield(task)
+
+    def _done(self, key: tuple, task):
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+
+
+def request_key(creds: Neo4jCredentials, query: str, params: dict, *options) -> tuple:
+    """Coalescing key for a read: the target database and credentials, the
+    query with whitespace normalised, its parameters and any options, such
+    as the export format, that change the converted result."""
+    return (
+        (creds.uri, creds.username, creds.password, creds.database),
+        " ".join(query.split()),
+        json.dumps(params, sort_keys=True, default=str),
+        options,
+    )
+
+
+# Raw query results, for query_db / async_query_db callers
+sync_queries = SingleFlight("sync query")
+queries = AsyncSingleFlight("query")
+# Query plus export, for routes returning converted results
+exports = AsyncSingleFlight("export")
+
+
+def stats() -> dict:
+    return {c.name: c.stats() for c in (sync_queries, queries, exports)}
@@ -0,0 +1,172 @@
+from enum import Enum
+from fastapi import HTTPException, Response
+from neo4j_python_server.encoding import default
+from neo4j_python_server.export import IMPORT_KEY_PROPERTY, node_labels
+from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import FORMAT_LABELS, stage
+from neo4j_python_server.pagination import CursorTracker
+import io
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+class ColumnarFormat(str, Enum):
+    """Table export formats, accepted alongside ExportFormat by the routes
+    that can return one row per Node or Relationship."""
+
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+
+COLUMNAR_FORMATS = tuple(ColumnarFormat)
+FORMAT_LABELS.update(f.value for f in ColumnarFormat)
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_MEDIA_TYPE = "application/vnd.apache.parquet"
+
+# Records converted into one Arrow record batch at a time
+COLUMNAR_BATCH_SIZE = int(os.environ.get("COLUMNAR_BATCH_SIZE", 10000))
+
+PRIMITIVES = (str, int, float, bool, type(None))
+
+
+def _property_value(value):
+    if isinstance(value, PRIMITIVES):
+        return value
+    if type(value) is list and all(isinstance(v, PRIMITIVES) for v in value):
+        return value
+    # Temporal, spatial and mixed list values
+    return default(value)
+
+
+def _column(values: list):
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        # Mixed types within a property, eg. ints and strings
+        return pa.array([None if v is None else str(v) for v in values])
+
+
+def _add_properties(columns: dict, elements: list):
+    keys = dict.fromkeys(
+        k for e in elements for k in e._properties if k != IMPORT_KEY_PROPERTY
+    )
+    for key in keys:
+        columns[f"properties.{key}"] = [
+            _property_value(e._properties.get(key)) for e in elements
+        ]
+
+
+def nodes_batch(nodes: list):
+    """Arrow table of element_id, labels and one properties.<key> column per
+    property key found in this batch."""
+    columns = {
+        "element_id": [n.element_id for n in nodes],
+        "labels": [node_labels(n) for n in nodes],
+    }
+    _add_properties(columns, nodes)
+    return pa.table({k: _column(v) for k, v in columns.items()})
+
+
+def relationships_batch(relationships: list):
+    """Arrow table of element_id, type, source, target and one
+    properties.<key> column per property key found in this batch."""
+    columns = {
+        "element_id": [r.element_id for r in relationships],
+        "type": [r.type for r in relationships],
+        "source": [r.start_node.element_id for r in relationships],
+        "target": [r.end_node.element_id for r in relationships],
+    }
+    _add_properties(columns, relationships)
+    return pa.table({k: _column(v) for k, v in columns.items()})
+
+
+def _concat(tables: list):
+    """Combine per-batch tables whose property columns may differ. Missing
+    columns become nulls and conflicting types fall back to strings."""
+    try:
+        return pa.concat_tables(tables, promote_options="permissive")
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        logger.debug("Casting conflicting columns to string: %s", e)
+
+    types = {}
+    for table in tables:
+        for field in table.schema:
+            types.setdefault(field.name, set()).add(field.type)
+    conflicting = {name for name, t in types.items() if len(t) > 1}
+
+    def stringify(table):
+        for name in conflicting.intersection(table.column_names):
+            i = table.schema.get_field_index(name)
+            values = table.column(name).to_pylist()
+            column = pa.array([None if v is None else str(v) for v in values])
+            table = table.set_column(i, name, column)
+        return table
+
+    return pa.concat_tables(
+        [stringify(t) for t in tables], promote_options="permissive"
+    )
+
+
+async def build_table(records, variable: str, to_batch, batch_size: int):
+    """Read records from an async iterator, converting every batch_size of them
+    into an Arrow table, so only one batch of driver objects is held at once."""
+    tables = []
+    chunk = []
+    async for record in records:
+        chunk.append(record[variable])
+        if len(chunk) == batch_size:
+            tables.append(to_batch(chunk))
+            chunk = []
+    if chunk or not tables:
+        tables.append(to_batch(chunk))
+    return _concat(tables)
+
+
+def require_pyarrow():
+    if pa is None:
+        raise HTTPException(
+            status_code=406, detail="Columnar export formats require pyarrow"
+        )
+
+
+def columnar_response(table, format: ColumnarFormat, headers: dict = None) -> Response:
+    """Encode a table as an Arrow IPC stream or a Parquet file."""
+    sink = io.BytesIO()
+    if format == ColumnarFormat.PARQUET:
+        pq.write_table(table, sink)
+        media_type = PARQUET_MEDIA_TYPE
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        media_type = ARROW_MEDIA_TYPE
+    return Response(sink.getvalue(), media_type=media_type, headers=headers)
+
+
+async def columnar_export(
+    records, variable: str, format: ColumnarFormat, page_size: int | None = None
+) -> Response:
+    """Build and encode the node ("n") or relationship ("r") table for a
+    record stream. For paginated requests the next page's cursor is returned
+    in an X-Next-Cursor header."""
+    require_pyarrow()
+    tracker = None
+    if page_size is not None:
+        tracker = CursorTracker(variable, page_size)
+        records = tracker.track(records)
+
+    to_batch = nodes_batch if variable == "n" else relationships_batch
+    with stage("export", format):
+        table = await build_table(records, variable, to_batch, COLUMNAR_BATCH_SIZE)
+    logger.debug("Built %s table with %s rows", format.value, table.num_rows)
+
+    headers = {}
+    if tracker is not None and tracker.next_cursor is not None:
+        headers["X-Next-Cursor"] = tracker.next_cursor
+    with stage("encode"):
+        return columnar_response(table, format, headers)
@@ -0,0 +1,65 @@
+from neo4j_python_server.export import ExportFormat
+
+
+class Compactor:
+    """Replaces element id strings with dense integers and label / type
+    strings with indexes into a lookup table, for one response.
+
+    Nodes and relationships share one id space, since cytoscape requires ids
+    to be unique across all elements.
+    """
+
+    def __init__(self):
+        self.ids = {}
+        self.labels = {}
+
+    def id(self, element_id: str) -> int:
+        return self.ids.setdefault(element_id, len(self.ids))
+
+    def label(self, label: str) -> int:
+        return self.labels.setdefault(label, len(self.labels))
+
+    def element(self, element: dict) -> dict:
+        """Compact copy of a cytoscape `data` dict or d3 node / link. The
+        original is left untouched as it may be cached."""
+        compacted = dict(element)
+        if "source" in element:
+            compacted["source"] = self.id(element["source"])
+            compacted["target"] = self.id(element["target"])
+        compacted["id"] = self.id(element["id"])
+        compacted["label"] = self.label(element["label"])
+        return compacted
+
+    def tables(self, include_ids: bool) -> dict:
+        tables = {"labels": list(self.labels)}
+        if include_ids:
+            tables["ids"] = list(self.ids)
+        return tables
+
+
+def compact_export(payload, format: ExportFormat, include_ids: bool = False) -> dict:
+    """Compact a cytoscape or d3 export payload.
+
+    cytoscape element lists become `{"elements": [...], "labels": [...]}`, while
+    d3 and composite payloads gain a `labels` key. Each `label` field holds an index into
+    `labels`. If include_ids is set, `ids` lists the original element id for
+    each integer id. Other formats are returned unchanged.
+    """
+    compactor = Compactor()
+    if format == ExportFormat.CYTOSCAPE and isinstance(payload, dict):
+        # export_composite {nodes, edges}
+        compacted = {
+            key: [{**e, "data": compactor.element(e["data"])} for e in elements]
+            for key, elements in payload.items()
+        }
+        return {**compacted, **compactor.tables(include_ids)}
+    if format == ExportFormat.CYTOSCAPE:
+        elements = [{**e, "data": compactor.element(e["data"])} for e in payload]
+        return {"elements": elements, **compactor.tables(include_ids)}
+    if format == ExportFormat.D3:
+        compacted = {
+            key: [compactor.element(e) for e in elements]
+            for key, elements in payload.items()
+        }
+        return {**compacted, **compactor.tables(include_ids)}
+    return payload
@@ -1,7 +1,15 @@
-from neo4j import GraphDatabase, basic_auth, exceptions
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from neo4j import AsyncGraphDatabase, GraphDatabase, basic_auth, exceptions
 from pydantic import BaseModel
+from neo4j_python_server import coalesce
+from neo4j_python_server.admission import admit
 from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import add_query, add_rows, stage
 from neo4j_python_server.models import Neo4jCredentials
+import os
+import threading
+import time
 
 
 # Using simpler query
@@ -30,27 +38,305 @@ from neo4j_python_server.models import Neo4jCredentials
 #         return False, f"{e}"
 
 
+class _Entry:
+    __slots__ = ("driver", "last_used", "leases")
+
+    def __init__(self, driver, last_used: float):
+        self.driver = driver
+        self.last_used = last_used
+        self.leases = 0
+
+
+class DriverRegistry:
+    """Process-wide pool of long-lived Neo4j drivers.
+
+    Drivers are keyed by the full Neo4jCredentials tuple so each target keeps
+    its own connection pool across requests. Callers lease a driver for the
+    duration of their work, see lease. Drivers idle for longer than
+    `idle_timeout` seconds since their last lease ended are closed, and the
+    least recently used driver is closed once more than `max_drivers` are
+    open. Leased drivers are never closed; if every driver is leased the
+    registry holds more than `max_drivers` until leases end.
+    """
+
+    def __init__(
+        self,
+        factory=GraphDatabase.driver,
+        max_drivers: int = int(os.environ.get("NEO4J_MAX_DRIVERS", 16)),
+        idle_timeout: float = float(os.environ.get("NEO4J_DRIVER_IDLE_SECONDS", 300)),
+    ):
+        self._factory = factory
+        self.max_drivers = max_drivers
+        self.idle_timeout = idle_timeout
+        self._drivers = OrderedDict()
+        # Entries removed from _drivers while leased, closed on their last release
+        self._retired = set()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(creds: Neo4jCredentials) -> tuple:
+        return (creds.uri, creds.username, creds.password, creds.database)
+
+    def _acquire(self, creds: Neo4jCredentials):
+        """Lease the driver entry for creds. Returns it plus any idle drivers
+        evicted to make room."""
+        key = self.key(creds)
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for k, entry in list(self._drivers.items()):
+                if (
+                    k != key
+                    and entry.leases == 0
+                    and now - entry.last_used > self.idle_timeout
+                ):
+                    evicted.append(self._drivers.pop(k).driver)
+
+            entry = self._drivers.pop(key, None)
+            if entry is None:
+                entry = _Entry(
+                    self._factory(
+                        creds.uri, auth=basic_auth(creds.username, creds.password)
+                    ),
+                    now,
+                )
+                logger.debug("Opened driver for %s (%s)", creds.uri, creds.database)
+            entry.leases += 1
+            entry.last_used = now
+            self._drivers[key] = entry
+
+            for k in list(self._drivers):
+                if len(self._drivers) <= self.max_drivers:
+                    break
+                if self._drivers[k].leases == 0:
+                    evicted.append(self._drivers.pop(k).driver)
+        return entry, evicted
+
+    def _release(self, entry: _Entry):
+        """End a lease. Returns the driver if it is now due to be closed."""
+        with self._lock:
+            entry.leases -= 1
+            entry.last_used = time.monotonic()
+            if entry.leases == 0 and entry in self._retired:
+                self._retired.discard(entry)
+                return entry.driver
+        return None
+
+    def _pop(self, creds: Neo4jCredentials):
+        """Forget the driver for creds. Returns it if it can be closed now."""
+        with self._lock:
+            entry = self._drivers.pop(self.key(creds), None)
+            if entry is None:
+                return None
+            if entry.leases:
+                self._retired.add(entry)
+                return None
+            return entry.driver
+
+    def _pop_all(self) -> list:
+        with self._lock:
+            drivers = [e.driver for e in self._drivers.values()]
+            drivers += [e.driver for e in self._retired]
+            self._drivers.clear()
+            self._retired.clear()
+        return drivers
+
+    @contextmanager
+    def lease(self, creds: Neo4jCredentials):
+        """Use the pooled driver for creds for the duration of the block."""
+        with stage("driver"):
+            entry, evicted = self._acquire(creds)
+            for d in evicted:
+                d.close()
+        try:
+            yield entry.driver
+        finally:
+            driver = self._release(entry)
+            if driver is not None:
+                driver.close()
+
+    def discard(self, creds: Neo4jCredentials):
+        """Close and forget the driver for creds, eg. after an auth failure.
+        A leased driver is closed when its last lease ends."""
+        driver = self._pop(creds)
+        if driver is not None:
+            driver.close()
+
+    def close_all(self):
+        for driver in self._pop_all():
+            driver.close()
+
+    def __len__(self):
+        return len(self._drivers)
+
+
+class AsyncDriverRegistry(DriverRegistry):
+    """DriverRegistry variant holding AsyncDriver instances for async routes."""
+
+    def __init__(self, factory=AsyncGraphDatabase.driver, **kwargs):
+        super().__init__(factory=factory, **kwargs)
+
+    @asynccontextmanager
+    async def lease(self, creds: Neo4jCredentials):
+        with stage("driver"):
+            entry, evicted = self._acquire(creds)
+            for d in evicted:
+                await d.close()
+        try:
+            yield entry.driver
+        finally:
+            driver = self._release(entry)
+            if driver is not None:
+                await driver.close()
+
+    async def discard(self, creds: Neo4jCredentials):
+        driver = self._pop(creds)
+        if driver is not None:
+            await driver.close()
+
+    async def close_all(self):
+        for driver in self._pop_all():
+            await driver.close()
+
+
+drivers = DriverRegistry()
+async_drivers = AsyncDriverRegistry()
+
+
 # Using verify_connetivity() which try-except doesn't properly catch
 def can_connect(creds: Neo4jCredentials) -> (bool, str):
     try:
-        with GraphDatabase.driver(
-            creds.uri, auth=(creds.username, creds.password)
-        ) as driver:
+        with drivers.lease(creds) as driver:
             driver.verify_connectivity()
-            return True, None
+        return True, None
     except exceptions.AuthError as e:
-        print(e)
+        logger.error(e)
+        drivers.discard(creds)
         return False, f"{e}"
     except exceptions.ServiceUnavailable as e:
-        print(e)
+        logger.error(e)
         return False, f"{e}"
     except Exception as e:
-        print(e)
+        logger.error(e)
         return False, f"{e}"
 
 
 def query_db(creds: Neo4jCredentials, query: str, params: dict = {}):
-    with GraphDatabase.driver(
-        creds.uri, auth=basic_auth(creds.username, creds.password)
-    ) as driver:
-        return driver.execute_query(query, params, database=creds.database)
+    try:
+        with drivers.lease(creds) as driver, stage("query"):
+            result = driver.execute_query(query, params, database=creds.database)
+        add_rows(len(result.records))
+        add_query(creds, result.summary)
+        return result
+    except exceptions.AuthError:
+        drivers.discard(creds)
+        raise
+
+
+def read_db(creds: Neo4jCredentials, query: str, params: dict = {}):
+    """query_db for read-only queries. Concurrent identical reads against the
+    same database share one call, see coalesce.SingleFlight."""
+    key = coalesce.request_key(creds, query, params)
+    return coalesce.sync_queries.do(key, query_db, creds, query, params)
+
+
+async def async_can_connect(creds: Neo4jCredentials) -> (bool, str):
+    try:
+        async with async_drivers.lease(creds) as driver:
+            await driver.verify_connectivity()
+        return True, None
+    except exceptions.AuthError as e:
+        logger.error(e)
+        await async_drivers.discard(creds)
+        return False, f"{e}"
+    except Exception as e:
+        logger.error(e)
+        return False, f"{e}"
+
+
+async def async_query_db(creds: Neo4jCredentials, query: str, params: dict = {}):
+    """Async counterpart to query_db for use from `async def` routes. Waits
+    for admission to creds' database first, see admission.admit."""
+    try:
+        async with admit(creds), async_drivers.lease(creds) as driver:
+            with stage("query"):
+                result = await driver.execute_query(
+                    query, params, database=creds.database
+                )
+        add_rows(len(result.records))
+        add_query(creds, result.summary)
+        return result
+    except exceptions.AuthError:
+        await async_drivers.discard(creds)
+        raise
+
+
+async def async_read_db(creds: Neo4jCredentials, query: str, params: dict = {}):
+    """Async counterpart to read_db."""
+    key = coalesce.request_key(creds, query, params)
+    return await coalesce.queries.do(key, async_query_db, creds, query, params)
+
+
+async def async_stream_db(creds: Neo4jCredentials, query: str, params: dict = {}):
+    """Yield records one at a time from a session result instead of
+    materialising the full result like async_query_db. The admission slot is
+    held until the last record has been read."""
+    async with admit(creds), async_drivers.lease(creds) as driver:
+        async with driver.session(database=creds.database) as session:
+            with stage("query"):
+                result = await session.run(query, params)
+            rows = 0
+            try:
+                async for record in result:
+                    rows += 1
+                    yield record
+                add_query(creds, await result.consume())
+            finally:
+                add_rows(rows)
+
+
+async def _prepend(first, records):
+    yield first
+    async for record in records:
+        yield record
+
+
+async def async_open_stream(creds: Neo4jCredentials, query: str, params: dict = {}):
+    """async_stream_db, started before returning. Admission, connection and
+    query errors are raised here, so streamed routes can still answer with
+    an error status instead of cutting a 200 response short."""
+    records = async_stream_db(creds, query, params)
+    try:
+        first = await anext(records)
+    except StopAsyncIteration:
+        return records
+    return _prepend(first, records)
+
+
+async def _run_write(tx, query: str, params: dict):
+    result = await tx.run(query, params)
+    records = [record async for record in result]
+    summary = await result.consume()
+    return records, summary
+
+
+async def async_execute_write(creds: Neo4jCredentials, work, *args):
+    """Call `await work(tx, *args)` in a managed write transaction, which the
+    driver retries on transient errors."""
+    async with admit(creds), async_drivers.lease(creds) as driver:
+        async with driver.session(database=creds.database) as session:
+            with stage("query"):
+                return await session.execute_write(work, *args)
+
+
+async def async_execute_read(creds: Neo4jCredentials, work, *args, **kwargs):
+    """Call `await work(tx, *args, **kwargs)` in a managed read transaction."""
+    async with admit(creds), async_drivers.lease(creds) as driver:
+        async with driver.session(database=creds.database) as session:
+            with stage("query"):
+                return await session.execute_read(work, *args, **kwargs)
+
+
+async def async_write_db(creds: Neo4jCredentials, query: str, params: dict = {}):
+    """Run a write query in its own managed transaction. Returns (records, summary)."""
+    return await async_execute_write(creds, _run_write, query, params)
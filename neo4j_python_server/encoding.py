@@ -0,0 +1,86 @@
+from fastapi import Request, Response
+from neo4j.spatial import Point
+from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import stage
+import datetime
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = (MSGPACK_MEDIA_TYPE, "application/x-msgpack")
+
+
+def default(value):
+    """Convert Neo4j property values the encoders don't know about.
+
+    Temporal values become ISO 8601 strings and points become
+    {"srid", "x", "y"[, "z"]} objects.
+    """
+    if isinstance(value, Point):
+        return {"srid": value.srid, **dict(zip(("x", "y", "z"), value))}
+    if hasattr(value, "iso_format"):
+        # neo4j.time Date, Time, DateTime and Duration
+        return value.iso_format()
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, datetime.timedelta):
+        return value.total_seconds()
+    if isinstance(value, (tuple, set, frozenset)):
+        return list(value)
+    return str(value)
+
+
+def _plain(value):
+    """Replace tuple subclasses (points, durations) that the stdlib json module
+    would otherwise write as bare arrays."""
+    if isinstance(value, dict):
+        return {k: _plain(v) for k, v in value.items()}
+    if type(value) in (list, tuple):
+        return [_plain(v) for v in value]
+    if isinstance(value, tuple):
+        return default(value)
+    return value
+
+
+def encode_json(payload) -> bytes:
+    """Encode with orjson when it's installed, otherwise the stdlib json module."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(_plain(payload), default=default).encode()
+
+
+def encode_msgpack(payload) -> bytes:
+    # strict_types sends tuple subclasses such as Point through default()
+    return msgpack.packb(payload, default=default, strict_types=True)
+
+
+def wants_msgpack(request: Request) -> bool:
+    accept = request.headers.get("accept", "")
+    return any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES)
+
+
+def encoded_response(request: Request, payload, status_code: int = 200) -> Response:
+    """Encode an export payload directly to bytes, bypassing FastAPI's
+    jsonable_encoder. Responds with MessagePack if the Accept header asks for
+    it and msgpack is installed, otherwise JSON."""
+    if wants_msgpack(request):
+        if msgpack is not None:
+            with stage("encode"):
+                body = encode_msgpack(payload)
+            return Response(
+                body, status_code=status_code, media_type=MSGPACK_MEDIA_TYPE
+            )
+        logger.warning("MessagePack requested but msgpack is not installed")
+    with stage("encode"):
+        body = encode_json(payload)
+    return Response(body, status_code=status_code, media_type=JSON_MEDIA_TYPE)
@@ -1,6 +1,8 @@
 from pydantic import BaseModel
 from enum import Enum
-from neo4j_python_server.logger import logger
+from neo4j_python_server.logger import LOG_SAMPLE_EVERY, Summary, logger
+from neo4j_python_server.metrics import FORMAT_LABELS, stage
+import logging
 
 
 class ExportFormat(str, Enum):
@@ -9,187 +11,196 @@ class ExportFormat(str, Enum):
     DEFAULT = "default"
 
 
+FORMAT_LABELS.update(f.value for f in ExportFormat)
+
+# Label and property that streaming imports tag the nodes of unfinished jobs
+# with, see imports.ImportJob. Exports and metadata leave them out.
+IMPORT_KEY_LABEL = "_ImportPending"
+IMPORT_KEY_PROPERTY = "_import_key"
+
+
+# Element converters shared by every exporter. Each reads ids, labels and
+# types straight off the driver's Node / Relationship objects and reuses the
+# driver's properties dict rather than copying it, unless it holds an import
+# key.
+
+
+def node_labels(n) -> list[str]:
+    return [label for label in n.labels if label != IMPORT_KEY_LABEL]
+
+
+def element_properties(e) -> dict:
+    props = e._properties
+    if IMPORT_KEY_PROPERTY in props:
+        return {k: v for k, v in props.items() if k != IMPORT_KEY_PROPERTY}
+    return props
+
+
+def first_label(n, default: str | None = None) -> str | None:
+    for label in n.labels:
+        if label != IMPORT_KEY_LABEL:
+            return label
+    return default
+
+
+def node_default(n) -> dict:
+    return {
+        "element_id": n.element_id,
+        "labels": node_labels(n),
+        "properties": element_properties(n),
+    }
+
+
+def node_graph(n, label: str) -> dict:
+    """Node in the flat {id, label, properties} shape used by cytoscape and d3."""
+    return {
+        "id": n.element_id,
+        "label": label,
+        "properties": element_properties(n),
+    }
+
+
+def relationship_default(r) -> dict:
+    return {
+        "source": node_default(r.start_node),
+        "target": node_default(r.end_node),
+        "element_id": r.element_id,
+        "type": r.type,
+        "properties": r._properties,
+    }
+
+
+def relationship_graph(r, id: str) -> dict:
+    """Relationship in the flat {source, target, id, label, properties} shape
+    used by cytoscape and d3."""
+    return {
+        "source": r.start_node.element_id,
+        "target": r.end_node.element_id,
+        "id": id,
+        "label": r.type,
+        "properties": r._properties,
+    }
+
+
 def export_schema_default(records: list[any]) -> dict:
-    # A list of lists will be returned. Only one element will be returned
-    datamodel = records[0]
-
-    # First indexed list are all Nodes information
-    nodes = datamodel[0]
-
-    # Second indexed list are all Relationships information
-    relationships = datamodel[1]
-
-    converted_nodes = [
-        {
-            "element_id": n.element_id,
-            "labels": list(n.labels),
-            "properties": n._properties,
-        }
-        for n in nodes
-    ]
+    # A list of lists will be returned. Only one element will be returned.
+    # First indexed list are all Nodes information, second are all Relationships
+    nodes, relationships = records[0][0], records[0][1]
 
+    converted_elements = [node_default(n) for n in nodes]
     try:
-        converted_rels = [
-            {
-                "source": {
-                    "element_id": r.start_node.element_id,
-                    "labels": list(r.start_node.labels),
-                    "properties": r.start_node._properties,
-                },
-                "target": {
-                    "element_id": r.end_node.element_id,
-                    "labels": list(r.end_node.labels),
-                    "properties": r.end_node._properties,
-                },
-                "element_id": r.element_id,
-                "type": r.type,
-                "properties": r._properties,
-            }
-            for r in relationships
-        ]
+        converted_elements.extend(relationship_default(r) for r in relationships)
     except Exception as e:
         logger.error(
-            f"Could not convert relationships schema to default format. First record for references: {records[0]}"
+            "Could not convert relationships schema to default format. First record for references: %s",
+            records[0],
         )
 
-    converted_elements = converted_nodes + converted_rels
-    logger.info(f"Returning schema result: {converted_elements}")
+    logger.info("Returning schema result: %s", Summary(converted_elements))
     return converted_elements
 
 
 def export_schema_cytoscape(records: list[any]) -> dict:
+    nodes, relationships = records[0][0], records[0][1]
 
-    # A list of lists will be returned. Only one element will be returned
-    datamodel = records[0]
-
-    # First indexed list are all Nodes information
-    nodes = datamodel[0]
-
-    # Second indexed list are all Relationships information
-    relationships = datamodel[1]
-
-    converted_nodes = [
-        {
-            "data": {
-                "id": n.element_id,
-                "label": list(n.labels)[0],
-                "properties": n._properties,
-            }
-        }
-        for n in nodes
-    ]
-
+    converted_elements = [{"data": node_graph(n, first_label(n))} for n in nodes]
     try:
-        converted_rels = [
-            {
-                "data": {
-                    "source": r.start_node.element_id,
-                    "target": r.end_node.element_id,
-                    "id": f"{r.element_id}r",
-                    "label": r.type,
-                    "properties": r._properties,
-                }
-            }
-            for r in relationships
-        ]
+        converted_elements.extend(
+            {"data": relationship_graph(r, f"{r.element_id}r")} for r in relationships
+        )
     except Exception as e:
         logger.error(
-            f"Could not convert relationships schema to Cytoscape format. First record for references: {records[0]}"
+            "Could not convert relationships schema to Cytoscape format. First record for references: %s",
+            records[0],
         )
-    converted_elements = converted_nodes + converted_rels
-    logger.info(f"Returning schema result: {converted_elements}")
+
+    logger.info("Returning schema result: %s", Summary(converted_elements))
     return converted_elements
 
 
 def export_schema_d3(records: list[any]) -> dict:
+    nodes, relationships = records[0][0], records[0][1]
 
-    datamodel = records[0]
-    nodes = datamodel[0]
-    relationships = datamodel[1]
-
-    converted_nodes = [
-        {
-            "id": n.element_id,
-            "label": list(n.labels)[0],
-            "properties": n._properties,
-        }
-        for n in nodes
-    ]
+    converted_elements = {
+        "nodes": [node_graph(n, first_label(n)) for n in nodes],
+        "links": [relationship_graph(r, f"{r.element_id}r") for r in relationships],
+    }
+    logger.info("Returning schema for d3 result: %s", Summary(converted_elements))
+    return converted_elements
 
-    converted_rels = [
-        {
-            "source": r.start_node.element_id,
-            "target": r.end_node.element_id,
-            "id": f"{r.element_id}r",
-            "label": r.type,
-            "properties": r._properties,
-        }
+
+def _visible_schema(records: list[any]) -> list[any]:
+    """db.schema.visualization records without the import key label."""
+    nodes, relationships = records[0][0], records[0][1]
+    hidden = {n.element_id for n in nodes if IMPORT_KEY_LABEL in n.labels}
+    if not hidden:
+        return records
+    nodes = [n for n in nodes if n.element_id not in hidden]
+    relationships = [
+        r
         for r in relationships
+        if r.start_node.element_id not in hidden and r.end_node.element_id not in hidden
     ]
-    converted_elements = {"nodes": converted_nodes, "links": converted_rels}
-    logger.info(f"Returning schema for d3 result: {converted_elements}")
-    return converted_elements
+    return [(nodes, relationships)]
 
 
 def export_schema(
     records: list[any],
     format: ExportFormat,
 ) -> dict | list[dict]:
-    if format == ExportFormat.CYTOSCAPE:
-        return export_schema_cytoscape(records)
-    elif format == ExportFormat.D3:
-        return export_schema_d3(records)
-    else:
-        return export_schema_default(records)
+    records = _visible_schema(records)
+    with stage("export", format):
+        if format == ExportFormat.CYTOSCAPE:
+            return export_schema_cytoscape(records)
+        elif format == ExportFormat.D3:
+            return export_schema_d3(records)
+        else:
+            return export_schema_default(records)
 
 
 def export_nodes_default(records: list[any]) -> list[dict]:
-    return [
-        {
-            "element_id": n.values()[0]._element_id,
-            "labels": list(n.values()[0]._labels),
-            "properties": n.values()[0]._properties,
-        }
-        for n in records
-    ]
+    return [node_default(rec[0]) for rec in records]
 
 
-def export_nodes_cytoscape(records: list[any]) -> list[dict]:
+def labelled_node(rec, i: int, wrap: bool, debug: bool) -> dict | None:
+    """Cytoscape / d3 conversion of record i of a result, or None for a Node
+    without a label. Debug logs are only written for 1 in LOG_SAMPLE_EVERY
+    records, by i."""
+    n = rec[0]
+    label = first_label(n)
+    if debug and i % LOG_SAMPLE_EVERY == 0:
+        logger.debug("labels (record %s): %s", i, n.labels)
+        if label is None:
+            logger.debug("Skipping Node with no label: %s", rec)
+    if label is None:
+        return None
+    converted = node_graph(n, label)
+    return {"data": converted} if wrap else converted
+
+
+def log_skipped_nodes(skipped: int):
+    if skipped:
+        logger.info("Skipped %s Nodes with no label", skipped)
+
+
+def _export_labelled_nodes(records: list[any], wrap: bool) -> list[dict]:
+    """Shared cytoscape / d3 node conversion. Nodes without a label are skipped."""
     result = []
-    for n in records:
-        labels = [x for x in n.values()[0]._labels]
-        logger.debug(f"labels: {labels}")
-        if len(labels) == 0:
-            logger.info(f"Skipping Node with no label: {n}")
-            continue
-        result.append(
-            {
-                "data": {
-                    "id": n.values()[0]._element_id,
-                    "label": labels[0],
-                    "properties": n.values()[0]._properties,
-                }
-            }
-        )
+    debug = logger.isEnabledFor(logging.DEBUG)
+    for i, rec in enumerate(records):
+        converted = labelled_node(rec, i, wrap, debug)
+        if converted is not None:
+            result.append(converted)
+    log_skipped_nodes(len(records) - len(result))
     return result
 
 
+def export_nodes_cytoscape(records: list[any]) -> list[dict]:
+    return _export_labelled_nodes(records, wrap=True)
+
+
 def export_nodes_d3(records: list[any]) -> list[dict]:
-    result = []
-    for n in records:
-        labels = [x for x in n.values()[0]._labels]
-        logger.debug(f"labels: {labels}")
-        if len(labels) == 0:
-            logger.info(f"Skipping Node with no label: {n}")
-            continue
-        result.append(
-            {
-                "id": n.values()[0]._element_id,
-                "label": labels[0],
-                "properties": n.values()[0]._properties,
-            }
-        )
-    return {"nodes": result}
+    return {"nodes": _export_labelled_nodes(records, wrap=False)}
 
 
 def export_nodes(
@@ -197,132 +208,69 @@ def export_nodes(
     format: ExportFormat,
 ) -> dict | list[dict]:
     logger.debug(
-        f"exporting nodes for format '{format}'. Number of records: {len(records)}. First record: {records[0] if len(records) > 0 else ''}"
+        "exporting nodes for format '%s'. Records: %s", format, Summary(records)
     )
-    if format == ExportFormat.CYTOSCAPE:
-        return export_nodes_cytoscape(records)
-    elif format == ExportFormat.D3:
-        return export_nodes_d3(records)
-    else:
-        return export_nodes_default(records)
+    with stage("export", format):
+        if format == ExportFormat.CYTOSCAPE:
+            return export_nodes_cytoscape(records)
+        elif format == ExportFormat.D3:
+            return export_nodes_d3(records)
+        else:
+            return export_nodes_default(records)
 
 
 def export_relationships_default(records: list[any]) -> list[dict]:
-    try:
-        results = []
-        for rec in records:
-            r = rec.values()[1]
-            source_eid = r._start_node._element_id
-            source_labels = list(r._start_node._labels)
-            source_props = r._start_node._properties
-            # logger.debug(f"Source node: {source_eid} {source_labels} {source_props}")
-
-            target_eid = r._end_node._element_id
-            target_labels = list(r._end_node._labels)
-            target_props = r._end_node._properties
-            # logger.debug(f"Target node: {target_eid} {target_labels} {target_props}")
-
-            rel_eid = r._element_id
-            rel_type = rec.data()["r"][1]
-            rel_props = r._properties
-            # logger.debug(f"Relationship: {rel_eid} {rel_type} {rel_props}")
-
-            results.append(
-                {
-                    "source": {
-                        "element_id": source_eid,
-                        "labels": source_labels,
-                        "properties": source_props,
-                    },
-                    "target": {
-                        "element_id": target_eid,
-                        "labels": target_labels,
-                        "properties": target_props,
-                    },
-                    "element_id": rel_eid,
-                    "type": rel_type,
-                    "properties": rel_props,
-                }
+    results = []
+    for rec in records:
+        try:
+            results.append(relationship_default(rec[1]))
+        except Exception as e:
+            logger.error(
+                "Could not convert relationship record to default format: %s. ERROR: %s",
+                rec,
+                e,
             )
-        return results
-    except Exception as e:
-        logger.error(
-            f"Could not convert relationships to default schema. First record for references: {records[0]}"
-        )
-        logger.debug(f"__dict__: {records[0].__dict__}")
-        logger.debug(f"values: {records[0].values()[1].__dict__}")
-        logger.debug(f"data(): {records[0].data()['r']}")
+    return results
 
 
 def export_cytoscape_relationships(records: list[any]) -> list[dict]:
-    try:
-        return [
-            {
-                "data": {
-                    "source": r.values()[0]._element_id,
-                    "target": r.values()[2]._element_id,
-                    "id": r.values()[1]._element_id,
-                    "label": r.data()["r"][1],
-                    "properties": r.data(),
-                }
-            }
-            for r in records
-        ]
-    except Exception as e:
-        logger.error(
-            f"Could not convert relationships to Cytoscape format. First record for references: {records[0]}"
-        )
+    results = []
+    for rec in records:
+        try:
+            r = rec[1]
+            results.append({"data": relationship_graph(r, r.element_id)})
+        except Exception as e:
+            logger.error(
+                "Could not convert relationship record to Cytoscape format: %s. ERROR: %s",
+                rec,
+                e,
+            )
+    return results
 
 
 def export_d3_relationships(records: list[any]) -> list[dict]:
-    nodes = []
     links = []
     nodes_dict = {}
 
-    # Nodes
-    for r in records:
+    for rec in records:
         try:
+            source, r, target = rec
             # Nodes may not have an assigned label
-            source_node_labels = list(r.values()[0]._labels)
-            if len(source_node_labels) == 0:
-                source_node_labels = [""]
-            source_node_data = {
-                "id": r.values()[0]._element_id,
-                "label": source_node_labels[0],
-                "properties": r.values()[0]._properties,
-            }
-            target_node_labels = list(r.values()[0]._labels)
-            if len(target_node_labels) == 0:
-                target_node_labels = [""]
-            target_node_data = {
-                "id": r.values()[2]._element_id,
-                "label": target_node_labels[0],
-                "properties": r.values()[2]._properties,
-            }
-            nodes_dict[source_node_data["id"]] = source_node_data
-            nodes_dict[target_node_data["id"]] = target_node_data
-
-            links.append(
-                {
-                    "source": r.values()[0]._element_id,
-                    "target": r.values()[2]._element_id,
-                    "id": r.values()[1]._element_id,
-                    "label": r.data()["r"][1],
-                    "properties": r.data(),
-                }
-            )
-
+            for n in (source, target):
+                if n.element_id not in nodes_dict:
+                    nodes_dict[n.element_id] = node_graph(n, first_label(n, ""))
+            links.append(relationship_graph(r, r.element_id))
         except Exception as e:
             logger.error(
-                f"Could not convert relationship record to d3 format: {r}. ERROR: {e}"
+                "Could not convert relationship record to d3 format: %s. ERROR: %s",
+                rec,
+                e,
             )
             continue
 
     nodes = list(nodes_dict.values())
 
-    logger.debug(f"nodes: {nodes}")
-
-    logger.debug(f"nodes: {nodes}")
+    logger.debug("nodes: %s", Summary(nodes))
 
     return {"nodes": nodes, "links": links}
 
@@ -333,15 +281,40 @@ def export_relationships(
 ) -> dict | list[dict]:
 
     logger.debug(
-        f"exporting relationships. Number of records: {len(records)}. First record: {records[0] if len(records) > 0 else ''}. Format: {format}"
+        "exporting relationships for format '%s'. Records: %s", format, Summary(records)
     )
 
-    if format == ExportFormat.CYTOSCAPE:
-        return export_cytoscape_relationships(records)
-    elif format == ExportFormat.D3:
-        return export_d3_relationships(records)
-    else:
-        return export_relationships_default(records)
+    with stage("export", format):
+        if format == ExportFormat.CYTOSCAPE:
+            return export_cytoscape_relationships(records)
+        elif format == ExportFormat.D3:
+            return export_d3_relationships(records)
+        else:
+            return export_relationships_default(records)
+
+
+def export_graph(
+    nodes: list[any],
+    relationships: list[any],
+    export_format: ExportFormat,
+):
+    """Convert driver Nodes and Relationships into a cytoscape {nodes, edges}
+    or d3 {nodes, links} graph. Nodes are deduplicated by element id and, unlike
+    export_nodes, unlabelled nodes are kept so no edge is left dangling."""
+    with stage("export", export_format):
+        nodes_dict = {}
+        for n in nodes:
+            if n.element_id not in nodes_dict:
+                nodes_dict[n.element_id] = node_graph(n, first_label(n, ""))
+        links = [relationship_graph(r, r.element_id) for r in relationships]
+
+        if export_format == ExportFormat.CYTOSCAPE:
+            node_records = [{"data": n} for n in nodes_dict.values()]
+            relationship_records = [{"data": r} for r in links]
+        else:
+            node_records = list(nodes_dict.values())
+            relationship_records = links
+        return export_composite(node_records, relationship_records, export_format)
 
 
 def export_composite(
@@ -0,0 +1,649 @@
+from collections import OrderedDict
+from fastapi import HTTPException
+from neo4j import exceptions
+from neo4j_python_server.database import async_execute_write, async_write_db
+from neo4j_python_server.export import IMPORT_KEY_LABEL, IMPORT_KEY_PROPERTY
+from neo4j_python_server.logger import logger
+from neo4j_python_server.models import Neo4jCredentials, Node, Relationship
+from neo4j_python_server.queries import quote_identifier
+import asyncio
+import csv
+import json
+import os
+import time
+import uuid
+
+IMPORT_BATCH_SIZE = int(os.environ.get("IMPORT_BATCH_SIZE", 1000))
+
+# Number of finished or failed streaming import jobs kept for progress lookups
+IMPORT_JOBS_KEPT = int(os.environ.get("IMPORT_JOBS_KEPT", 100))
+
+# Failed jobs not resumed within this many seconds are dropped, like jobs
+# evicted beyond IMPORT_JOBS_KEPT, and their import keys cleared
+IMPORT_RESUME_SECONDS = float(os.environ.get("IMPORT_RESUME_SECONDS", 3600))
+
+# Create an index on import keys, once per database. Users without schema
+# privileges import without it, as do all users if this is false.
+IMPORT_KEY_INDEX = os.environ.get("IMPORT_KEY_INDEX", "true").lower() == "true"
+
+COUNTERS = ["nodes_created", "relationships_created", "properties_set", "labels_added"]
+
+
+class ImportBatches:
+    """Nodes grouped by label set and relationships grouped by type, ready to
+    be written with one UNWIND query per batch.
+
+    Nodes are identified by the element id they were exported with, if any.
+    Relationship endpoints refer to either a node in the same import, by that
+    id, or a node already in the database, by its element id.
+    """
+
+    def __init__(self):
+        self.nodes = {}
+        self.relationships = {}
+        self._node_keys = set()
+
+    def __len__(self):
+        return sum(len(rows) for rows in self.nodes.values()) + sum(
+            len(rows) for rows in self.relationships.values()
+        )
+
+    def add_node(self, labels: list[str], properties: dict | None, key: str | None):
+        if not labels:
+            raise ValueError(f"Node {key} must have at least one label")
+        if key is not None:
+            # The same node can appear more than once, eg. as an endpoint of
+            # several exported relationships
+            if key in self._node_keys:
+                return
+            self._node_keys.add(key)
+        group = self.nodes.setdefault(tuple(sorted(labels)), [])
+        group.append({"key": key, "properties": properties or {}})
+
+    def add_relationship(
+        self, type: str, source: str, target: str, properties: dict | None
+    ):
+        if not source or not target:
+            raise ValueError(
+                f"Relationship of type {type} must reference source and target nodes by element id"
+            )
+        group = self.relationships.setdefault(type, [])
+        group.append(
+            {"source": source, "target": target, "properties": properties or {}}
+        )
+
+    def add_models(self, nodes: list[Node], relationships: list[Relationship]):
+        for n in nodes:
+            self.add_node(n.labels, n.properties, n.element_id)
+        for r in relationships:
+            self.add_relationship(
+                r.type,
+                r.source_node.element_id,
+                r.target_node.element_id,
+                r.properties,
+            )
+
+    def add_exported(self, elements: list[dict] | dict):
+        """Add elements in any shape produced by export_nodes,
+        export_relationships or export_composite."""
+        if isinstance(elements, dict):
+            # d3 {"nodes", "links"} or cytoscape composite {"nodes", "edges"}
+            for key in ("nodes", "links", "edges"):
+                self.add_exported(elements.get(key, []))
+            return
+
+        for e in elements:
+            if "data" in e:
+                # cytoscape
+                e = e["data"]
+            if "labels" in e:
+                # default node
+                self.add_node(e["labels"], e.get("properties"), e.get("element_id"))
+            elif "type" in e:
+                # default relationship, with its endpoint nodes embedded
+                for n in (e["source"], e["target"]):
+                    self.add_node(n["labels"], n.get("properties"), n.get("element_id"))
+                self.add_relationship(
+                    e["type"],
+                    e["source"]["element_id"],
+                    e["target"]["element_id"],
+                    e.get("properties"),
+                )
+            elif "source" in e:
+                # cytoscape / d3 relationship
+                self.add_relationship(
+                    e["label"], e["source"], e["target"], e.get("properties")
+                )
+            else:
+                # cytoscape / d3 node
+                self.add_node([e["label"]], e.get("properties"), e.get("id"))
+
+
+def _batches(rows: list, batch_size: int):
+    for i in range(0, len(rows), batch_size):
+        yield rows[i : i + batch_size]
+
+
+def create_nodes_query(labels: tuple[str]) -> str:
+    label_expr = ":".join(quote_identifier(label) for label in labels)
+    return f"""
+    UNWIND $rows AS row
+    CREATE (n:{label_expr})
+    SET n = row.properties
+    RETURN row.key AS key, elementId(n) AS element_id
+    """
+
+
+def create_relationships_query(type: str) -> str:
+    return f"""
+    UNWIND $rows AS row
+    MATCH (a) WHERE elementId(a) = row.source
+    MATCH (b) WHERE elementId(b) = row.target
+    CREATE (a)-[r:{quote_identifier(type)}]->(b)
+    SET r = row.properties
+    """
+
+
+def import_key_index_query() -> str:
+    return f"""
+    CREATE INDEX import_key IF NOT EXISTS
+    FOR (n:{quote_identifier(IMPORT_KEY_LABEL)}) ON (n.{quote_identifier(IMPORT_KEY_PROPERTY)})
+    """
+
+
+def merge_keyed_nodes_query(labels: tuple[str]) -> str:
+    """Create nodes tagged with their import key, or match the ones an
+    earlier batch of the same job already created."""
+    label_expr = ":".join(quote_identifier(label) for label in labels)
+    return f"""
+    UNWIND $rows AS row
+    MERGE (n:{quote_identifier(IMPORT_KEY_LABEL)} {{{quote_identifier(IMPORT_KEY_PROPERTY)}: $prefix + row.key}})
+    ON CREATE SET n:{label_expr}, n += row.properties
+    RETURN row.key AS key, elementId(n) AS element_id
+    """
+
+
+def lookup_keyed_nodes_query() -> str:
+    return f"""
+    MATCH (n:{quote_identifier(IMPORT_KEY_LABEL)})
+    WHERE n.{quote_identifier(IMPORT_KEY_PROPERTY)} IN $keys
+    RETURN n.{quote_identifier(IMPORT_KEY_PROPERTY)} AS key, elementId(n) AS element_id
+    """
+
+
+def clear_import_keys_query() -> str:
+    return f"""
+    MATCH (n:{quote_identifier(IMPORT_KEY_LABEL)})
+    WHERE n.{quote_identifier(IMPORT_KEY_PROPERTY)} STARTS WITH $prefix
+    AND NOT any(p IN $keep WHERE n.{quote_identifier(IMPORT_KEY_PROPERTY)} STARTS WITH p)
+    WITH n LIMIT $limit
+    REMOVE n:{quote_identifier(IMPORT_KEY_LABEL)}, n.{quote_identifier(IMPORT_KEY_PROPERTY)}
+    RETURN count(n) AS cleared
+    """
+
+
+class ImportStats:
+    def __init__(self):
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.batches = 0
+        self.relationships_skipped = 0
+
+    def add(self, summary, keyed_nodes: int = 0):
+        """Sum a query's counters, leaving out the import key label and
+        property set on keyed_nodes newly created nodes."""
+        self.batches += 1
+        for name in COUNTERS:
+            self.counters[name] += getattr(summary.counters, name)
+        self.counters["labels_added"] -= keyed_nodes
+        self.counters["properties_set"] -= keyed_nodes
+
+    def to_dict(self) -> dict:
+        return {
+            **self.counters,
+            "relationships_skipped": self.relationships_skipped,
+            "batches": self.batches,
+        }
+
+
+async def write_nodes(
+    creds: Neo4jCredentials,
+    groups: dict,
+    batch_size: int,
+    stats: ImportStats,
+    id_map: dict,
+):
+    """Create grouped node rows, recording old key -> new element id in id_map."""
+    for labels, rows in groups.items():
+        query = create_nodes_query(labels)
+        for batch in _batches(rows, batch_size):
+            records, summary = await async_write_db(creds, query, {"rows": batch})
+            stats.add(summary)
+            for record in records:
+                if record["key"] is not None:
+                    id_map[record["key"]] = record["element_id"]
+
+
+async def write_relationships(
+    creds: Neo4jCredentials,
+    groups: dict,
+    batch_size: int,
+    stats: ImportStats,
+    id_map: dict,
+):
+    """Create grouped relationship rows. Endpoints imported in the same job are
+    swapped for their new element ids; rows whose endpoints can't be found are
+    counted as skipped."""
+    for type, rows in groups.items():
+        query = create_relationships_query(type)
+        for batch in _batches(rows, batch_size):
+            batch = [
+                {
+                    **row,
+                    "source": id_map.get(row["source"], row["source"]),
+                    "target": id_map.get(row["target"], row["target"]),
+                }
+                for row in batch
+            ]
+            _, summary = await async_write_db(creds, query, {"rows": batch})
+            stats.add(summary)
+            stats.relationships_skipped += (
+                len(batch) - summary.counters.relationships_created
+            )
+
+
+async def import_graph(
+    creds: Neo4jCredentials,
+    batches: ImportBatches,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> dict:
+    """Write all nodes, then all relationships, in batch_size UNWIND batches.
+
+    Each batch runs in its own managed write transaction, so a transient
+    failure only retries that batch.
+
+    Returns:
+        dict: Summed result summary counters plus the number of batches
+            written and relationships skipped for missing endpoints.
+    """
+    stats = ImportStats()
+    id_map = {}
+    await write_nodes(creds, batches.nodes, batch_size, stats, id_map)
+    await write_relationships(creds, batches.relationships, batch_size, stats, id_map)
+    result = stats.to_dict()
+    logger.info("Import into %s finished: %s", creds.database, result)
+    return result
+
+
+# Streaming ingest
+
+
+class ImportJob:
+    """Progress of a streaming import, kept so it can be polled while the
+    upload runs and resumed after a failure.
+
+    Nodes the job creates carry IMPORT_KEY_LABEL and an IMPORT_KEY_PROPERTY
+    of `key_prefix` plus their exported element id until the job finishes,
+    so relationships in later batches, or in a resumed upload, find them
+    through the database rather than through per-node state in the job.
+    """
+
+    def __init__(self, job_id: str, creds: Neo4jCredentials):
+        self.job_id = job_id
+        self.creds = creds
+        self.key_prefix = uuid.uuid4().hex + ":"
+        self.status = "running"
+        self.error = None
+        self.rows_parsed = 0
+        self.rows_committed = 0
+        self.batches_committed = 0
+        self.stats = ImportStats()
+        self.started = time.monotonic()
+        self.ended = None
+
+    def progress(self) -> dict:
+        elapsed = time.monotonic() - self.started
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "error": self.error,
+            "rows_parsed": self.rows_parsed,
+            "rows_committed": self.rows_committed,
+            "batches_committed": self.batches_committed,
+            "rows_per_second": round(self.rows_parsed / elapsed, 1) if elapsed else 0,
+            **self.stats.counters,
+            "relationships_skipped": self.stats.relationships_skipped,
+        }
+
+
+jobs = OrderedDict()
+
+# Background import key cleanups, referenced until done so they aren't collected
+_cleanups = set()
+
+
+def forget_job(job_id: str):
+    """Drop a job that isn't running, clearing its import keys in the
+    background unless it finished, which already cleared them."""
+    job = jobs.pop(job_id)
+    if job.status == "finished":
+        return
+
+    async def clear():
+        try:
+            await clear_import_keys(job.creds, job.key_prefix)
+        except Exception as e:
+            logger.warning("Couldn't clear import keys of job %s: %s", job.job_id, e)
+
+    task = asyncio.ensure_future(clear())
+    _cleanups.add(task)
+    task.add_done_callback(_cleanups.discard)
+
+
+def _expire_jobs():
+    now = time.monotonic()
+    for job_id, job in list(jobs.items()):
+        if job.status == "failed" and now - job.ended > IMPORT_RESUME_SECONDS:
+            forget_job(job_id)
+    for job_id, job in list(jobs.items()):
+        if len(jobs) <= IMPORT_JOBS_KEPT:
+            break
+        if job.status != "running":
+            forget_job(job_id)
+
+
+def get_job(creds: Neo4jCredentials, job_id: str | None, resume: bool) -> ImportJob:
+    """Return the job to resume, or register a new one.
+
+    Failed jobs not resumed within IMPORT_RESUME_SECONDS, and the oldest
+    jobs beyond IMPORT_JOBS_KEPT, are dropped first, see forget_job.
+
+    Raises:
+        HTTPException: 404 if there is no job_id to resume, 409 if job_id is
+            still running or was started against another database.
+    """
+    _expire_jobs()
+    if job_id in jobs and jobs[job_id].status == "running":
+        raise HTTPException(
+            status_code=409, detail=f"Import job {job_id} is still running"
+        )
+    if resume:
+        if job_id not in jobs:
+            raise HTTPException(
+                status_code=404, detail=f"No import job {job_id} to resume"
+            )
+        job = jobs[job_id]
+        if (job.creds.uri, job.creds.database) != (creds.uri, creds.database):
+            raise HTTPException(
+                status_code=409,
+                detail=f"Import job {job_id} was started against another database",
+            )
+        job.status = "running"
+        job.error = None
+        job.rows_parsed = 0
+        job.started = time.monotonic()
+        return job
+
+    if job_id in jobs:
+        # Replaced by a new upload, so the old one can't be resumed
+        forget_job(job_id)
+    job = ImportJob(job_id or uuid.uuid4().hex, creds)
+    jobs[job.job_id] = job
+    _expire_jobs()
+    return job
+
+
+async def iter_lines(chunks):
+    """Split an async stream of byte chunks into decoded lines."""
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode()
+    if pending:
+        yield pending.decode()
+
+
+def parse_row(row: dict) -> Node | Relationship:
+    if "type" in row:
+        return Relationship.model_validate(row)
+    return Node.model_validate(row)
+
+
+async def parse_ndjson(chunks):
+    """Yield a Node or Relationship for each non-empty NDJSON line."""
+    async for line in iter_lines(chunks):
+        if line.strip():
+            yield parse_row(json.loads(line))
+
+
+async def parse_csv(chunks):
+    """Yield a Node or Relationship for each CSV row.
+
+    Recognised columns are element_id, labels (separated by ;), type, source
+    and target. Rows with a type are relationships between the source and
+    target element ids. Every other non-empty column is a property.
+    """
+    header = None
+    pending = ""
+    async for line in iter_lines(chunks):
+        # Quoted fields may contain newlines; wait for the closing quote
+        pending += line
+        if pending.count('"') % 2:
+            pending += "\n"
+            continue
+        values, pending = next(csv.reader([pending])) if pending.strip() else [], ""
+        if not values:
+            continue
+        if header is None:
+            header = values
+            continue
+
+        row = dict(zip(header, values))
+        element_id = row.pop("element_id", None) or None
+        labels = row.pop("labels", "")
+        type = row.pop("type", "")
+        source = row.pop("source", "")
+        target = row.pop("target", "")
+        properties = {k: v for k, v in row.items() if v != ""}
+        if type:
+            # Endpoints are only referenced by element id, so skip the label check
+            yield Relationship(
+                source_node=Node.model_construct(labels=[], element_id=source),
+                target_node=Node.model_construct(labels=[], element_id=target),
+                type=type,
+                element_id=element_id,
+                properties=properties,
+            )
+        else:
+            yield Node(
+                labels=[l for l in labels.split(";") if l],
+                element_id=element_id,
+                properties=properties,
+            )
+
+
+async def _write_batch(tx, batch: ImportBatches, prefix: str):
+    """Write one batch's nodes then relationships in a single transaction, so a
+    batch is either fully committed or not at all. Returns (summary,
+    relationship row count, keyed node count) for every query run.
+
+    Keyed nodes are merged on their import key, so a node repeated in a later
+    batch isn't created twice. Relationship endpoints are looked up by import
+    key, falling back to the key itself as the element id of an existing node.
+    """
+    new_ids = {}
+    summaries = []
+    for labels, rows in batch.nodes.items():
+        keyed = [row for row in rows if row["key"] is not None]
+        unkeyed = [row for row in rows if row["key"] is None]
+        if keyed:
+            result = await tx.run(
+                merge_keyed_nodes_query(labels), rows=keyed, prefix=prefix
+            )
+            async for record in result:
+                new_ids[record["key"]] = record["element_id"]
+            summary = await result.consume()
+            summaries.append((summary, 0, summary.counters.nodes_created))
+        if unkeyed:
+            result = await tx.run(create_nodes_query(labels), rows=unkeyed)
+            summaries.append((await result.consume(), 0, 0))
+
+    endpoints = {
+        key
+        for rows in batch.relationships.values()
+        for row in rows
+        for key in (row["source"], row["target"])
+        if key not in new_ids
+    }
+    if endpoints:
+        result = await tx.run(
+            lookup_keyed_nodes_query(), keys=[prefix + key for key in endpoints]
+        )
+        async for record in result:
+            new_ids[record["key"][len(prefix) :]] = record["element_id"]
+
+    for type, rows in batch.relationships.items():
+        rows = [
+            {
+                **row,
+                "source": new_ids.get(row["source"], row["source"]),
+                "target": new_ids.get(row["target"], row["target"]),
+            }
+            for row in rows
+        ]
+        result = await tx.run(create_relationships_query(type), rows=rows)
+        summaries.append((await result.consume(), len(rows), 0))
+    return summaries
+
+
+async def clear_import_keys(
+    creds: Neo4jCredentials, prefix: str = "", keep: list[str] = ()
+) -> int:
+    """Remove the import key label and property from nodes whose key starts
+    with prefix, by default every tagged node, except those whose key starts
+    with one of keep. Runs IMPORT_BATCH_SIZE nodes per transaction and
+    returns the number of nodes cleared."""
+    total = 0
+    cleared = IMPORT_BATCH_SIZE
+    while cleared == IMPORT_BATCH_SIZE:
+        records, _ = await async_write_db(
+            creds,
+            clear_import_keys_query(),
+            {"prefix": prefix, "keep": list(keep), "limit": IMPORT_BATCH_SIZE},
+        )
+        cleared = records[0]["cleared"]
+        total += cleared
+    return total
+
+
+async def clear_abandoned_import_keys(creds: Neo4jCredentials) -> int:
+    """Clear the import keys of every node in creds' database that isn't
+    part of a job this process is running or could still resume, eg. ones
+    left behind by a restart. Jobs of other server processes importing into
+    the same database aren't known here, so run it while they're idle."""
+    keep = [
+        job.key_prefix
+        for job in jobs.values()
+        if job.status != "finished"
+        and (job.creds.uri, job.creds.database) == (creds.uri, creds.database)
+    ]
+    cleared = await clear_import_keys(creds, keep=keep)
+    logger.info("Cleared import keys of %s nodes in %s", cleared, creds.database)
+    return cleared
+
+
+# (uri, database) pairs the import key index was created, or found to be
+# impossible to create, in
+_indexed = set()
+
+
+async def ensure_import_key_index(creds: Neo4jCredentials):
+    """Create the import key index the first time this process imports into
+    creds' database. Without the index, import key lookups scan the nodes
+    labelled IMPORT_KEY_LABEL, which only holds nodes of unfinished jobs."""
+    database = (creds.uri, creds.database)
+    if not IMPORT_KEY_INDEX or database in _indexed:
+        return
+    try:
+        await async_write_db(creds, import_key_index_query())
+    except exceptions.Forbidden as e:
+        logger.warning(
+            "Importing into %s without an import key index: %s", creds.database, e
+        )
+    _indexed.add(database)
+
+
+async def ingest_stream(
+    creds: Neo4jCredentials,
+    rows,
+    job: ImportJob,
+    batch_size: int = IMPORT_BATCH_SIZE,
+    start_row: int | None = None,
+) -> dict:
+    """Write Nodes / Relationships from an async iterator in batches of
+    batch_size rows, in file order, holding at most one batch in memory.
+
+    The job records the number of rows committed, so an upload can be resumed,
+    with any batch_size, by skipping those rows.
+
+    Args:
+        start_row: Number of leading rows to skip. Defaults to the job's
+            rows_committed, ie. 0 for a new job.
+    """
+    if start_row is None:
+        start_row = job.rows_committed
+    job.rows_committed = start_row
+
+    async def flush(batch: ImportBatches, batch_rows: int):
+        summaries = await async_execute_write(
+            creds, _write_batch, batch, job.key_prefix
+        )
+        for summary, relationship_rows, keyed_nodes in summaries:
+            job.stats.add(summary, keyed_nodes)
+            job.stats.relationships_skipped += (
+                relationship_rows - summary.counters.relationships_created
+            )
+        job.rows_committed += batch_rows
+        job.batches_committed += 1
+        logger.debug("Import job %s: %s", job.job_id, job.progress())
+
+    try:
+        await ensure_import_key_index(creds)
+        batch = ImportBatches()
+        batch_rows = 0
+        async for element in rows:
+            job.rows_parsed += 1
+            if job.rows_parsed <= start_row:
+                continue
+            if isinstance(element, Relationship):
+                batch.add_models([], [element])
+            else:
+                batch.add_models([element], [])
+            batch_rows += 1
+            if batch_rows == batch_size:
+                await flush(batch, batch_rows)
+                batch = ImportBatches()
+                batch_rows = 0
+        if batch_rows:
+            await flush(batch, batch_rows)
+        await clear_import_keys(creds, job.key_prefix)
+    except BaseException as e:
+        # Including cancellation, eg. by the client disconnecting, so the job
+        # can be resumed
+        job.status = "failed"
+        job.ended = time.monotonic()
+        job.error = f"Row {job.rows_parsed}: {e}"
+        logger.error(
+            "Import job %s failed after %s rows: %s",
+            job.job_id,
+            job.rows_committed,
+            e,
+        )
+        raise
+
+    job.status = "finished"
+    job.ended = time.monotonic()
+    result = job.progress()
+    logger.info("Import job %s finished: %s", job.job_id, result)
+    return result
@@ -0,0 +1,231 @@
+from collections import OrderedDict
+from enum import Enum
+from fastapi import HTTPException
+from neo4j_python_server.export import ExportFormat
+from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import stage
+import hashlib
+import os
+import threading
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Iterations of the spectral power iteration and force-directed refinement
+LAYOUT_ITERATIONS = int(os.environ.get("LAYOUT_ITERATIONS", 50))
+# Positions are scaled to fit a LAYOUT_SCALE x LAYOUT_SCALE square
+LAYOUT_SCALE = float(os.environ.get("LAYOUT_SCALE", 1000))
+LAYOUT_CACHE_MAX_ENTRIES = int(os.environ.get("LAYOUT_CACHE_MAX_ENTRIES", 64))
+# Rows of the pairwise repulsion matrix computed at once, bounding memory to
+# about LAYOUT_BLOCK_SIZE * nodes * 16 bytes
+LAYOUT_BLOCK_SIZE = int(os.environ.get("LAYOUT_BLOCK_SIZE", 256))
+# Largest graph, in nodes, given the O(nodes^2) per iteration force layout.
+# Bigger graphs get the spectral layout instead.
+LAYOUT_MAX_NODES = int(os.environ.get("LAYOUT_MAX_NODES", 2000))
+
+
+class LayoutMethod(str, Enum):
+    # Spectral positions refined by a Fruchterman-Reingold force simulation
+    FORCE = "force"
+    # Positions from the two leading non-trivial eigenvectors of the random
+    # walk matrix only. Much cheaper, but clusters can overlap.
+    SPECTRAL = "spectral"
+
+
+def check_layout_options(
+    format: ExportFormat, streamed: bool, formats: tuple = (ExportFormat.D3,)
+):
+    """Raise a 400 for layouts requested for output without node elements, and
+    a 406 if numpy isn't installed."""
+    if streamed or format not in formats:
+        raise HTTPException(
+            status_code=400,
+            detail="layout is only supported for unstreamed "
+            + " and ".join(f.value for f in formats)
+            + " output",
+        )
+    if np is None:
+        raise HTTPException(status_code=406, detail="layout requires numpy")
+
+
+def _neighbour_sum(x, src, dst):
+    """A @ x for the undirected adjacency matrix A of the edges src -> dst."""
+    n = len(x)
+    return np.stack(
+        [
+            np.bincount(src, weights=x[dst, c], minlength=n)
+            + np.bincount(dst, weights=x[src, c], minlength=n)
+            for c in range(x.shape[1])
+        ],
+        axis=1,
+    )
+
+
+def spectral_layout(n: int, src, dst, iterations: int = LAYOUT_ITERATIONS):
+    """Approximate the two leading non-trivial eigenvectors of the lazy random
+    walk matrix by subspace iteration. Each step is O(edges), so unlike a
+    dense eigendecomposition this scales to large graphs."""
+    rng = np.random.default_rng(0)
+    degree = (np.bincount(src, minlength=n) + np.bincount(dst, minlength=n) + 1.0)[
+        :, None
+    ]
+    x = rng.random((n, 2)) - 0.5
+    for _ in range(iterations):
+        x = 0.5 * (x + _neighbour_sum(x, src, dst) / degree)
+        # Project out the trivial constant eigenvector
+        x -= (degree * x).sum(axis=0) / degree.sum()
+        x, _ = np.linalg.qr(x)
+    return x
+
+
+def force_layout(pos, src, dst, iterations: int = LAYOUT_ITERATIONS):
+    """Fruchterman-Reingold refinement of pos. Repulsion is computed in blocks
+    of LAYOUT_BLOCK_SIZE rows, so each iteration is O(nodes^2) time but only
+    O(block * nodes) memory."""
+    n = len(pos)
+    pos = pos - pos.min(axis=0)
+    pos = pos / max(pos.max(), 1e-9)
+    k = 1.0 / np.sqrt(n)
+    temperature = 0.1
+    cooling = temperature / (iterations + 1)
+    for _ in range(iterations):
+        disp = np.empty_like(pos)
+        squared = (pos**2).sum(axis=1)
+        for start in range(0, n, LAYOUT_BLOCK_SIZE):
+            block = pos[start : start + LAYOUT_BLOCK_SIZE]
+            # Pairwise squared distances and repulsion weights k^2 / d^2 via
+            # matrix products rather than an (block, n, 2) difference array
+            dist2 = (
+                squared[start : start + LAYOUT_BLOCK_SIZE, None]
+                + squared[None, :]
+                - 2 * block @ pos.T
+            )
+            weight = k * k / np.maximum(dist2, 1e-9)
+            np.fill_diagonal(weight[:, start:], 0)
+            disp[start : start + LAYOUT_BLOCK_SIZE] = (
+                block * weight.sum(axis=1)[:, None] - weight @ pos
+            )
+
+        delta = pos[src] - pos[dst]
+        dist = np.maximum(np.sqrt((delta**2).sum(axis=-1)), 1e-9)
+        pull = delta * (dist / k)[:, None]
+        for c in range(2):
+            disp[:, c] -= np.bincount(src, weights=pull[:, c], minlength=n)
+            disp[:, c] += np.bincount(dst, weights=pull[:, c], minlength=n)
+
+        length = np.maximum(np.sqrt((disp**2).sum(axis=-1)), 1e-9)
+        pos = pos + disp * (np.minimum(length, temperature) / length)[:, None]
+        temperature -= cooling
+    return pos
+
+
+def compute_layout(n: int, src, dst, method: LayoutMethod):
+    """Return an (n, 2) array of positions within [0, LAYOUT_SCALE]. Force
+    layouts of more than LAYOUT_MAX_NODES nodes fall back to spectral."""
+    if n == 0:
+        return np.zeros((0, 2))
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int64)
+    pos = spectral_layout(n, src, dst)
+    if method == LayoutMethod.FORCE:
+        if n <= LAYOUT_MAX_NODES:
+            pos = force_layout(pos, src, dst)
+        else:
+            logger.info(
+                "Using spectral layout for %s nodes, over LAYOUT_MAX_NODES (%s)",
+                n,
+                LAYOUT_MAX_NODES,
+            )
+    pos = pos - pos.min(axis=0)
+    return pos * (LAYOUT_SCALE / max(pos.max(), 1e-9))
+
+
+class LayoutCache:
+    """LRU cache of node positions keyed by layout method and graph structure,
+    so repeat requests for the same graph skip the layout."""
+
+    def __init__(self, max_entries: int = LAYOUT_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(method: LayoutMethod, ids: list[str], edges: list[tuple]) -> tuple:
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update("\0".join(ids).encode())
+        for source, target in edges:
+            digest.update(f"\0{source}\1{target}".encode())
+        return (method.value, digest.hexdigest())
+
+    def get(self, key: tuple):
+        with self._lock:
+            positions = self._entries.get(key)
+            if positions is not None:
+                self._entries.move_to_end(key)
+            return positions
+
+    def put(self, key: tuple, positions: dict):
+        with self._lock:
+            self._entries[key] = positions
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+layout_cache = LayoutCache()
+
+
+def node_positions(ids: list[str], edges: list[tuple], method: LayoutMethod) -> dict:
+    """Map each node id to its (x, y) position, laying the graph out on a
+    cache miss. Edges with an endpoint not in ids are ignored."""
+    key = layout_cache.key(method, ids, edges)
+    positions = layout_cache.get(key)
+    if positions is not None:
+        return positions
+
+    index = {id: i for i, id in enumerate(ids)}
+    pairs = [
+        (index[s], index[t]) for s, t in edges if s in index and t in index and s != t
+    ]
+    src = [s for s, _ in pairs]
+    dst = [t for _, t in pairs]
+    pos = compute_layout(len(ids), src, dst, method)
+    positions = dict(zip(ids, (tuple(p) for p in pos.round(1).tolist())))
+    layout_cache.put(key, positions)
+    logger.debug("Laid out %s nodes and %s edges", len(ids), len(pairs))
+    return positions
+
+
+def layout_export(payload: dict, format: ExportFormat, method: LayoutMethod) -> dict:
+    """Copy of a d3 `{nodes, links}` or cytoscape `{nodes, edges}` payload with
+    `x` / `y` on each d3 node, or `position` on each cytoscape node element."""
+    if format == ExportFormat.CYTOSCAPE:
+        nodes = [e["data"] for e in payload["nodes"]]
+        edges = [e["data"] for e in payload["edges"]]
+    else:
+        nodes, edges = payload["nodes"], payload["links"]
+
+    with stage("layout"):
+        positions = node_positions(
+            [n["id"] for n in nodes],
+            [(e["source"], e["target"]) for e in edges],
+            method,
+        )
+
+    laid_out = []
+    for element, node in zip(payload["nodes"], nodes):
+        x, y = positions[node["id"]]
+        if format == ExportFormat.CYTOSCAPE:
+            laid_out.append({**element, "position": {"x": x, "y": y}})
+        else:
+            laid_out.append({**node, "x": x, "y": y})
+    return {**payload, "nodes": laid_out}
@@ -1,4 +1,5 @@
 import logging
+import os
 
 mname = "neo4j_python_server"
 logger = logging.getLogger(mname)
@@ -8,3 +9,41 @@ formatter = logging.Formatter(
 )
 sh.setFormatter(formatter)
 logger.addHandler(sh)
+logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+
+# Per-record debug logs are only emitted for 1 in every LOG_SAMPLE_EVERY records
+LOG_SAMPLE_EVERY = max(1, int(os.environ.get("LOG_SAMPLE_EVERY", 1000)))
+
+# Longest payload summary written to the log, in characters
+LOG_PAYLOAD_CHARS = int(os.environ.get("LOG_PAYLOAD_CHARS", 500))
+
+
+class Summary:
+    """Lazy log argument describing an export payload by its element counts
+    and first element, so large results are never formatted in full.
+
+    Usage:
+        logger.info("Returning result: %s", Summary(result))
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        payload = self.payload
+        if isinstance(payload, dict):
+            lists = {k: v for k, v in payload.items() if isinstance(v, list)}
+            counts = ", ".join(f"{k}={len(v)}" for k, v in lists.items())
+            first = next((v[0] for v in lists.values() if v), None)
+        elif isinstance(payload, (list, tuple)):
+            counts = f"count={len(payload)}"
+            first = payload[0] if payload else None
+        else:
+            return _truncate(repr(payload))
+        return _truncate(f"{counts}, first: {first!r}")
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= LOG_PAYLOAD_CHARS:
+        return text
+    return text[:LOG_PAYLOAD_CHARS] + "..."
@@ -1,22 +1,39 @@
-from fastapi import FastAPI, Request, Response, Body
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, Response, Body
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from starlette.middleware.base import BaseHTTPMiddleware
 
 from pydantic import BaseModel
 from typing import Optional
-from neo4j_python_server.database import query_db, can_connect
+from neo4j_python_server.database import (
+    async_can_connect,
+    async_drivers,
+    async_query_db,
+    drivers,
+)
+from neo4j_python_server import admission, coalesce, metadata
+from neo4j_python_server.admission import RouteClass, classify
 from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.compact import compact_export
+from neo4j_python_server.encoding import encoded_response
 from neo4j_python_server.export import ExportFormat, export_schema, export_composite
 from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import (
+    MetricsMiddleware,
+    db_errors_total,
+    metrics_response,
+)
+from neo4j_python_server.profiling import log_slow_request
+from neo4j_python_server.results import result_cache
 import json
 import os
 import logging
 from neo4j import exceptions
 from .routers import nodes as nodes_router
 from .routers import relationships as relationships_router
-
-logger.setLevel(logging.DEBUG)
+from .routers import imports as imports_router
+from .routers import graph as graph_router
 
 origins = [
     os.getenv("FRONTEND_URL"),
@@ -29,19 +46,31 @@ class Neo4jExceptionMiddleware(BaseHTTPMiddleware):
             response = await call_next(request)
             return response
         except exceptions.AuthError as e:
+            db_errors_total.inc((type(e).__name__,))
             msg = f"Neo4j Authentication Error: {e}"
             logger.error(msg)
             return Response(content=msg, status_code=400)
         except exceptions.ServiceUnavailable as e:
+            db_errors_total.inc((type(e).__name__,))
             msg = f"Neo4j Database Unavailable Error: {e}"
             logger.error(msg)
             return Response(content=msg, status_code=400)
         except Exception as e:
+            if isinstance(e, (exceptions.Neo4jError, exceptions.DriverError)):
+                db_errors_total.inc((type(e).__name__,))
             logger.error(e)
             return Response(content=str(e), status_code=400)
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    logger.info("Closing %s pooled Neo4j driver(s)", len(drivers) + len(async_drivers))
+    drivers.close_all()
+    await async_drivers.close_all()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -51,9 +80,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 app.add_middleware(Neo4jExceptionMiddleware)
+# Added last so it wraps the others and sees their error responses
+app.add_middleware(MetricsMiddleware, on_complete=log_slow_request)
 
 app.include_router(nodes_router.router)
 app.include_router(relationships_router.router)
+app.include_router(imports_router.router)
+app.include_router(graph_router.router)
 
 
 @app.post("/validate")
@@ -61,31 +94,76 @@ async def check_database_connection(
     creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
 ):
 
-    success, msg = can_connect(creds)
+    success, msg = await async_can_connect(creds)
     if success:
         return {"message": "Connection successful"}, 200
     else:
         return {"message": "Connection failed", "error": msg}, 400
 
 
-@app.post("/schema/")
-def get_schema(
+@app.post("/schema/", dependencies=[Depends(classify(RouteClass.METADATA))])
+async def get_schema(
+    request: Request,
     creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
     export_format: Optional[ExportFormat] = ExportFormat.DEFAULT,
+    compact: bool = False,
+    include_ids: bool = False,
 ):
     """Return a data model for a specified Neo4j instance."""
 
     logger.info(
-        f"Getting data model for Neo4j instance at {creds.uri}, {creds.username}, {creds.password}"
+        "Getting data model for Neo4j instance at %s, %s", creds.uri, creds.username
     )
 
-    query = """
-        call db.schema.visualization
+    schema = await metadata.get_schema(creds)
+
+    converted_records = schema.export(export_format)
+    if compact:
+        converted_records = compact_export(
+            converted_records, export_format, include_ids
+        )
+
+    return encoded_response(request, converted_records)
+
+
+@app.post("/cache/invalidate")
+async def invalidate_metadata_cache(
+    creds: Optional[Neo4jCredentials] = None,
+):
+    """Drop cached schema, label and relationship type metadata, and cached
+    node and relationship results.
+
+    Args:
+        creds (Neo4jCredentials, optional): Database to invalidate. Defaults to None, which invalidates every database.
     """
-    records, _, _ = query_db(creds, query)
+    dropped = metadata.invalidate(creds)
+    logger.info("Invalidated %s cached metadata entries", dropped)
+    results = result_cache.invalidate(creds)
+    return {"invalidated": dropped, "results_invalidated": results}
+
+
+@app.get("/cache/coalescing")
+async def coalescing_stats():
+    """Calls served by another identical in-flight call (hits) vs run (misses),
+    per coalescing layer."""
+    return coalesce.stats()
+
+
+@app.get("/cache/results")
+async def result_cache_stats():
+    """Size, budget and hit counts of the node and relationship result cache."""
+    return result_cache.stats()
+
 
-    logger.debug(f"get data model records: {records}")
+@app.get("/admission")
+async def admission_stats():
+    """In-flight and queued database calls, limits, and admitted and shed
+    counts per route class and database."""
+    return admission.stats()
 
-    converted_records = export_schema(records, export_format)
 
-    return converted_records
+@app.get("/metrics")
+async def get_metrics():
+    """Request, stage timing, row, byte and database error metrics in the
+    Prometheus text format."""
+    return metrics_response()
@@ -0,0 +1,74 @@
+from neo4j_python_server.cache import metadata_cache
+from neo4j_python_server.database import async_read_db
+from neo4j_python_server.export import IMPORT_KEY_LABEL, ExportFormat, export_schema
+from neo4j_python_server.logger import Summary, logger
+from neo4j_python_server.models import Neo4jCredentials
+
+
+class SchemaMetadata:
+    """Raw db.schema.visualization records plus their converted output per
+    ExportFormat, which is filled in on first use and discarded along with
+    the records when they're reloaded."""
+
+    def __init__(self, records: list):
+        self.records = records
+        self.converted = {}
+
+    def export(self, format: ExportFormat):
+        if format not in self.converted:
+            self.converted[format] = export_schema(self.records, format)
+        return self.converted[format]
+
+
+def cache_key(creds: Neo4jCredentials) -> tuple:
+    """Metadata is shared by every user of a database, so an import by one
+    invalidates it for all of them."""
+    return (creds.uri, creds.database)
+
+
+async def get_labels(creds: Neo4jCredentials, refresh: bool = False) -> list[str]:
+    """Cached db.labels() of creds' database. refresh reloads them first."""
+
+    async def load():
+        records, _, _ = await async_read_db(creds, "call db.labels();")
+        logger.debug("get node labels response: %s", Summary(records))
+        labels = [r.data()["label"] for r in records]
+        return [label for label in labels if label != IMPORT_KEY_LABEL]
+
+    key = cache_key(creds) + ("labels",)
+    if refresh:
+        metadata_cache.invalidate(key)
+    return await metadata_cache.get(key, load)
+
+
+async def get_relationship_types(
+    creds: Neo4jCredentials, refresh: bool = False
+) -> list[str]:
+    """Cached db.relationshipTypes() of creds' database. refresh reloads them
+    first."""
+
+    async def load():
+        records, _, _ = await async_read_db(creds, "call db.relationshipTypes();")
+        logger.debug("get relationships types response: %s", Summary(records))
+        return [r.data()["relationshipType"] for r in records]
+
+    key = cache_key(creds) + ("relationship_types",)
+    if refresh:
+        metadata_cache.invalidate(key)
+    return await metadata_cache.get(key, load)
+
+
+async def get_schema(creds: Neo4jCredentials) -> SchemaMetadata:
+    async def load():
+        records, _, _ = await async_read_db(creds, "call db.schema.visualization")
+        logger.debug("get data model records: %s", Summary(records))
+        return SchemaMetadata(records)
+
+    return await metadata_cache.get(cache_key(creds) + ("schema",), load)
+
+
+def invalidate(creds: Neo4jCredentials | None = None) -> int:
+    """Drop cached metadata for one database, or for every database if creds is None."""
+    if creds is None:
+        return metadata_cache.invalidate()
+    return metadata_cache.invalidate(cache_key(creds))
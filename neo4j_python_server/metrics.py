@@ -0,0 +1,281 @@
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+import threading
+import time
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Prometheus client library default buckets, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_lock = threading.Lock()
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple) -> str:
+    if not names:
+        return ""
+    pairs = (f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = defaultdict(float)
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with _lock:
+            self.values[labels] += amount
+
+    def remove(self, labels: tuple):
+        """Drop the series for labels, eg. once its target is forgotten."""
+        with _lock:
+            self.values.pop(labels, None)
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, count in sorted(self.values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {count}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, labels: tuple, value: float):
+        with _lock:
+            self.values[labels] = value
+
+    def collect(self) -> list[str]:
+        lines = super().collect()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets=BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # labels -> [count per bucket..., sum, count]
+        self.values = {}
+
+    def observe(self, labels: tuple, value: float):
+        with _lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[i] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def collect(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.labels + ("le",)
+        for values, entry in sorted(self.values.items()):
+            for bound, count in zip(self.buckets, entry):
+                labels = _labels(names, values + (bound,))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = _labels(names, values + ("+Inf",))
+            lines.append(f"{self.name}_bucket{labels} {entry[-1]}")
+            labels = _labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {entry[-2]}")
+            lines.append(f"{self.name}_count{labels} {entry[-1]}")
+        return lines
+
+
+REQUEST_LABELS = ("route", "format")
+
+request_seconds = Histogram(
+    "neo4j_server_request_seconds",
+    "Request duration, until the last body byte is sent.",
+    REQUEST_LABELS,
+)
+stage_seconds = Histogram(
+    "neo4j_server_stage_seconds",
+    "Time spent per request stage: admission, driver, query, export, layout and encode.",
+    REQUEST_LABELS + ("stage",),
+)
+requests_total = Counter(
+    "neo4j_server_requests_total", "Requests handled.", REQUEST_LABELS + ("status",)
+)
+rows_total = Counter(
+    "neo4j_server_rows_total", "Records read from Neo4j.", REQUEST_LABELS
+)
+response_bytes_total = Counter(
+    "neo4j_server_response_bytes_total", "Response body bytes sent.", REQUEST_LABELS
+)
+db_errors_total = Counter(
+    "neo4j_server_db_errors_total", "Neo4j driver errors by type.", ("type",)
+)
+
+ADMISSION_LABELS = ("route_class", "uri", "database")
+
+admission_in_flight = Gauge(
+    "neo4j_server_admission_in_flight",
+    "Database calls admitted and running.",
+    ADMISSION_LABELS,
+)
+admission_queued = Gauge(
+    "neo4j_server_admission_queued",
+    "Database calls waiting for admission.",
+    ADMISSION_LABELS,
+)
+admission_shed_total = Counter(
+    "neo4j_server_admission_shed_total",
+    "Database calls rejected with a 503, by reason: queue_full or timeout.",
+    ADMISSION_LABELS + ("reason",),
+)
+
+METRICS = (
+    request_seconds,
+    stage_seconds,
+    requests_total,
+    rows_total,
+    response_bytes_total,
+    db_errors_total,
+    admission_in_flight,
+    admission_queued,
+    admission_shed_total,
+)
+
+
+def render() -> str:
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.collect())
+    return "\n".join(lines) + "\n"
+
+
+class RequestMetrics:
+    """Stage timings, row count and query summaries of the current request."""
+
+    __slots__ = ("stages", "format", "rows", "queries")
+
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.format = ""
+        self.rows = 0
+        # (credentials, ResultSummary) per query run, for the slow query log
+        self.queries = []
+
+    def server_timing(self, total: float) -> str:
+        entries = [f"{name};dur={s * 1000:.1f}" for name, s in self.stages.items()]
+        entries.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+_current = ContextVar("request_metrics", default=None)
+
+# Values of the format label, registered by the modules defining formats. Any
+# other value, eg. an unsupported format sent by a client, is labelled "other"
+# so the label set stays bounded.
+FORMAT_LABELS = {""}
+
+
+@contextmanager
+def stage(name: str, format=None):
+    """Add the time spent in the block to the current request's `name` stage.
+    format, if given, labels the request's metrics with its export format."""
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if metrics is not None:
+            metrics.stages[name] += time.perf_counter() - start
+        if format is not None:
+            label_format(format)
+
+
+def label_format(format):
+    """Label the current request's metrics with its export format."""
+    metrics = _current.get()
+    if metrics is not None:
+        value = getattr(format, "value", format) or ""
+        metrics.format = value if value in FORMAT_LABELS else "other"
+
+
+def add_stage(name: str, seconds: float, format=None):
+    """Add time measured outside a stage block, eg. summed across the
+    records of a streamed response, to the current request's `name` stage."""
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.stages[name] += seconds
+    if format is not None:
+        label_format(format)
+
+
+def add_rows(count: int):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.rows += count
+
+
+def add_query(creds, summary):
+    metrics = _current.get()
+    if metrics is not None:
+        metrics.queries.append((creds, summary))
+
+
+class MetricsMiddleware(BaseHTTPMiddleware):
+    """Records per-route request metrics and adds a Server-Timing header with
+    the stage breakdown of each response.
+
+    on_complete, if given, is called with the route, the RequestMetrics and
+    the duration in seconds once the response body has been sent.
+    """
+
+    def __init__(self, app, on_complete=None):
+        super().__init__(app)
+        self.on_complete = on_complete
+
+    async def dispatch(self, request: Request, call_next):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        start = time.perf_counter()
+        try:
+            response = await call_next(request)
+        finally:
+            _current.reset(token)
+
+        route = request.scope.get("route")
+        path = route.path if route is not None else "unmatched"
+        response.headers["Server-Timing"] = metrics.server_timing(
+            time.perf_counter() - start
+        )
+
+        body = response.body_iterator
+
+        async def counted():
+            size = 0
+            async for chunk in body:
+                size += len(chunk)
+                yield chunk
+            elapsed = time.perf_counter() - start
+            labels = (path, metrics.format)
+            request_seconds.observe(labels, elapsed)
+            for name, seconds in metrics.stages.items():
+                stage_seconds.observe(labels + (name,), seconds)
+            requests_total.inc(labels + (response.status_code,))
+            rows_total.inc(labels, metrics.rows)
+            response_bytes_total.inc(labels, size)
+            if self.on_complete is not None:
+                self.on_complete(path, metrics, elapsed)
+
+        response.body_iterator = counted()
+        return response
+
+
+def metrics_response() -> Response:
+    return Response(render(), media_type=PROMETHEUS_MEDIA_TYPE)
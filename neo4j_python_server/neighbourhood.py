@@ -0,0 +1,121 @@
+from enum import Enum
+from neo4j import Record
+from neo4j_python_server.logger import logger
+from neo4j_python_server.queries import quote_identifier
+import os
+
+NEIGHBOURHOOD_MAX_DEPTH = int(os.environ.get("NEIGHBOURHOOD_MAX_DEPTH", 5))
+# Default maximum Relationships followed from each Node per hop
+NEIGHBOURHOOD_FAN_OUT = int(os.environ.get("NEIGHBOURHOOD_FAN_OUT", 100))
+# Expansion stops adding Nodes once this many have been found
+NEIGHBOURHOOD_MAX_NODES = int(os.environ.get("NEIGHBOURHOOD_MAX_NODES", 5000))
+
+SEEDS_QUERY = "MATCH (n)\nWHERE elementId(n) IN $seeds\nRETURN n"
+
+
+class Direction(str, Enum):
+    OUT = "out"
+    IN = "in"
+    BOTH = "both"
+
+
+def hop_query(
+    direction: Direction, labels: list[str] | None, types: list[str] | None
+) -> str:
+    """Build the query expanding one hop from the `$frontier` element ids.
+
+    Each frontier Node is matched by element id and expanded in its own
+    subquery, so `$fan_out` caps the Relationships followed per Node and the
+    work done is bounded by frontier size times fan-out.
+    """
+    rel = "[r]"
+    if types is not None:
+        rel = "[r:" + "|".join(quote_identifier(t) for t in types) + "]"
+    pattern = {
+        Direction.OUT: f"(s)-{rel}->(m)",
+        Direction.IN: f"(s)<-{rel}-(m)",
+        Direction.BOTH: f"(s)-{rel}-(m)",
+    }[direction]
+    where = ""
+    if labels is not None:
+        where = "\n  WHERE any(label IN labels(m) WHERE label IN $labels)"
+    return (
+        "UNWIND $frontier AS id\n"
+        "MATCH (s)\n"
+        "WHERE elementId(s) = id\n"
+        "CALL {\n"
+        "  WITH s\n"
+        f"  MATCH {pattern}{where}\n"
+        "  RETURN r, m\n"
+        "  LIMIT $fan_out\n"
+        "}\n"
+        "RETURN startNode(r) AS n, r, endNode(r) AS n2, m"
+    )
+
+
+async def read_neighbourhood(
+    tx,
+    seeds: list[str],
+    depth: int,
+    direction: Direction = Direction.BOTH,
+    labels: list[str] | None = None,
+    types: list[str] | None = None,
+    fan_out: int = NEIGHBOURHOOD_FAN_OUT,
+    max_nodes: int = NEIGHBOURHOOD_MAX_NODES,
+):
+    """Breadth-first expansion from seeds within one read transaction.
+
+    Only Nodes found in the previous hop are expanded, so every Node is
+    visited once. Once max_nodes Nodes have been found, Relationships to
+    further Nodes are dropped, so no edge is left dangling.
+
+    Args:
+        tx: Managed read transaction.
+        seeds: Element ids to start from. Ids that don't exist are ignored.
+        depth: Number of hops.
+        direction: Follow outgoing, incoming or both Relationship directions.
+        labels: Validated labels neighbours must have one of. None for any.
+        types: Validated relationship types to follow. None for any.
+        fan_out: Maximum Relationships followed from each Node per hop.
+        max_nodes: Maximum Nodes returned, including seeds.
+
+    Returns:
+        (nodes, relationship records) where each relationship record holds the
+        start Node, Relationship and end Node as n, r and n2, like the records
+        of relationships_query.
+    """
+    nodes = {}
+    result = await tx.run(SEEDS_QUERY, {"seeds": seeds})
+    async for record in result:
+        nodes[record["n"].element_id] = record["n"]
+
+    relationships = {}
+    if types is not None and not types:
+        return list(nodes.values()), []
+
+    query = hop_query(direction, labels, types)
+    params = {"fan_out": fan_out}
+    if labels is not None:
+        params["labels"] = labels
+
+    frontier = list(nodes)
+    for hop in range(depth):
+        if not frontier or len(nodes) >= max_nodes:
+            break
+        result = await tx.run(query, {**params, "frontier": frontier})
+        frontier = []
+        async for record in result:
+            m = record["m"]
+            if m.element_id not in nodes:
+                if len(nodes) >= max_nodes:
+                    continue
+                nodes[m.element_id] = m
+                frontier.append(m.element_id)
+            r = record["r"]
+            if r.element_id not in relationships:
+                relationships[r.element_id] = Record(
+                    [("n", record["n"]), ("r", r), ("n2", record["n2"])]
+                )
+        logger.debug("Hop %s found %s new nodes", hop + 1, len(frontier))
+
+    return list(nodes.values()), list(relationships.values())
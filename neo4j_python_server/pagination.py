@@ -0,0 +1,90 @@
+from fastapi import HTTPException
+from neo4j_python_server.logger import logger
+import base64
+import binascii
+
+
+def encode_cursor(element_id: str) -> str:
+    return base64.urlsafe_b64encode(element_id.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode()
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        logger.error("Invalid pagination cursor '%s': %s", cursor, e)
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def paginate(
+    variable: str,
+    conditions: list[str],
+    params: dict,
+    page_size: int | None,
+    cursor: str | None,
+) -> str:
+    """Add keyset pagination on elementId(variable) to a query under construction.
+
+    Appends the cursor condition to `conditions` and the cursor and limit
+    values to `params`, then returns the ORDER BY / LIMIT clause to add after
+    RETURN. One more row than page_size is requested so split_page can tell
+    whether another page follows.
+
+    Element ids aren't indexed, so neither the cursor condition nor the
+    ORDER BY is index backed: every page scans and sorts all matching
+    elements before applying LIMIT. Responses stay small, but each page of a
+    large label or type costs the database about as much as reading it all.
+    Narrow such reads with labels, types or conditions.
+    """
+    if page_size is None:
+        return ""
+    if cursor is not None:
+        conditions.append(f"elementId({variable}) > $cursor")
+        params["cursor"] = decode_cursor(cursor)
+    params["limit"] = page_size + 1
+    return f"\nORDER BY elementId({variable})\nLIMIT $limit"
+
+
+def split_page(records: list, variable: str, page_size: int) -> tuple[list, str | None]:
+    """Trim the lookahead row from a page and return (records, next_cursor)."""
+    if len(records) <= page_size:
+        return records, None
+    records = records[:page_size]
+    return records, encode_cursor(records[-1][variable].element_id)
+
+
+class CursorTracker:
+    """Streaming counterpart to split_page.
+
+    Wrap the record stream with track(), then append the trailing
+    `{"next_cursor": ...}` line with with_next_cursor() once the converted
+    elements are exhausted.
+    """
+
+    def __init__(self, variable: str, page_size: int):
+        self.variable = variable
+        self.page_size = page_size
+        self.count = 0
+        self.last_element_id = None
+        self.has_more = False
+
+    async def track(self, records):
+        async for record in records:
+            if self.count == self.page_size:
+                # Lookahead row, only used to detect a following page
+                self.has_more = True
+                continue
+            self.count += 1
+            self.last_element_id = record[self.variable].element_id
+            yield record
+
+    @property
+    def next_cursor(self) -> str | None:
+        if not self.has_more:
+            return None
+        return encode_cursor(self.last_element_id)
+
+    async def with_next_cursor(self, elements):
+        async for element in elements:
+            yield element
+        yield {"next_cursor": self.next_cursor}
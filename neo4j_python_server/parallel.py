@@ -0,0 +1,99 @@
+from fastapi import HTTPException
+from neo4j_python_server.database import async_read_db
+from neo4j_python_server.logger import logger
+from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.projection import project_query, projected_records
+from neo4j_python_server.queries import nodes_query
+import asyncio
+import os
+
+# Maximum partition queries a parallel read runs at once. Each holds its own
+# session, and so a pooled connection, while it runs.
+NODES_PARALLELISM = int(os.environ.get("NODES_PARALLELISM", 4))
+
+EXCLUDED = "NOT any(label IN labels(n) WHERE label IN $excluded_labels)"
+
+
+def check_parallel_options(labels: list[str] | None):
+    """Parallel reads split a label filter into one label scan per label. An
+    unfiltered read would need an extra scan of every Node to also find the
+    unlabelled ones, so does strictly more work than a single query."""
+    if labels is None:
+        raise HTTPException(
+            status_code=400, detail="parallel=true requires a labels filter"
+        )
+
+
+def node_partitions(labels: list[str]) -> list[tuple[list[str], list[str], dict]]:
+    """Split a node read into (labels, extra conditions, extra params)
+    partitions, one per label, that each return a Node at most once.
+
+    A Node with several labels is only returned by the partition of the
+    first of them, as every partition excludes Nodes with an earlier label.
+    """
+    partitions = []
+    for i, label in enumerate(labels):
+        if i == 0:
+            partitions.append(([label], [], {}))
+        else:
+            excluded = {"excluded_labels": labels[:i]}
+            partitions.append(([label], [EXCLUDED], excluded))
+    return partitions
+
+
+async def parallel_node_records(
+    creds: Neo4jCredentials,
+    labels: list[str],
+    conditions: list[str],
+    params: dict,
+    page_clause: str = "",
+    properties: dict | None = None,
+    parallelism: int = NODES_PARALLELISM,
+) -> list:
+    """Read Nodes with one query per label, at most `parallelism` at a time,
+    merging the results.
+
+    Partitions are disjoint, see node_partitions. For paginated reads each
+    partition applies the page clause, and the merged records are re-sorted
+    by element id and cut to the page's limit, so the page matches the one a
+    single query returns.
+
+    Args:
+        creds: Database to read from.
+        labels: Validated labels, see nodes_query. Unfiltered reads aren't
+            split, see check_parallel_options.
+        conditions: WHERE conditions, including any from paginate().
+        params: Query parameters.
+        page_clause: ORDER BY / LIMIT clause from paginate().
+        properties: Projection spec, see project_query.
+        parallelism: Maximum concurrent partition queries.
+    """
+    if not labels:
+        return []
+
+    semaphore = asyncio.Semaphore(parallelism)
+
+    async def read(partition_labels, extra_conditions, extra_params):
+        query = nodes_query(
+            partition_labels, conditions + extra_conditions, page_clause
+        )
+        if properties is not None:
+            query = project_query(
+                query, ["n"], properties, "n" if page_clause else None
+            )
+        async with semaphore:
+            records, _, _ = await async_read_db(
+                creds, query, {**params, **extra_params}
+            )
+        return projected_records(records, properties)
+
+    partitions = node_partitions(labels)
+    results = await asyncio.gather(*(read(*p) for p in partitions))
+
+    records = [record for partition in results for record in partition]
+    logger.debug("Read %s nodes from %s partitions", len(records), len(partitions))
+
+    if page_clause:
+        records.sort(key=lambda record: record["n"].element_id)
+        records = records[: params["limit"]]
+    return records
@@ -0,0 +1,151 @@
+from fastapi import HTTPException
+from neo4j_python_server.database import async_query_db
+from neo4j_python_server.logger import logger, mname
+import asyncio
+import json
+import logging
+import os
+
+# Requests taking longer than this many seconds, until their last body byte
+# is sent, are written to the slow query log. 0 disables the log.
+SLOW_QUERY_SECONDS = float(os.environ.get("SLOW_QUERY_SECONDS", 1))
+
+# Write the slow query log to this file instead of the server log
+SLOW_QUERY_LOG_FILE = os.environ.get("SLOW_QUERY_LOG_FILE")
+
+# Fetch an EXPLAIN plan for logged queries that weren't run with profile=true
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "true").lower() == "true"
+
+slow_query_logger = logging.getLogger(f"{mname}.slow_queries")
+if SLOW_QUERY_LOG_FILE:
+    handler = logging.FileHandler(SLOW_QUERY_LOG_FILE)
+    handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(handler)
+    slow_query_logger.propagate = False
+
+# Background EXPLAIN tasks, referenced until done so they aren't collected
+_explains = set()
+
+
+def check_profile_options(streamed: bool, sampled: bool, synced: bool):
+    """Profiled reads return their plan alongside the materialised results,
+    so can't be streamed or combined with sample / sync reads, which run
+    several queries."""
+    if streamed:
+        raise HTTPException(
+            status_code=400,
+            detail="profile can't be combined with streamed or columnar output",
+        )
+    if sampled or synced:
+        raise HTTPException(
+            status_code=400, detail="profile can't be combined with sample or sync"
+        )
+
+
+def profile_query(query: str) -> str:
+    return "PROFILE\n" + query
+
+
+def params_shape(params: dict | None) -> dict:
+    """Describe query parameters by type and size, without their values,
+    eg. {"labels": "list[3]", "limit": "int"}."""
+    shape = {}
+    for key, value in (params or {}).items():
+        name = type(value).__name__
+        if isinstance(value, (list, dict)):
+            name = f"{name}[{len(value)}]"
+        shape[key] = name
+    return shape
+
+
+def plan_tree(plan: dict) -> dict:
+    """Convert a PROFILE or EXPLAIN plan from a ResultSummary into a tree of
+    operators with their rows and db hits. EXPLAIN plans only have estimates."""
+    args = plan.get("args", {})
+    operator = {
+        "operator": plan.get("operatorType"),
+        "details": args.get("Details"),
+        "identifiers": plan.get("identifiers", []),
+        "estimated_rows": args.get("EstimatedRows"),
+    }
+    if "dbHits" in plan:
+        operator["rows"] = plan.get("rows")
+        operator["db_hits"] = plan.get("dbHits")
+        operator["page_cache_hits"] = plan.get("pageCacheHits")
+        operator["page_cache_misses"] = plan.get("pageCacheMisses")
+    operator["children"] = [plan_tree(child) for child in plan.get("children", [])]
+    return operator
+
+
+def _db_hits(plan: dict) -> int:
+    return plan.get("dbHits", 0) + sum(_db_hits(c) for c in plan.get("children", []))
+
+
+def query_profile(summary) -> dict:
+    """Plan and timings of a query from its ResultSummary. The plan is None
+    unless the query was run with PROFILE or EXPLAIN.
+
+    result_available_after and result_consumed_after are the server's times,
+    in milliseconds, to the first record and to the end of the result.
+    """
+    plan = summary.profile or summary.plan
+    profile = {
+        "query": summary.query,
+        "parameters": params_shape(summary.parameters),
+        "result_available_after": summary.result_available_after,
+        "result_consumed_after": summary.result_consumed_after,
+        "plan": plan_tree(plan) if plan else None,
+    }
+    if summary.profile:
+        profile["db_hits"] = _db_hits(summary.profile)
+    return profile
+
+
+def log_slow_request(route: str, metrics, elapsed: float):
+    """MetricsMiddleware on_complete callback writing requests slower than
+    SLOW_QUERY_SECONDS to the slow query log, with their stage timings and
+    the query text, parameter shape and plan of each query they ran."""
+    if SLOW_QUERY_SECONDS <= 0 or elapsed < SLOW_QUERY_SECONDS:
+        return
+    entry = {
+        "route": route,
+        "format": metrics.format,
+        "seconds": round(elapsed, 3),
+        "stages": {name: round(s, 3) for name, s in metrics.stages.items()},
+        "rows": metrics.rows,
+        "queries": [query_profile(summary) for _, summary in metrics.queries],
+    }
+    unplanned = [
+        (creds, summary)
+        for creds, summary in metrics.queries
+        if not (summary.profile or summary.plan)
+    ]
+    if SLOW_QUERY_EXPLAIN and unplanned:
+        # Plan lookups need a round trip each, so run them after the response
+        task = asyncio.ensure_future(_explain_and_log(entry, unplanned))
+        _explains.add(task)
+        task.add_done_callback(_explains.discard)
+    else:
+        _write(entry)
+
+
+async def _explain_and_log(entry: dict, unplanned: list):
+    explained = {}
+    for creds, summary in unplanned:
+        try:
+            _, plan_summary, _ = await async_query_db(
+                creds, "EXPLAIN\n" + summary.query, summary.parameters or {}
+            )
+            explained[summary.query] = plan_tree(plan_summary.plan)
+        except Exception as e:
+            logger.warning("Couldn't EXPLAIN slow query: %s", e)
+    for query in entry["queries"]:
+        if query["plan"] is None:
+            query["plan"] = explained.get(query["query"])
+    _write(entry)
+
+
+def _write(entry: dict):
+    slow_query_logger.warning(
+        "Slow request: %s", json.dumps(entry, default=str, separators=(",", ":"))
+    )
@@ -0,0 +1,137 @@
+from neo4j import Record
+from neo4j_python_server.queries import quote_identifier
+
+# Key of a projection spec entry applying to every label / type not listed
+ANY = "*"
+
+
+class ProjectedNode:
+    """Stand-in for a driver Node built from a projected map, exposing the
+    attributes the exporters read."""
+
+    __slots__ = ("element_id", "labels", "_properties")
+
+    def __init__(self, element_id: str, labels: list[str], properties: dict):
+        self.element_id = element_id
+        self.labels = labels
+        self._properties = properties
+
+
+class ProjectedRelationship:
+    """Stand-in for a driver Relationship built from a projected map."""
+
+    __slots__ = ("element_id", "type", "_properties", "start_node", "end_node")
+
+    def __init__(self, element_id, type, properties, start_node, end_node):
+        self.element_id = element_id
+        self.type = type
+        self._properties = properties
+        self.start_node = start_node
+        self.end_node = end_node
+
+
+def _map_projection(variable: str, keys: list[str] | None) -> str:
+    if keys is None:
+        return f"{variable} {{.*}}"
+    if not keys:
+        return "{}"
+    return variable + " {" + ", ".join("." + quote_identifier(k) for k in keys) + "}"
+
+
+def properties_expression(variable: str, spec: dict[str, list[str]]) -> str:
+    """Cypher expression for the properties of variable kept by spec.
+
+    spec maps labels / relationship types to the property keys to return.
+    The first entry whose label or type the element has wins, then the `*`
+    entry. Elements matching neither keep all their properties.
+    """
+    fallback = _map_projection(variable, spec.get(ANY))
+    cases = [
+        f"WHEN {variable}:{quote_identifier(name)} THEN {_map_projection(variable, keys)}"
+        for name, keys in spec.items()
+        if name != ANY
+    ]
+    if not cases:
+        return fallback
+    return "CASE " + " ".join(cases) + f" ELSE {fallback} END"
+
+
+def node_projection(variable: str, spec: dict) -> str:
+    return (
+        f"{{element_id: elementId({variable}), labels: labels({variable}), "
+        f"properties: {properties_expression(variable, spec)}}}"
+    )
+
+
+def relationship_projection(variable: str, spec: dict) -> str:
+    return (
+        f"{{element_id: elementId({variable}), type: type({variable}), "
+        f"start: elementId(startNode({variable})), end: elementId(endNode({variable})), "
+        f"properties: {properties_expression(variable, spec)}}}"
+    )
+
+
+def project_query(query: str, variables: list[str], spec: dict, order_by: str = None):
+    """Wrap a query returning Nodes / Relationships so only the properties in
+    spec leave the database.
+
+    Args:
+        query: Query returning `variables`, eg. from nodes_query.
+        variables: Returned variables. "r" is projected as a relationship,
+            anything else as a node.
+        spec: Label / type to property keys, see properties_expression.
+        order_by: Variable to re-apply the inner query's element id ordering
+            on, for paginated queries.
+    """
+    returns = ", ".join(
+        (relationship_projection(v, spec) if v == "r" else node_projection(v, spec))
+        + f" AS {v}"
+        for v in variables
+    )
+    query = "CALL {\n" + query + "\n}\nRETURN " + returns
+    if order_by is not None:
+        query += f"\nORDER BY {order_by}.element_id"
+    return query
+
+
+def _node(projected: dict) -> ProjectedNode:
+    return ProjectedNode(
+        projected["element_id"], projected["labels"], projected["properties"]
+    )
+
+
+def unpack_record(record) -> Record:
+    """Rebuild a projected record with ProjectedNode / ProjectedRelationship
+    values in place of the maps, so it can be passed to the exporters."""
+    values = {}
+    for key in record.keys():
+        if key != "r":
+            values[key] = _node(record[key])
+    if "r" in record.keys():
+        r = record["r"]
+        start = values.get("n") or ProjectedNode(r["start"], [], {})
+        end = values.get("n2") or ProjectedNode(r["end"], [], {})
+        values["r"] = ProjectedRelationship(
+            r["element_id"], r["type"], r["properties"], start, end
+        )
+    return Record((key, values[key]) for key in record.keys())
+
+
+def projected_records(records: list, spec: dict | None) -> list:
+    """Unpack the records of a query wrapped by project_query. Records are
+    returned unchanged if there was no projection spec."""
+    if spec is None:
+        return records
+    return [unpack_record(record) for record in records]
+
+
+async def _unpack_stream(records):
+    async for record in records:
+        yield unpack_record(record)
+
+
+def projected_stream(records, spec: dict | None):
+    """Streaming counterpart to projected_records."""
+    if spec is None:
+        return records
+    return _unpack_stream(records)
@@ -0,0 +1,141 @@
+from neo4j_python_server.logger import logger
+from neo4j_python_server.metadata import get_labels, get_relationship_types
+from neo4j_python_server.models import Neo4jCredentials
+
+# Used when every requested label or type is unknown to the database, so
+# nothing can match and there's no need to touch the store at all.
+EMPTY_NODES_QUERY = "UNWIND [] AS n\nRETURN n"
+EMPTY_RELATIONSHIPS_QUERY = "UNWIND [] AS x\nRETURN x AS n, x AS r, x AS n2"
+
+
+def quote_identifier(name: str) -> str:
+    """Backtick-quote a label or relationship type for inlining into Cypher."""
+    return "`" + name.replace("`", "``") + "`"
+
+
+async def known_labels(creds: Neo4jCredentials, refresh: bool = False) -> set[str]:
+    return set(await get_labels(creds, refresh))
+
+
+async def known_relationship_types(
+    creds: Neo4jCredentials, refresh: bool = False
+) -> set[str]:
+    return set(await get_relationship_types(creds, refresh))
+
+
+def _filter_known(requested: list[str], known: set[str], kind: str) -> list[str]:
+    result = [name for name in dict.fromkeys(requested) if name in known]
+    skipped = len(requested) - len(result)
+    if skipped:
+        logger.debug("Ignoring %s unknown or duplicate %s filter(s)", skipped, kind)
+    return result
+
+
+async def validate_labels(creds: Neo4jCredentials, labels: list[str]) -> list[str]:
+    """Return the requested labels that exist in the target database.
+
+    The cached label list can miss labels created since by other writers, so
+    it's reloaded before any requested label is dropped.
+    """
+    known = await known_labels(creds)
+    if not known.issuperset(labels):
+        known = await known_labels(creds, refresh=True)
+    return _filter_known(labels, known, "label")
+
+
+async def validate_relationship_types(
+    creds: Neo4jCredentials, types: list[str]
+) -> list[str]:
+    """Return the requested relationship types that exist in the target
+    database, reloading the cached types before dropping any, as for labels."""
+    known = await known_relationship_types(creds)
+    if not known.issuperset(types):
+        known = await known_relationship_types(creds, refresh=True)
+    return _filter_known(types, known, "type")
+
+
+def _where(conditions: list[str]) -> str:
+    if not conditions:
+        return ""
+    return "\nWHERE " + "\nAND ".join(conditions)
+
+
+def _union(branches: list[str], returns: str, page_clause: str) -> str:
+    if len(branches) == 1:
+        return branches[0] + page_clause
+    return "CALL {\n" + "\nUNION\n".join(branches) + "\n}\n" + returns + page_clause
+
+
+def nodes_query(
+    labels: list[str] | None, conditions: list[str], page_clause: str = ""
+) -> str:
+    """Build the node read query.
+
+    Each label gets its own `MATCH (n:Label)` branch so the planner can use the
+    label lookup index instead of scanning all nodes, and the branches are
+    combined with UNION, which also removes duplicate multi-labelled nodes.
+
+    Args:
+        labels: Validated labels to filter by. None for no filter, an empty
+            list if a filter was requested but none of its labels exist.
+        conditions: Extra WHERE conditions on n, applied in every branch.
+        page_clause: ORDER BY / LIMIT clause from paginate().
+    """
+    if labels is None:
+        return "MATCH (n)" + _where(conditions) + "\nRETURN n" + page_clause
+    if not labels:
+        return EMPTY_NODES_QUERY
+    branches = [
+        f"MATCH (n:{quote_identifier(label)})" + _where(conditions) + "\nRETURN n"
+        for label in labels
+    ]
+    return _union(branches, "RETURN n", page_clause)
+
+
+def relationships_query(
+    labels: list[str] | None,
+    types: list[str] | None,
+    conditions: list[str],
+    params: dict,
+    page_clause: str = "",
+    returns: str = "n, r, n2",
+) -> str:
+    """Build the relationship read query.
+
+    Relationship types become a typed pattern, `[r:A|B]`, and node labels
+    expand to one branch per start label with the end node checked against
+    the same label list, so reads start from the label index.
+
+    Args:
+        labels: Validated node labels both endpoints must have one of. None
+            for no filter, an empty list if none of the requested labels exist.
+        types: Validated relationship types, with the same None / empty
+            semantics as labels.
+        conditions: Extra WHERE conditions applied in every branch.
+        params: Query parameters, updated with any the filters need.
+        page_clause: ORDER BY / LIMIT clause from paginate().
+        returns: Variables to return.
+    """
+    if (labels is not None and not labels) or (types is not None and not types):
+        return EMPTY_RELATIONSHIPS_QUERY
+
+    rel = "[r]"
+    if types is not None:
+        rel = "[r:" + "|".join(quote_identifier(t) for t in types) + "]"
+
+    returns = "RETURN " + returns
+    if labels is None:
+        return (
+            f"MATCH (n)-{rel}->(n2)" + _where(conditions) + "\n" + returns + page_clause
+        )
+
+    params["labels"] = labels
+    branch_conditions = ["any(label IN labels(n2) WHERE label IN $labels)"] + conditions
+    branches = [
+        f"MATCH (n:{quote_identifier(label)})-{rel}->(n2)"
+        + _where(branch_conditions)
+        + "\n"
+        + returns
+        for label in labels
+    ]
+    return _union(branches, returns, page_clause)
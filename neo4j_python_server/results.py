@@ -0,0 +1,141 @@
+from collections import OrderedDict
+from fastapi import Request, Response
+from neo4j_python_server.encoding import wants_msgpack
+from neo4j_python_server.logger import logger
+from neo4j_python_server.models import Neo4jCredentials
+import os
+import threading
+import time
+
+
+def parse_database_ttls(value: str) -> dict[str, float]:
+    """Parse "neo4j=300,analytics=0" into {"neo4j": 300.0, "analytics": 0.0}."""
+    ttls = {}
+    for item in value.split(","):
+        if item.strip():
+            database, seconds = item.split("=")
+            ttls[database.strip()] = float(seconds)
+    return ttls
+
+
+class ResultCache:
+    """LRU cache of encoded export responses, bounded by total body bytes.
+
+    Entries are dropped when this server writes to their database, see
+    invalidate, and otherwise expire after the database's TTL so writes made
+    by other clients show up. A TTL of 0 disables caching for a database.
+    Bodies larger than a quarter of the budget aren't cached, so one huge
+    response can't flush everything else.
+
+    Every invalidate bumps a generation counter for the database. Callers
+    capture the generation before reading and pass it to put, which drops
+    the response if the database was invalidated while it was being read.
+    """
+
+    def __init__(self, max_bytes: int, ttl: float, database_ttls: dict = None):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.database_ttls = database_ttls or {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generation = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def database(creds: Neo4jCredentials) -> tuple:
+        return (creds.uri, creds.database)
+
+    def ttl_for(self, creds: Neo4jCredentials) -> float:
+        return self.database_ttls.get(creds.database, self.ttl)
+
+    def generation(self, creds: Neo4jCredentials) -> tuple:
+        with self._lock:
+            return (self._generation, self._generations.get(self.database(creds), 0))
+
+    def key(self, creds: Neo4jCredentials, request: Request, request_key: tuple):
+        return (self.database(creds), wants_msgpack(request), request_key)
+
+    def get(self, key: tuple) -> Response | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.monotonic() > entry[2]:
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        body, media_type, _ = entry
+        return Response(body, media_type=media_type, headers={"X-Cache": "HIT"})
+
+    def put(
+        self,
+        creds: Neo4jCredentials,
+        key: tuple,
+        response: Response,
+        generation: tuple,
+    ):
+        ttl = self.ttl_for(creds)
+        body = response.body
+        if ttl <= 0 or response.status_code != 200 or len(body) > self.max_bytes / 4:
+            return
+        with self._lock:
+            if generation != (
+                self._generation,
+                self._generations.get(self.database(creds), 0),
+            ):
+                # Read before an import into the database finished
+                return
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (body, response.media_type, time.monotonic() + ttl)
+            self.size += len(body)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+    def _drop(self, key: tuple):
+        body, _, _ = self._entries.pop(key)
+        self.size -= len(body)
+
+    def invalidate(self, creds: Neo4jCredentials | None = None) -> int:
+        """Drop every entry for creds' database, or every entry if creds is None.
+        Returns the count dropped."""
+        with self._lock:
+            if creds is None:
+                self._generation += 1
+            else:
+                database = self.database(creds)
+                self._generations[database] = self._generations.get(database, 0) + 1
+            keys = [
+                k
+                for k in self._entries
+                if creds is None or k[0] == self.database(creds)
+            ]
+            for k in keys:
+                self._drop(k)
+        if keys:
+            logger.debug("Invalidated %s cached results", len(keys))
+        return len(keys)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self.size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+result_cache = ResultCache(
+    max_bytes=int(os.environ.get("RESULT_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL_SECONDS", 30)),
+    database_ttls=parse_database_ttls(os.environ.get("RESULT_CACHE_DATABASE_TTLS", "")),
+)
@@ -0,0 +1,291 @@
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from neo4j_python_server.admission import RouteClass, classify
+from neo4j_python_server.columnar import (
+    COLUMNAR_FORMATS,
+    ColumnarFormat,
+    columnar_export,
+)
+from neo4j_python_server.compact import compact_export
+from neo4j_python_server.database import async_execute_read
+from neo4j_python_server.encoding import encoded_response
+from neo4j_python_server.export import (
+    ExportFormat,
+    export_graph,
+    export_relationships,
+)
+from neo4j_python_server.layout import (
+    LayoutMethod,
+    check_layout_options,
+    layout_export,
+)
+from neo4j_python_server.logger import Summary, logger
+from neo4j_python_server.metrics import add_query
+from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.neighbourhood import (
+    NEIGHBOURHOOD_FAN_OUT,
+    NEIGHBOURHOOD_MAX_DEPTH,
+    NEIGHBOURHOOD_MAX_NODES,
+    Direction,
+    read_neighbourhood,
+)
+from neo4j_python_server.profiling import (
+    check_profile_options,
+    profile_query,
+    query_profile,
+)
+from neo4j_python_server.projection import project_query, unpack_record
+from neo4j_python_server.queries import (
+    nodes_query,
+    relationships_query,
+    validate_labels,
+    validate_relationship_types,
+)
+from neo4j_python_server.sampling import SAMPLE_SIZE, SampleMethod, read_sample
+from typing import Optional
+
+router = APIRouter(
+    prefix="/graph",
+    tags=["Graph"],
+    dependencies=[Depends(classify(RouteClass.EXPORT))],
+    responses={404: {"description": "Not found"}},
+)
+
+GRAPH_FORMATS = (ExportFormat.CYTOSCAPE, ExportFormat.D3)
+
+
+async def _read_graph(
+    tx, node_query: str, relationship_query: str, params: dict, projected: bool
+):
+    unpack = unpack_record if projected else lambda record: record
+    result = await tx.run(node_query, params)
+    nodes = [unpack(record)["n"] async for record in result]
+    summaries = [await result.consume()]
+    result = await tx.run(relationship_query, params)
+    relationships = [unpack(record)["r"] async for record in result]
+    summaries.append(await result.consume())
+    return nodes, relationships, summaries
+
+
+@router.post("/")
+async def get_graph(
+    request: Request,
+    creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
+    nodes: Optional[list[str]] = None,
+    relationships: Optional[list[str]] = None,
+    export_format: ExportFormat = Body(ExportFormat.CYTOSCAPE),
+    compact: bool = False,
+    include_ids: bool = False,
+    properties: Optional[dict[str, list[str]]] = None,
+    sample: Optional[SampleMethod] = None,
+    sample_size: int = Query(SAMPLE_SIZE, ge=1),
+    seed: Optional[str] = None,
+    layout: Optional[LayoutMethod] = None,
+    profile: bool = False,
+):
+    """Return Nodes and the Relationships between them in one response.
+
+    Nodes and Relationships are read in a single transaction. Relationships
+    are returned without their endpoint nodes, so each Node is fetched and
+    sent once instead of once per /nodes/nodes/ call and again per
+    /relationships/ row.
+
+    Args:
+        creds (Neo4jCredential): Credentials object for Neo4j instance to read from.
+
+        nodes (list[str], optional): Node labels to filter by. Relationships are limited to those between matching Nodes. Defaults to all.
+
+        relationships (list[str], optional): Relationship types to filter by. Defaults to all.
+
+        export_format (str, optional): "cytoscape" for `{nodes, edges}` or "d3" for `{nodes, links}`. Defaults to "cytoscape".
+
+        compact (bool, optional): Replace element ids and labels with integers, as for /relationships/. Defaults to False.
+
+        include_ids (bool, optional): With compact, also return the integer to element id mapping. Defaults to False.
+
+        properties (dict[str, list[str]], optional): Property keys to return per label or type, as for /relationships/. Defaults to None, returning all properties.
+
+        sample (str, optional): Return a sampled subgraph of at most sample_size Nodes plus Relationships, as for /relationships/. The response gains a `sample` entry with the sampled counts and totals. Defaults to None.
+
+        sample_size (int, optional): Element budget for sample. Defaults to SAMPLE_SIZE (1000).
+
+        seed (str, optional): Element id of the Node a "neighbourhood" sample starts from.
+
+        layout (str, optional): Compute node positions server-side with "force" or "spectral", as for /relationships/. Adds `x` / `y` to d3 nodes and `position` to cytoscape node elements. Defaults to None.
+
+        profile (bool, optional): Run the Node and Relationship queries under PROFILE and add a `profile` entry with their plans, as for /relationships/. Can't be combined with sample. Defaults to False.
+    """
+    if export_format not in GRAPH_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported graph export_format: {export_format.value}",
+        )
+    if layout is not None:
+        check_layout_options(export_format, False, GRAPH_FORMATS)
+    if profile:
+        check_profile_options(False, sample is not None, False)
+
+    labels = None
+    if nodes is not None and len(nodes) > 0:
+        labels = await validate_labels(creds, nodes)
+
+    types = None
+    if relationships is not None and len(relationships) > 0:
+        types = await validate_relationship_types(creds, relationships)
+
+    info = None
+    if sample is not None:
+        node_records, relationship_records, info = await async_execute_read(
+            creds,
+            read_sample,
+            sample,
+            labels,
+            types,
+            sample_size,
+            relationships="r",
+            seed=seed,
+            properties=properties,
+        )
+        node_records = [record["n"] for record in node_records]
+        relationship_records = [record["r"] for record in relationship_records]
+    else:
+        params = {}
+        node_query = nodes_query(labels, [])
+        relationship_query = relationships_query(labels, types, [], params, returns="r")
+        if properties is not None:
+            node_query = project_query(node_query, ["n"], properties)
+            relationship_query = project_query(relationship_query, ["r"], properties)
+        if profile:
+            node_query = profile_query(node_query)
+            relationship_query = profile_query(relationship_query)
+
+        node_records, relationship_records, summaries = await async_execute_read(
+            creds,
+            _read_graph,
+            node_query,
+            relationship_query,
+            params,
+            properties is not None,
+        )
+        for summary in summaries:
+            add_query(creds, summary)
+    result = await run_in_threadpool(
+        export_graph, node_records, relationship_records, export_format
+    )
+    logger.debug("Graph result: %s", Summary(result))
+
+    if layout is not None:
+        result = await run_in_threadpool(layout_export, result, export_format, layout)
+    if compact:
+        result = await run_in_threadpool(
+            compact_export, result, export_format, include_ids
+        )
+    if info is not None:
+        result["sample"] = info
+    if profile:
+        result["profile"] = [query_profile(summary) for summary in summaries]
+    return encoded_response(request, result)
+
+
+async def _iterate(records):
+    for record in records:
+        yield record
+
+
+@router.post("/neighbourhood/")
+async def get_neighbourhood(
+    request: Request,
+    seeds: list[str] = Body(...),
+    creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
+    nodes: Optional[list[str]] = None,
+    relationships: Optional[list[str]] = None,
+    export_format: ExportFormat | ColumnarFormat = Body(ExportFormat.CYTOSCAPE),
+    depth: int = Query(1, ge=1, le=NEIGHBOURHOOD_MAX_DEPTH),
+    direction: Direction = Direction.BOTH,
+    fan_out: int = Query(NEIGHBOURHOOD_FAN_OUT, ge=1),
+    max_nodes: int = Query(NEIGHBOURHOOD_MAX_NODES, ge=1),
+    compact: bool = False,
+    include_ids: bool = False,
+    layout: Optional[LayoutMethod] = None,
+):
+    """Return the Nodes and Relationships within depth hops of the seed Nodes.
+
+    The neighbourhood is expanded one hop at a time from the Nodes found in the
+    previous hop, following at most fan_out Relationships per Node, so the work
+    done scales with the neighbourhood rather than the database.
+
+    Args:
+        seeds (list[str]): Element ids of the Nodes to expand from.
+
+        creds (Neo4jCredential): Credentials object for Neo4j instance to read from.
+
+        nodes (list[str], optional): Only expand to Nodes with one of these labels. Seeds are always included. Defaults to all.
+
+        relationships (list[str], optional): Only follow Relationships of these types. Defaults to all.
+
+        export_format (str, optional): "cytoscape" or "d3" return `{nodes, edges}` / `{nodes, links}` as for /graph/, including seeds without Relationships. "default", "arrow" and "parquet" return the Relationships as for /relationships/. Defaults to "cytoscape".
+
+        depth (int, optional): Number of hops, up to NEIGHBOURHOOD_MAX_DEPTH (5). Defaults to 1.
+
+        direction (str, optional): Follow "out"going, "in"coming or "both" directions. Defaults to "both".
+
+        fan_out (int, optional): Maximum Relationships followed from each Node per hop. Defaults to NEIGHBOURHOOD_FAN_OUT (100).
+
+        max_nodes (int, optional): Stop adding Nodes once this many are found. Defaults to NEIGHBOURHOOD_MAX_NODES (5000).
+
+        compact (bool, optional): Replace element ids and labels with integers, as for /graph/. Defaults to False.
+
+        include_ids (bool, optional): With compact, also return the integer to element id mapping. Defaults to False.
+
+        layout (str, optional): Compute node positions server-side, as for /graph/. Defaults to None.
+    """
+    if layout is not None:
+        check_layout_options(export_format, False, GRAPH_FORMATS)
+
+    labels = None
+    if nodes is not None and len(nodes) > 0:
+        labels = await validate_labels(creds, nodes)
+
+    types = None
+    if relationships is not None and len(relationships) > 0:
+        types = await validate_relationship_types(creds, relationships)
+
+    node_records, relationship_records = await async_execute_read(
+        creds,
+        read_neighbourhood,
+        seeds,
+        depth,
+        direction,
+        labels,
+        types,
+        fan_out,
+        max_nodes,
+    )
+    logger.debug(
+        "Neighbourhood of %s seeds: %s nodes, %s relationships",
+        len(seeds),
+        len(node_records),
+        len(relationship_records),
+    )
+
+    if export_format in COLUMNAR_FORMATS:
+        return await columnar_export(_iterate(relationship_records), "r", export_format)
+    if export_format not in GRAPH_FORMATS:
+        result = await run_in_threadpool(
+            export_relationships, relationship_records, export_format
+        )
+        return encoded_response(request, result)
+
+    result = await run_in_threadpool(
+        export_graph,
+        node_records,
+        [record["r"] for record in relationship_records],
+        export_format,
+    )
+    if layout is not None:
+        result = await run_in_threadpool(layout_export, result, export_format, layout)
+    if compact:
+        result = await run_in_threadpool(
+            compact_export, result, export_format, include_ids
+        )
+    return encoded_response(request, result)
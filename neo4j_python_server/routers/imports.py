@@ -0,0 +1,154 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from neo4j_python_server import metadata
+from neo4j_python_server.admission import RouteClass, classify
+from neo4j_python_server.imports import (
+    IMPORT_BATCH_SIZE,
+    ImportBatches,
+    clear_abandoned_import_keys,
+    get_job,
+    import_graph,
+    ingest_stream,
+    jobs,
+    parse_csv,
+    parse_ndjson,
+)
+from neo4j_python_server.logger import logger
+from neo4j_python_server.models import Neo4jCredentials, Node, Relationship
+from neo4j_python_server.results import result_cache
+from typing import Optional
+
+router = APIRouter(
+    prefix="/import",
+    tags=["Import"],
+    dependencies=[Depends(classify(RouteClass.IMPORT))],
+    responses={404: {"description": "Not found"}},
+)
+
+
+@router.post("/")
+async def bulk_import(
+    creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
+    nodes: Optional[list[Node]] = None,
+    relationships: Optional[list[Relationship]] = None,
+    elements: Optional[list[dict] | dict] = None,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1),
+):
+    """Create Nodes and Relationships in a Neo4j instance in batches.
+
+    Args:
+        creds (Neo4jCredential): Credentials object for Neo4j instance to write to.
+
+        nodes (list[Node], optional): Nodes to create.
+
+        relationships (list[Relationship], optional): Relationships to create. Source and target nodes are matched by element_id, either of a Node in this request or of an existing Node.
+
+        elements (list[dict] | dict, optional): Nodes and Relationships in any cytoscape, d3 or default export format, eg. the output of /nodes/nodes/ or /relationships/.
+
+        batch_size (int, optional): Number of rows written per transaction.
+
+    Returns:
+        dict: Counters summed from each batch's result summary.
+    """
+    batches = ImportBatches()
+    batches.add_models(nodes or [], relationships or [])
+    if elements is not None:
+        batches.add_exported(elements)
+
+    logger.info(
+        "Importing %s node and %s relationship groups into %s",
+        len(batches.nodes),
+        len(batches.relationships),
+        creds.database,
+    )
+    try:
+        return await import_graph(creds, batches, batch_size)
+    finally:
+        # New labels and types may have been added
+        metadata.invalidate(creds)
+        result_cache.invalidate(creds)
+
+
+def credentials_from_headers(
+    x_neo4j_uri: Optional[str] = Header(None),
+    x_neo4j_username: Optional[str] = Header(None),
+    x_neo4j_password: Optional[str] = Header(None),
+    x_neo4j_database: Optional[str] = Header(None),
+) -> Neo4jCredentials:
+    """Credentials for routes whose body is an upload. Unset headers fall back
+    to the same environment defaults as Neo4jCredentials."""
+    values = {
+        "uri": x_neo4j_uri,
+        "username": x_neo4j_username,
+        "password": x_neo4j_password,
+        "database": x_neo4j_database,
+    }
+    return Neo4jCredentials(**{k: v for k, v in values.items() if v is not None})
+
+
+@router.post("/stream/")
+async def stream_import(
+    request: Request,
+    batch_size: int = Query(IMPORT_BATCH_SIZE, ge=1),
+    job_id: Optional[str] = None,
+    resume: bool = False,
+    start_row: Optional[int] = Query(None, ge=0),
+    creds: Neo4jCredentials = Depends(credentials_from_headers),
+):
+    """Create Nodes and Relationships from a streamed NDJSON or CSV upload.
+
+    The body is parsed as it arrives and written in batches of batch_size rows,
+    so memory use doesn't grow with the upload size. Send `Content-Type:
+    text/csv` for CSV; anything else is read as NDJSON, one Node or
+    Relationship object per line. Credentials are read from X-Neo4j-Uri,
+    X-Neo4j-Username, X-Neo4j-Password and X-Neo4j-Database headers.
+
+    Args:
+        batch_size (int, optional): Number of rows written per transaction.
+
+        job_id (str, optional): Id to track progress under at /import/jobs/{job_id}. Defaults to a random id.
+
+        resume (bool, optional): Continue a failed job_id by re-sending the same upload. Rows the job already committed are skipped, whatever the batch_size. Failed jobs can be resumed for IMPORT_RESUME_SECONDS.
+
+        start_row (int, optional): Number of leading rows to skip, overriding the job's committed row count.
+
+    Returns:
+        dict: Job progress, counters summed from each batch and throughput.
+    """
+    job = get_job(creds, job_id, resume)
+
+    if "text/csv" in request.headers.get("content-type", ""):
+        rows = parse_csv(request.stream())
+    else:
+        rows = parse_ndjson(request.stream())
+
+    try:
+        return await ingest_stream(creds, rows, job, batch_size, start_row)
+    finally:
+        metadata.invalidate(creds)
+        result_cache.invalidate(creds)
+
+
+@router.get("/jobs/{job_id}")
+async def get_import_job(job_id: str):
+    """Return the progress of a streaming import job."""
+    if job_id not in jobs:
+        raise HTTPException(status_code=404, detail=f"No import job {job_id}")
+    return jobs[job_id].progress()
+
+
+@router.post("/cleanup")
+async def cleanup_import_keys(creds: Optional[Neo4jCredentials] = Neo4jCredentials()):
+    """Remove the label and property streaming imports tag their nodes with
+    from nodes no job in this server can still use, eg. after a restart.
+
+    Args:
+        creds (Neo4jCredentials): Credentials object for Neo4j instance to clean up.
+
+    Returns:
+        dict: Number of nodes cleared.
+    """
+    try:
+        return {"cleared": await clear_abandoned_import_keys(creds)}
+    finally:
+        metadata.invalidate(creds)
+        result_cache.invalidate(creds)
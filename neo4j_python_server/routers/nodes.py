@@ -1,14 +1,53 @@
-from neo4j_python_server.database import query_db, can_connect
-from neo4j_python_server.logger import logger
+from neo4j_python_server import coalesce
+from neo4j_python_server.admission import RouteClass, classify
+from neo4j_python_server.columnar import (
+    COLUMNAR_FORMATS,
+    ColumnarFormat,
+    columnar_export,
+)
+from neo4j_python_server.compact import compact_export
+from neo4j_python_server.database import (
+    async_execute_read,
+    async_open_stream,
+    async_query_db,
+    async_stream_db,
+)
+from neo4j_python_server.logger import Summary, logger
+from neo4j_python_server.metrics import label_format
+from neo4j_python_server.metadata import get_labels
 from neo4j_python_server.models import Neo4jCredentials, Node
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from neo4j_python_server.encoding import encoded_response
 from neo4j_python_server.export import (
     ExportFormat,
     export_schema,
     export_nodes,
     export_relationships,
 )
+from neo4j_python_server.parallel import check_parallel_options, parallel_node_records
+from neo4j_python_server.pagination import CursorTracker, paginate, split_page
+from neo4j_python_server.profiling import (
+    check_profile_options,
+    profile_query,
+    query_profile,
+)
+from neo4j_python_server.projection import (
+    project_query,
+    projected_records,
+    projected_stream,
+)
+from neo4j_python_server.queries import nodes_query, validate_labels
+from neo4j_python_server.results import result_cache
+from neo4j_python_server.sampling import (
+    SAMPLE_SIZE,
+    SampleMethod,
+    check_sample_options,
+    read_sample,
+)
+from neo4j_python_server.sync import check_sync_options, read_sync
+from neo4j_python_server.streaming import ndjson_response, stream_nodes, wants_ndjson
 
 router = APIRouter(
     prefix="/nodes",
@@ -18,8 +57,10 @@ router = APIRouter(
 )
 
 
-@router.post("/labels/", tags=["Nodes"])
-def get_node_labels(
+@router.post(
+    "/labels/", tags=["Nodes"], dependencies=[Depends(classify(RouteClass.METADATA))]
+)
+async def get_node_labels(
     creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
 ) -> list[str]:
     """Return a list of Node labels from a specified Neo4j instance.
@@ -30,55 +71,203 @@ def get_node_labels(
     Returns:
         list[str]: List of Node labels
     """
-    result = []
-    query = """
-        call db.labels();
-    """
     try:
-        response, _, _ = query_db(creds, query)
+        result = await get_labels(creds)
     except Exception as e:
         msg = f"Error getting node labels: {e}"
         logger.error(msg)
         return msg, 400
 
-    logger.debug(f"get node labels response: {response}")
-
-    result = [r.data()["label"] for r in response]
-
-    logger.info(f"Node labels found: {result}")
+    logger.info("Node labels found: %s", Summary(result))
     return result
 
 
-@router.post("/nodes/", tags=["Nodes"])
-def get_nodes(
+@router.post(
+    "/nodes/", tags=["Nodes"], dependencies=[Depends(classify(RouteClass.EXPORT))]
+)
+async def get_nodes(
+    request: Request,
     creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
     labels: Optional[list[str]] = [],
-    export_format: Optional[ExportFormat] = ExportFormat.DEFAULT,
+    export_format: Optional[ExportFormat | ColumnarFormat] = ExportFormat.DEFAULT,
+    stream: bool = False,
+    page_size: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    compact: bool = False,
+    include_ids: bool = False,
+    properties: Optional[dict[str, list[str]]] = None,
+    sample: Optional[SampleMethod] = None,
+    sample_size: int = Query(SAMPLE_SIZE, ge=1),
+    seed: Optional[str] = None,
+    sync: bool = False,
+    sync_token: Optional[str] = None,
+    parallel: bool = False,
+    profile: bool = False,
 ):
+    """Return Nodes from a Neo4j instance.
+
+    When page_size is set the response is `{"results": ..., "next_cursor": ...}`,
+    and passing next_cursor back as cursor returns the following page. Streamed
+    pages end with a `{"next_cursor": ...}` line.
+
+    The "arrow" and "parquet" export formats return one row per Node, as an
+    Arrow IPC stream or Parquet file, with the next cursor in an X-Next-Cursor
+    header.
+
+    compact=true replaces element ids and labels in cytoscape and d3 output
+    with integers, see compact_export. include_ids=true adds the integer to
+    element id mapping. Not applied to streamed responses.
+
+    properties maps labels to the property keys to return for Nodes with that
+    label, eg. `{"Person": ["name"], "*": []}` returns only the name of Person
+    Nodes and no properties for any other Node. The projection runs in the
+    query, so other properties never leave the database.
+
+    sample returns at most sample_size Nodes picked at random ("random"), by
+    highest degree ("degree") or by expanding breadth-first from the seed
+    element id or the highest degree Node ("neighbourhood"). The response is
+    `{"results": ..., "sample": {"method", "nodes", "total_nodes"}}`.
+    Sampling can't be combined with pagination or streamed output.
+
+    sync=true returns `{"results": ..., "deleted": [...], "sync_token": ...,
+    "full": bool}`. Passing sync_token back returns only the Nodes created or
+    updated since, and the element ids of those deleted, see read_sync. Without
+    a usable token every Node is returned and full is true.
+
+    parallel=true reads each label with its own query, NODES_PARALLELISM at a
+    time, instead of one query over every label, see parallel_node_records.
+    Requires a labels filter. Ignored for streamed and columnar output.
 
+    profile=true runs the query under PROFILE, bypassing the result cache,
+    and returns `{"results": ..., "profile": [...]}` with its plan, see
+    query_profile. Runs a single query even with parallel=true, and can't be
+    combined with sample, sync or streamed output.
+    """
+
+    label_format(export_format)
+    conditions = []
+    params = {}
     if labels is not None and len(labels) > 0:
-        query = """
-    MATCH (n)
-    WHERE any(label IN labels(n) WHERE label IN $labels)
-    RETURN n
-        """
-        params = {"labels": labels}
+        labels = await validate_labels(creds, labels)
     else:
-        query = """
-        MATCH (n)
-        RETURN n
-    """
-        params = {}
+        labels = None
 
-    records, summary, key = query_db(creds, query, params)
+    if parallel:
+        check_parallel_options(labels)
 
-    result = export_nodes(records, export_format)
+    if profile:
+        check_profile_options(
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+            sample is not None,
+            sync or sync_token is not None,
+        )
 
-    logger.debug(f"{len(result)} results found")
-    if len(result) > 0:
-        logger.debug(f"First result: {result[0]}")
+    if sync or sync_token is not None:
+        check_sync_options(
+            page_size,
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+            sample is not None,
+        )
+        delta = await read_sync(creds, "n", labels, None, sync_token)
+        result = await run_in_threadpool(
+            export_nodes, delta.pop("records"), export_format
+        )
+        if compact:
+            result = await run_in_threadpool(
+                compact_export, result, export_format, include_ids
+            )
+        return encoded_response(request, {"results": result, **delta})
 
-    return result
+    if sample is not None:
+        check_sample_options(
+            page_size,
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+        )
+        records, _, info = await async_execute_read(
+            creds,
+            read_sample,
+            sample,
+            labels,
+            None,
+            sample_size,
+            seed=seed,
+            properties=properties,
+        )
+        result = await run_in_threadpool(export_nodes, records, export_format)
+        if compact:
+            result = await run_in_threadpool(
+                compact_export, result, export_format, include_ids
+            )
+        return encoded_response(request, {"results": result, "sample": info})
+
+    page_clause = paginate("n", conditions, params, page_size, cursor)
+    query = nodes_query(labels, conditions, page_clause)
+    if properties is not None:
+        query = project_query(query, ["n"], properties, "n" if page_size else None)
+
+    if export_format in COLUMNAR_FORMATS:
+        records = projected_stream(async_stream_db(creds, query, params), properties)
+        return await columnar_export(records, "n", export_format, page_size)
+
+    if wants_ndjson(request, stream):
+        records = projected_stream(
+            await async_open_stream(creds, query, params), properties
+        )
+        if page_size is None:
+            return ndjson_response(stream_nodes(records, export_format))
+        tracker = CursorTracker("n", page_size)
+        elements = stream_nodes(tracker.track(records), export_format)
+        return ndjson_response(tracker.with_next_cursor(elements))
+
+    async def read(query):
+        summary = None
+        if parallel and not profile:
+            records = await parallel_node_records(
+                creds, labels, conditions, params, page_clause, properties
+            )
+        else:
+            records, summary, key = await async_query_db(creds, query, params)
+            records = projected_records(records, properties)
+
+        next_cursor = None
+        if page_size is not None:
+            records, next_cursor = split_page(records, "n", page_size)
+
+        result = await run_in_threadpool(export_nodes, records, export_format)
+
+        logger.debug("Results found: %s", Summary(result))
+
+        if compact:
+            result = await run_in_threadpool(
+                compact_export, result, export_format, include_ids
+            )
+        return result, next_cursor, summary
+
+    if profile:
+        result, next_cursor, summary = await read(profile_query(query))
+        result = {"results": result, "profile": [query_profile(summary)]}
+        if page_size is not None:
+            result["next_cursor"] = next_cursor
+        return encoded_response(request, result)
+
+    # Concurrent identical requests share one query and export
+    key = coalesce.request_key(
+        creds, query, params, "nodes", export_format, compact, include_ids
+    )
+    cache_key = result_cache.key(creds, request, key)
+    generation = result_cache.generation(creds)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Keyed by generation too, so reads started before an import aren't joined
+    result, next_cursor, _ = await coalesce.exports.do((key, generation), read, query)
+
+    if page_size is not None:
+        result = {"results": result, "next_cursor": next_cursor}
+    response = encoded_response(request, result)
+    result_cache.put(creds, cache_key, response, generation)
+    return response
 
 
 # @router.post("/new", tags=["Nodes"])
@@ -1,13 +1,64 @@
-from fastapi import APIRouter, Request, Response, Body
-from neo4j_python_server.database import query_db, can_connect
+from fastapi import APIRouter, Request, Response, Body, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from neo4j_python_server import coalesce
+from neo4j_python_server.admission import RouteClass, classify
+from neo4j_python_server.columnar import (
+    COLUMNAR_FORMATS,
+    ColumnarFormat,
+    columnar_export,
+)
+from neo4j_python_server.compact import compact_export
+from neo4j_python_server.database import (
+    async_execute_read,
+    async_open_stream,
+    async_query_db,
+    async_stream_db,
+)
+from neo4j_python_server.encoding import encoded_response
 from neo4j_python_server.export import (
     ExportFormat,
     export_schema,
     export_nodes,
     export_relationships,
 )
-from neo4j_python_server.logger import logger
+from neo4j_python_server.layout import (
+    LayoutMethod,
+    check_layout_options,
+    layout_export,
+)
+from neo4j_python_server.logger import Summary, logger
+from neo4j_python_server.metrics import label_format
+from neo4j_python_server.metadata import get_relationship_types
 from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.pagination import CursorTracker, paginate, split_page
+from neo4j_python_server.profiling import (
+    check_profile_options,
+    profile_query,
+    query_profile,
+)
+from neo4j_python_server.projection import (
+    project_query,
+    projected_records,
+    projected_stream,
+)
+from neo4j_python_server.queries import (
+    relationships_query,
+    validate_labels,
+    validate_relationship_types,
+)
+from neo4j_python_server.results import result_cache
+from neo4j_python_server.sampling import (
+    SAMPLE_SIZE,
+    SampleMethod,
+    check_sample_options,
+    read_sample,
+)
+from neo4j_python_server.sync import check_sync_options, read_sync
+from neo4j_python_server.streaming import (
+    ndjson_response,
+    stream_relationships,
+    wants_ndjson,
+)
 from typing import Optional
 
 router = APIRouter(
@@ -18,8 +69,8 @@ router = APIRouter(
 )
 
 
-@router.post("/types/")
-def get_relationship_types(
+@router.post("/types/", dependencies=[Depends(classify(RouteClass.METADATA))])
+async def get_relationship_types(
     creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
 ) -> list[str]:
     """Return a list of Relationship types from a Neo4j instance.
@@ -30,26 +81,32 @@ def get_relationship_types(
     Returns:
         list[str]: List of Relationship types
     """
-    result = []
-    query = """
-        call db.relationshipTypes();
-    """
-    response, _, _ = query_db(creds, query)
-
-    logger.debug(f"get relationships types response: {response}")
+    result = await get_relationship_types(creds)
 
-    result = [r.data()["relationshipType"] for r in response]
-
-    logger.info("Relationships found: " + str(result))
+    logger.info("Relationships found: %s", Summary(result))
     return result
 
 
-@router.post("/")
-def get_relationships(
+@router.post("/", dependencies=[Depends(classify(RouteClass.EXPORT))])
+async def get_relationships(
+    request: Request,
     creds: Optional[Neo4jCredentials] = Neo4jCredentials(),
     nodes: Optional[list[str]] = None,
     relationships: Optional[list[str]] = None,
     export_format: Optional[str] = Body(...),
+    stream: bool = False,
+    page_size: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    compact: bool = False,
+    include_ids: bool = False,
+    properties: Optional[dict[str, list[str]]] = None,
+    sample: Optional[SampleMethod] = None,
+    sample_size: int = Query(SAMPLE_SIZE, ge=1),
+    seed: Optional[str] = None,
+    layout: Optional[LayoutMethod] = None,
+    sync: bool = False,
+    sync_token: Optional[str] = None,
+    profile: bool = False,
 ):
     """Return a list of Relationships from a Neo4j instance.
 
@@ -60,53 +117,200 @@ def get_relationships(
 
         relationships (list[str], optional): List of Relationship types to filter by. Defaults to [].
 
-        export_format (str, optional): Format to export data in. Options are "cytoscape" , "d3", and "default". Defaults to "default".
+        export_format (str, optional): Format to export data in. Options are "cytoscape" , "d3", "default", and the columnar "arrow" and "parquet", which return one row per Relationship as an Arrow IPC stream or Parquet file. Defaults to "default".
+
+        stream (bool, optional): Stream records as NDJSON as they are read. Also enabled by an `Accept: application/x-ndjson` header. Defaults to False.
+
+        page_size (int, optional): Return at most this many Relationships, ordered by element id. Defaults to None (no pagination).
+
+        cursor (str, optional): next_cursor value from the previous page. Defaults to None.
+
+        compact (bool, optional): Replace element ids and labels in cytoscape and d3 output with integers and a `labels` lookup table. Not applied to streamed responses. Defaults to False.
+
+        include_ids (bool, optional): With compact, also return an `ids` list mapping each integer id back to its element id. Defaults to False.
+
+        properties (dict[str, list[str]], optional): Property keys to return per Node label or Relationship type, with "*" for any other label or type, eg. `{"KNOWS": ["since"], "*": []}`. Applied in the query, so other properties never leave the database. Defaults to None, returning all properties.
+
+        sample (str, optional): Return a sampled subgraph instead of every Relationship. Nodes are picked with "random", "degree" (highest degree first) or "neighbourhood" (breadth-first from seed), and only Relationships between picked Nodes are returned. Can't be combined with page_size or streamed output. Defaults to None.
+
+        sample_size (int, optional): Maximum number of Nodes plus Relationships in a sample. Defaults to SAMPLE_SIZE (1000).
+
+        seed (str, optional): Element id of the Node a "neighbourhood" sample starts from. Defaults to the highest degree Node.
+
+        layout (str, optional): Compute node positions server-side and add `x` / `y` to each d3 node, with "force" (spectral start refined by a force-directed simulation, for graphs up to LAYOUT_MAX_NODES nodes, spectral beyond) or "spectral". Layouts are cached per graph. Only supported for unstreamed d3 output, use /graph/ for cytoscape. Defaults to None.
+
+        sync (bool, optional): Return `{"results": [...], "deleted": [...], "sync_token": str, "full": bool}`. Can't be combined with page_size, sample or streamed output. Defaults to False.
+
+        sync_token (str, optional): sync_token from the previous sync response. Only Relationships created or updated since are returned, along with the element ids of those deleted. Falls back to every Relationship, with full set to true, when the token can't be used. Defaults to None.
+
+        profile (bool, optional): Run the query under PROFILE and return `{"results": [...], "profile": [...]}` with the query's plan, rows and db hits per operator, and the server's result_available_after / result_consumed_after times in milliseconds. Bypasses the result cache. Can't be combined with sample, sync or streamed output. Defaults to False.
 
     Returns:
-        list[Relationship]: List of Relationships formatted for Cytoscape
+        list[Relationship]: List of Relationships formatted for Cytoscape. When paginated, `{"results": [...], "next_cursor": str | None}`. When sampled, `{"results": [...], "sample": {"method", "nodes", "relationships", "total_nodes", "total_relationships"}}`.
     """
 
     # Dynamically construct Cypher query dependent on optional Node Labels and Relationship Types.
 
-    logger.info(f"Nodes recieved: {nodes}")
-    logger.info(f"Format recieved: {export_format}")
+    logger.info("Nodes recieved: %s", nodes)
+    logger.info("Format recieved: %s", export_format)
 
     # String enums can't be passed to the Body decorator, so we'll convert them to strings here.
     if export_format is None:
         export_format = ExportFormat.DEFAULT
+    label_format(export_format)
 
-    query = f"""
-    MATCH (n)-[r]->(n2)
-    """
+    if layout is not None:
+        check_layout_options(
+            export_format,
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+        )
+
+    conditions = []
     params = {}
 
-    # Add label filtering
+    # Only labels and types that exist in the database are inlined into the query
+    labels = None
     if nodes is not None and len(nodes) > 0:
-        query += "\nWHERE any(label IN labels(n) WHERE label IN $labels) \nAND any(label IN labels(n2) WHERE label IN $labels)"
-        params = {"labels": nodes}
-        if relationships is not None and len(relationships) > 0:
-            query += "\nAND type(r) in $relationships"
-            params["relationships"] = relationships
+        labels = await validate_labels(creds, nodes)
 
-    elif relationships is not None and len(relationships) > 0:
-        query += "\nWHERE type(r) in $relationships"
-        params["relationships"] = relationships
+    types = None
+    if relationships is not None and len(relationships) > 0:
+        types = await validate_relationship_types(creds, relationships)
 
-    query += "\nRETURN n, r, n2"
+    if profile:
+        check_profile_options(
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+            sample is not None,
+            sync or sync_token is not None,
+        )
 
-    # Query target db for data
-    records, summary, keys = query_db(creds, query, params)
+    if sync or sync_token is not None:
+        check_sync_options(
+            page_size,
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+            sample is not None,
+        )
+        delta = await read_sync(creds, "r", labels, types, sync_token)
+        result = await run_in_threadpool(
+            export_relationships, delta.pop("records"), export_format
+        )
+        if layout is not None:
+            result = await run_in_threadpool(
+                layout_export, result, export_format, layout
+            )
+        if compact:
+            result = await run_in_threadpool(
+                compact_export, result, export_format, include_ids
+            )
+        return encoded_response(request, {"results": result, **delta})
 
-    result = export_relationships(records, export_format)
+    if sample is not None:
+        check_sample_options(
+            page_size,
+            export_format in COLUMNAR_FORMATS or wants_ndjson(request, stream),
+        )
+        _, records, info = await async_execute_read(
+            creds,
+            read_sample,
+            sample,
+            labels,
+            types,
+            sample_size,
+            nodes=False,
+            relationships="n, r, n2",
+            seed=seed,
+            properties=properties,
+        )
+        result = await run_in_threadpool(export_relationships, records, export_format)
+        if layout is not None:
+            result = await run_in_threadpool(
+                layout_export, result, export_format, layout
+            )
+        if compact:
+            result = await run_in_threadpool(
+                compact_export, result, export_format, include_ids
+            )
+        return encoded_response(request, {"results": result, "sample": info})
 
-    logger.debug(f"result: {result}")
+    page_clause = paginate("r", conditions, params, page_size, cursor)
+    query = relationships_query(labels, types, conditions, params, page_clause)
+    if properties is not None:
+        query = project_query(
+            query, ["n", "r", "n2"], properties, "r" if page_size else None
+        )
 
-    # Debug return results
-    # logger.debug(f"{len(result)} results found")
-    # if len(result) > 0:
-    #     logger.debug(f"First result: {result[0]}")
+    if export_format in COLUMNAR_FORMATS:
+        records = projected_stream(async_stream_db(creds, query, params), properties)
+        return await columnar_export(
+            records, "r", ColumnarFormat(export_format), page_size
+        )
 
-    return result
+    if wants_ndjson(request, stream):
+        records = projected_stream(
+            await async_open_stream(creds, query, params), properties
+        )
+        if page_size is None:
+            return ndjson_response(stream_relationships(records, export_format))
+        tracker = CursorTracker("r", page_size)
+        elements = stream_relationships(tracker.track(records), export_format)
+        return ndjson_response(tracker.with_next_cursor(elements))
+
+    async def read(query):
+        # Query target db for data
+        records, summary, keys = await async_query_db(creds, query, params)
+        records = projected_records(records, properties)
+
+        next_cursor = None
+        if page_size is not None:
+            records, next_cursor = split_page(records, "r", page_size)
+
+        result = await run_in_threadpool(export_relationships, records, export_format)
+
+        logger.debug("result: %s", Summary(result))
+
+        if layout is not None:
+            result = await run_in_threadpool(
+                layout_export, result, export_format, layout
+            )
+
+        if compact:
+            result = await run_in_threadpool(
+                compact_export, result, export_format, include_ids
+            )
+        return result, next_cursor, summary
+
+    if profile:
+        result, next_cursor, summary = await read(profile_query(query))
+        result = {"results": result, "profile": [query_profile(summary)]}
+        if page_size is not None:
+            result["next_cursor"] = next_cursor
+        return encoded_response(request, result)
+
+    # Concurrent identical requests share one query and export
+    key = coalesce.request_key(
+        creds,
+        query,
+        params,
+        "relationships",
+        export_format,
+        layout,
+        compact,
+        include_ids,
+    )
+    cache_key = result_cache.key(creds, request, key)
+    generation = result_cache.generation(creds)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    # Keyed by generation too, so reads started before an import aren't joined
+    result, next_cursor, _ = await coalesce.exports.do((key, generation), read, query)
+
+    if page_size is not None:
+        result = {"results": result, "next_cursor": next_cursor}
+    response = encoded_response(request, result)
+    result_cache.put(creds, cache_key, response, generation)
+    return response
 
 
 # @router.post("/new/")
@@ -0,0 +1,221 @@
+from enum import Enum
+from fastapi import HTTPException
+from neo4j_python_server.logger import logger
+from neo4j_python_server.projection import project_query, unpack_record
+from neo4j_python_server.queries import nodes_query, quote_identifier
+import os
+
+# Default element budget for sampled responses
+SAMPLE_SIZE = int(os.environ.get("SAMPLE_SIZE", 1000))
+# Maximum number of hops a neighbourhood sample expands from its seed
+SAMPLE_MAX_HOPS = int(os.environ.get("SAMPLE_MAX_HOPS", 10))
+
+
+class SampleMethod(str, Enum):
+    RANDOM = "random"
+    DEGREE = "degree"
+    NEIGHBOURHOOD = "neighbourhood"
+
+
+DEGREE = "COUNT { (n)--() }"
+
+
+def check_sample_options(page_size: int | None, streamed: bool):
+    """Samples are returned in one response, so can't be paginated or streamed."""
+    if page_size is not None:
+        raise HTTPException(
+            status_code=400, detail="sample can't be combined with page_size"
+        )
+    if streamed:
+        raise HTTPException(
+            status_code=400,
+            detail="sample can't be combined with streamed or columnar output",
+        )
+
+
+def _relationship_pattern(types: list[str] | None, direction: str = "->") -> str:
+    rel = "[r]"
+    if types is not None:
+        rel = "[r:" + "|".join(quote_identifier(t) for t in types) + "]"
+    return "-" + rel + direction
+
+
+def _sum_counts(branches: list[str]) -> str:
+    return (
+        "CALL {\n"
+        + "\nUNION ALL\n".join(branches)
+        + "\n}\nRETURN sum(matched) AS total"
+    )
+
+
+def total_nodes_query(labels: list[str] | None) -> str:
+    """Count Nodes from the count store, with one `MATCH (n:Label)` count
+    per label rather than a scan. Nodes with several of the labels are
+    counted once per label."""
+    if labels is None:
+        return "MATCH (n)\nRETURN count(n) AS total"
+    return _sum_counts(
+        [
+            f"MATCH (n:{quote_identifier(label)})\nRETURN count(n) AS matched"
+            for label in labels
+        ]
+    )
+
+
+def total_relationships_query(types: list[str] | None) -> str:
+    """Count Relationships from the count store, with one count per type.
+    Label filters aren't applied, as the count store can't match labels on
+    both endpoints, so this is an upper bound when labels are given."""
+    if types is None:
+        return "MATCH ()-[r]->()\nRETURN count(r) AS total"
+    return _sum_counts(
+        [
+            f"MATCH ()-[r:{quote_identifier(t)}]->()\nRETURN count(r) AS matched"
+            for t in types
+        ]
+    )
+
+
+def _candidates_query(labels: list[str] | None, order: str) -> str:
+    return (
+        "CALL {\n"
+        + nodes_query(labels, [])
+        + f"\n}}\nWITH n\nORDER BY {order}\nLIMIT $limit\nRETURN elementId(n) AS id"
+    )
+
+
+def _hop_query(labels: list[str] | None, types: list[str] | None) -> str:
+    conditions = [
+        "elementId(n) IN $frontier",
+        "NOT elementId(m) IN $seen",
+    ]
+    if labels is not None:
+        conditions.append("any(label IN labels(m) WHERE label IN $labels)")
+    return (
+        f"MATCH (n){_relationship_pattern(types, '-')}(m)\nWHERE "
+        + "\nAND ".join(conditions)
+        + "\nRETURN DISTINCT elementId(m) AS id\nLIMIT $limit"
+    )
+
+
+async def _column(tx, query: str, params: dict) -> list:
+    result = await tx.run(query, params)
+    return [record[0] async for record in result]
+
+
+async def _neighbourhood(tx, labels, types, size: int, seed: str | None) -> list:
+    """Breadth-first expansion from seed, or the highest degree candidate,
+    until size nodes are found, the component is exhausted or SAMPLE_MAX_HOPS
+    hops have been made."""
+    if seed is None:
+        seeds = await _column(
+            tx, _candidates_query(labels, DEGREE + " DESC"), {"limit": 1}
+        )
+        if not seeds:
+            return []
+        seed = seeds[0]
+
+    seen = [seed]
+    frontier = [seed]
+    query = _hop_query(labels, types)
+    for _ in range(SAMPLE_MAX_HOPS):
+        if not frontier or len(seen) >= size:
+            break
+        params = {"frontier": frontier, "seen": seen, "limit": size - len(seen)}
+        if labels is not None:
+            params["labels"] = labels
+        frontier = await _column(tx, query, params)
+        seen.extend(frontier)
+    return seen
+
+
+async def sample_node_ids(
+    tx,
+    method: SampleMethod,
+    labels: list[str] | None,
+    types: list[str] | None,
+    size: int,
+    seed: str | None = None,
+) -> list[str]:
+    """Pick the element ids of at most size Nodes matching labels."""
+    if labels is not None and not labels:
+        return []
+    if method == SampleMethod.NEIGHBOURHOOD:
+        return await _neighbourhood(tx, labels, types, size, seed)
+    order = "rand()" if method == SampleMethod.RANDOM else DEGREE + " DESC"
+    return await _column(tx, _candidates_query(labels, order), {"limit": size})
+
+
+async def read_sample(
+    tx,
+    method: SampleMethod,
+    labels: list[str] | None,
+    types: list[str] | None,
+    budget: int,
+    nodes: bool = True,
+    relationships: str | None = None,
+    seed: str | None = None,
+    properties: dict | None = None,
+):
+    """Read a sampled subgraph within one transaction.
+
+    Nodes are sampled first, then only Relationships with both endpoints in the
+    sample are read, so no edge is left dangling. When Relationships are
+    requested half the budget goes to Nodes and the rest to Relationships.
+
+    Args:
+        tx: Managed read transaction.
+        method: How Nodes are picked.
+        labels: Validated node labels, see nodes_query.
+        types: Validated relationship types, see relationships_query.
+        budget: Maximum number of Nodes plus Relationships.
+        nodes: Return the sampled Nodes.
+        relationships: Variables to return per Relationship, eg. "n, r, n2",
+            or None to skip Relationships.
+        seed: Element id of the Node a neighbourhood sample starts from.
+        properties: Projection spec, see project_query.
+
+    Returns:
+        (node records, relationship records, sample info) where sample info
+        holds the sampled counts and the totals they were sampled from.
+    """
+    node_budget = budget if relationships is None else max(1, budget // 2)
+    ids = await sample_node_ids(tx, method, labels, types, node_budget, seed)
+    info = {"method": method.value, "nodes": len(ids)}
+    unpack = unpack_record if properties is not None else lambda record: record
+
+    node_records = []
+    if nodes:
+        query = "MATCH (n)\nWHERE elementId(n) IN $ids\nRETURN n"
+        if properties is not None:
+            query = project_query(query, ["n"], properties)
+        result = await tx.run(query, {"ids": ids})
+        node_records = [unpack(record) async for record in result]
+
+    info["total_nodes"] = 0
+    if labels is None or labels:
+        info["total_nodes"] = (await _column(tx, total_nodes_query(labels), {}))[0]
+
+    relationship_records = []
+    if relationships is not None:
+        info["relationships"] = 0
+        info["total_relationships"] = 0
+    if relationships is not None and (types is None or types):
+        query = (
+            f"MATCH (n){_relationship_pattern(types)}(n2)\n"
+            "WHERE elementId(n) IN $ids AND elementId(n2) IN $ids\n"
+            f"RETURN {relationships}\nLIMIT $limit"
+        )
+        if properties is not None:
+            query = project_query(
+                query, [v.strip() for v in relationships.split(",")], properties
+            )
+        result = await tx.run(query, {"ids": ids, "limit": budget - len(ids)})
+        relationship_records = [unpack(record) async for record in result]
+
+        info["relationships"] = len(relationship_records)
+        total_query = total_relationships_query(types)
+        info["total_relationships"] = (await _column(tx, total_query, {}))[0]
+
+    logger.debug("Sampled graph: %s", info)
+    return node_records, relationship_records, info
@@ -0,0 +1,108 @@
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from neo4j_python_server.encoding import encode_json
+from neo4j_python_server.export import (
+    ExportFormat,
+    labelled_node,
+    log_skipped_nodes,
+    node_default,
+    export_relationships_default,
+    export_cytoscape_relationships,
+    export_d3_relationships,
+)
+from neo4j_python_server.logger import logger
+from neo4j_python_server.metrics import add_stage
+import logging
+import time
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request, stream: bool = False) -> bool:
+    """True if the client asked for a streamed response, either with a
+    `stream=true` query param or an `application/x-ndjson` Accept header."""
+    return stream or NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def stream_nodes(records, format: ExportFormat):
+    """Convert node records one at a time with the export_nodes_* converters.
+    Yields one element per line; d3 elements are yielded as bare node
+    objects, same as the entries of the non-streamed `nodes` list.
+
+    Records are numbered across the stream, so per-record debug logs are
+    sampled as for a non-streamed export, and unlabelled Nodes skipped by
+    cytoscape and d3 are logged as one count at the end.
+
+    Conversion time is added to the request's export stage once the stream
+    ends."""
+    debug = logger.isEnabledFor(logging.DEBUG)
+    labelled = format in (ExportFormat.CYTOSCAPE, ExportFormat.D3)
+    skipped = 0
+    i = 0
+    elapsed = 0.0
+    try:
+        async for record in records:
+            start = time.perf_counter()
+            if labelled:
+                element = labelled_node(
+                    record, i, format == ExportFormat.CYTOSCAPE, debug
+                )
+            else:
+                element = node_default(record[0])
+            elapsed += time.perf_counter() - start
+            i += 1
+            if element is None:
+                skipped += 1
+            else:
+                yield element
+    finally:
+        log_skipped_nodes(skipped)
+        add_stage("export", elapsed, format)
+
+
+async def stream_relationships(records, format: ExportFormat):
+    """Convert relationship records one at a time using the existing
+    export_*_relationships logic.
+
+    d3 output can't be split into one `nodes` and one `links` list without
+    buffering, so each line is a fragment, either `{"nodes": [node]}` or
+    `{"links": [link]}`, for the client to merge. Nodes are only sent the
+    first time they're seen.
+
+    Conversion time is added to the request's export stage once the stream
+    ends.
+    """
+    seen_node_ids = set()
+    elapsed = 0.0
+    try:
+        async for record in records:
+            start = time.perf_counter()
+            if format == ExportFormat.CYTOSCAPE:
+                elements = export_cytoscape_relationships([record]) or []
+            elif format == ExportFormat.D3:
+                converted = export_d3_relationships([record])
+                elements = []
+                for node in converted["nodes"]:
+                    if node["id"] not in seen_node_ids:
+                        seen_node_ids.add(node["id"])
+                        elements.append({"nodes": [node]})
+                elements.extend({"links": [link]} for link in converted["links"])
+            else:
+                elements = export_relationships_default([record]) or []
+            elapsed += time.perf_counter() - start
+            for element in elements:
+                yield element
+    finally:
+        add_stage("export", elapsed, format)
+
+
+async def _ndjson_lines(elements):
+    count = 0
+    async for element in elements:
+        count += 1
+        yield encode_json(element) + b"\n"
+    logger.debug("Streamed %s elements", count)
+
+
+def ndjson_response(elements) -> StreamingResponse:
+    return StreamingResponse(_ndjson_lines(elements), media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,261 @@
+from enum import Enum
+from fastapi import HTTPException
+from neo4j import exceptions
+from neo4j_python_server.database import async_execute_read
+from neo4j_python_server.logger import logger
+from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.queries import nodes_query, relationships_query
+import base64
+import binascii
+import hashlib
+import json
+import os
+
+
+class SyncMode(str, Enum):
+    # Elements whose SYNC_TIMESTAMP_PROPERTY is at least the largest value
+    # already sent. Deletions can't be seen, so any change to the set of
+    # element ids that isn't explained by the delta triggers a full resync.
+    TIMESTAMP = "timestamp"
+    # Neo4j change data capture (db.cdc.*), which also reports deletions
+    CDC = "cdc"
+
+
+SYNC_MODE = SyncMode(os.environ.get("SYNC_MODE", SyncMode.TIMESTAMP.value))
+# Numeric property, eg. set to timestamp() on every write, used by timestamp mode
+SYNC_TIMESTAMP_PROPERTY = os.environ.get("SYNC_TIMESTAMP_PROPERTY", "updated_at")
+
+
+def sync_scope(
+    creds: Neo4jCredentials,
+    variable: str,
+    labels: list[str] | None,
+    types: list[str] | None = None,
+) -> str:
+    """Fingerprint of the database and filters a token was issued for, so a
+    token reused with different ones falls back to a full resync."""
+    scope = [creds.uri, creds.database, variable, labels, types, SYNC_MODE.value]
+    return hashlib.blake2b(json.dumps(scope).encode(), digest_size=8).hexdigest()
+
+
+def check_sync_options(page_size: int | None, streamed: bool, sampled: bool):
+    if page_size is not None or streamed or sampled:
+        raise HTTPException(
+            status_code=400,
+            detail="sync can't be combined with page_size, sample, streamed or "
+            "columnar output",
+        )
+
+
+def encode_sync_token(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state).encode()).decode()
+
+
+def decode_sync_token(token: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        logger.error("Invalid sync token '%s': %s", token, e)
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    if not isinstance(state, dict):
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return state
+
+
+def _read_query(variable: str, labels, types, conditions: list[str], params: dict):
+    if variable == "n":
+        return nodes_query(labels, conditions)
+    return relationships_query(labels, types, conditions, params)
+
+
+async def _records(tx, query: str, params: dict) -> list:
+    result = await tx.run(query, params)
+    return [record async for record in result]
+
+
+def _id_hash(element_id: str) -> int:
+    digest = hashlib.blake2b(element_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big")
+
+
+def ids_checksum(element_ids) -> int:
+    """Order independent checksum of a set of element ids, the sum of their
+    64 bit hashes, so the checksum of a set plus some ids can be computed
+    without the set."""
+    return sum(_id_hash(id) for id in element_ids) % 2**64
+
+
+async def _ids(tx, variable: str, labels, types) -> list[str]:
+    params = {}
+    query = _read_query(variable, labels, types, [], params)
+    result = await tx.run(
+        "CALL {\n" + query + f"\n}}\nRETURN elementId({variable}) AS id", params
+    )
+    return [record["id"] async for record in result]
+
+
+def _latest(records: list, variable: str, since):
+    values = [since] if since is not None else []
+    for record in records:
+        value = record[variable].get(SYNC_TIMESTAMP_PROPERTY)
+        if isinstance(value, (int, float)):
+            values.append(value)
+    return max(values, default=None)
+
+
+async def _full(tx, variable: str, labels, types) -> tuple[list, dict]:
+    state = {}
+    if SYNC_MODE == SyncMode.CDC:
+        # Taken before the read, so changes made during it are replayed
+        result = await tx.run("CALL db.cdc.current() YIELD id\nRETURN id")
+        state["change_id"] = (await result.single())["id"]
+
+    params = {}
+    records = await _records(
+        tx, _read_query(variable, labels, types, [], params), params
+    )
+    if SYNC_MODE == SyncMode.TIMESTAMP:
+        ids = [record[variable].element_id for record in records]
+        state["since"] = _latest(records, variable, None)
+        state["count"] = len(ids)
+        state["checksum"] = ids_checksum(ids)
+    return records, state
+
+
+async def _timestamp_delta(tx, variable: str, labels, types, state: dict):
+    """Elements changed since state, or None if deletions can't be ruled out.
+
+    Deletions are ruled out when the current element ids match the previous
+    ones (only updates) or the previous ones plus the delta elements (only
+    creations), by count and checksum. Polls that saw both creations and
+    updates, or any deletion, fall back to a full resync.
+    """
+    ids = await _ids(tx, variable, labels, types)
+    count, checksum = len(ids), ids_checksum(ids)
+
+    params = {"sync_property": SYNC_TIMESTAMP_PROPERTY}
+    if state["since"] is None:
+        condition = f"{variable}[$sync_property] IS NOT NULL"
+    else:
+        condition = f"{variable}[$sync_property] >= $since"
+        params["since"] = state["since"]
+    query = _read_query(variable, labels, types, [condition], params)
+    records = await _records(tx, query, params)
+
+    def matches(added: list[str]) -> bool:
+        return (
+            count == state["count"] + len(added)
+            and checksum == (state["checksum"] + ids_checksum(added)) % 2**64
+        )
+
+    # Elements at exactly `since` were already sent, unless created since in
+    # the same clock tick, so try the delta with and without them
+    delta_ids = [record[variable].element_id for record in records]
+    newer_ids = [
+        record[variable].element_id
+        for record in records
+        if state["since"] is None
+        or record[variable].get(SYNC_TIMESTAMP_PROPERTY) != state["since"]
+    ]
+    if not (matches([]) or matches(newer_ids) or matches(delta_ids)):
+        logger.debug("Element ids changed beyond the delta, resyncing")
+        return None
+
+    state = {
+        "since": _latest(records, variable, state["since"]),
+        "count": count,
+        "checksum": checksum,
+    }
+    return records, [], state
+
+
+CDC_CHANGES_QUERY = """CALL db.cdc.query($change_id) YIELD event
+WHERE event.eventType = $event_type
+RETURN event.elementId AS element_id, event.operation AS operation"""
+
+
+async def _cdc_delta(tx, variable: str, labels, types, state: dict):
+    result = await tx.run("CALL db.cdc.current() YIELD id\nRETURN id")
+    change_id = (await result.single())["id"]
+
+    event_type = "n" if variable == "n" else "r"
+    result = await tx.run(
+        CDC_CHANGES_QUERY,
+        {"change_id": state["change_id"], "event_type": event_type},
+    )
+    changed, deleted = {}, {}
+    async for record in result:
+        # Events are in commit order and element ids can be reused, so the
+        # last operation on an id wins
+        id = record["element_id"]
+        if record["operation"] == "d":
+            changed.pop(id, None)
+            deleted[id] = None
+        else:
+            deleted.pop(id, None)
+            changed[id] = None
+
+    # Re-read changed elements so the response holds their current state and
+    # the label / type filters apply. Ones that no longer match are reported
+    # as deleted.
+    params = {"ids": list(changed)}
+    condition = f"elementId({variable}) IN $ids"
+    query = _read_query(variable, labels, types, [condition], params)
+    records = await _records(tx, query, params) if changed else []
+    found = {record[variable].element_id for record in records}
+    deleted.update((id, None) for id in changed if id not in found)
+    return records, list(deleted), {"change_id": change_id}
+
+
+async def read_sync(
+    creds: Neo4jCredentials,
+    variable: str,
+    labels: list[str] | None,
+    types: list[str] | None,
+    token: str | None,
+) -> dict:
+    """Read the elements changed since token, or every element when there's
+    no usable token.
+
+    Args:
+        creds: Database to read from.
+        variable: "n" for Nodes or "r" for Relationships.
+        labels: Validated node labels, see nodes_query.
+        types: Validated relationship types, see relationships_query.
+        token: sync_token from the previous response, or None.
+
+    Returns:
+        dict with the changed `records`, the element ids `deleted` since token,
+        the next `sync_token` and whether this was a `full` resync, in which
+        case records holds every element.
+    """
+    scope = sync_scope(creds, variable, labels, types)
+    state = decode_sync_token(token) if token is not None else None
+    if state is not None and state.get("scope") != scope:
+        logger.debug("Sync token issued for another scope, resyncing")
+        state = None
+
+    delta = None
+    if state is not None:
+        read_delta = _cdc_delta if SYNC_MODE == SyncMode.CDC else _timestamp_delta
+        try:
+            delta = await async_execute_read(
+                creds, read_delta, variable, labels, types, state
+            )
+        except (exceptions.ClientError, KeyError) as e:
+            # eg. a change id older than the CDC retention period
+            logger.warning("Delta sync failed, resyncing: %s", e)
+
+    if delta is None:
+        records, state = await async_execute_read(creds, _full, variable, labels, types)
+        deleted, full = [], True
+    else:
+        records, deleted, state = delta
+        full = False
+
+    return {
+        "records": records,
+        "deleted": deleted,
+        "sync_token": encode_sync_token({**state, "scope": scope}),
+        "full": full,
+    }
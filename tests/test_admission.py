@@ -0,0 +1,32 @@
+import asyncio
+
+from neo4j_python_server import admission
+from neo4j_python_server.admission import RouteClass, limiter
+from neo4j_python_server.metrics import admission_in_flight
+from neo4j_python_server.models import Neo4jCredentials
+
+
+def creds(i: int) -> Neo4jCredentials:
+    return Neo4jCredentials(uri=f"bolt://host{i}:7687")
+
+
+def test_idle_limiters_are_bounded(monkeypatch):
+    monkeypatch.setattr(admission, "ADMISSION_MAX_TARGETS", 2)
+    monkeypatch.setattr(admission, "_limiters", admission.OrderedDict())
+
+    async def run():
+        busy = limiter(creds(0), RouteClass.EXPORT)
+        await busy.acquire()
+        for i in range(1, 5):
+            current = limiter(creds(i), RouteClass.EXPORT)
+            await current.acquire()
+            current.release()
+        return busy
+
+    busy = asyncio.run(run())
+    # The busy limiter is kept past the bound, idle ones are dropped
+    assert list(admission._limiters.values())[0] is busy
+    assert len(admission._limiters) == 2
+    uris = {labels[1] for labels in admission_in_flight.values}
+    assert "bolt://host0:7687" in uris
+    assert not uris & {f"bolt://host{i}:7687" for i in range(1, 4)}
@@ -0,0 +1,55 @@
+import asyncio
+
+from neo4j import Record
+
+from neo4j_python_server import metadata
+from neo4j_python_server.cache import TTLCache
+from neo4j_python_server.models import Neo4jCredentials
+
+
+def test_refresh_in_flight_during_invalidate_isnt_cached():
+    async def run():
+        cache = TTLCache(ttl=0, stale_ttl=60, max_entries=8)
+        loaded = asyncio.Event()
+        release = asyncio.Event()
+        values = iter(["old", "refreshed", "new"])
+
+        async def loader():
+            value = next(values)
+            if value == "refreshed":
+                loaded.set()
+                await release.wait()
+            return value
+
+        assert await cache.get(("db", "labels"), loader) == "old"
+        # Stale, so returned while a background refresh starts
+        assert await cache.get(("db", "labels"), loader) == "old"
+        await loaded.wait()
+        cache.invalidate(("db",))
+        release.set()
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert len(cache) == 0
+        return await cache.get(("db", "labels"), loader)
+
+    assert asyncio.run(run()) == "new"
+
+
+def test_metadata_is_invalidated_for_every_user(monkeypatch):
+    labels = ["Person"]
+
+    async def read_db(creds, query):
+        return [Record([("label", label)]) for label in labels], None, None
+
+    monkeypatch.setattr(metadata, "async_read_db", read_db)
+    alice = Neo4jCredentials(uri="bolt://metadata-test:7687", username="alice")
+    bob = Neo4jCredentials(uri="bolt://metadata-test:7687", username="bob")
+
+    async def run():
+        assert await metadata.get_labels(bob) == ["Person"]
+        labels.append("Movie")
+        # An import by alice drops bob's cached labels too
+        metadata.invalidate(alice)
+        return await metadata.get_labels(bob)
+
+    assert asyncio.run(run()) == ["Person", "Movie"]
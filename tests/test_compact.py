@@ -0,0 +1,89 @@
+from neo4j_python_server.compact import compact_export
+from neo4j_python_server.export import ExportFormat
+
+
+def cytoscape_elements():
+    return [
+        {"data": {"id": "4:x:1", "label": "Person", "name": "Ann"}},
+        {"data": {"id": "4:x:2", "label": "Movie"}},
+        {
+            "data": {
+                "id": "5:x:1",
+                "source": "4:x:1",
+                "target": "4:x:2",
+                "label": "ACTED_IN",
+            }
+        },
+    ]
+
+
+def test_cytoscape_ids_share_one_space():
+    elements = cytoscape_elements()
+    compacted = compact_export(elements, ExportFormat.CYTOSCAPE, include_ids=True)
+    data = [e["data"] for e in compacted["elements"]]
+    assert data == [
+        {"id": 0, "label": 0, "name": "Ann"},
+        {"id": 1, "label": 1},
+        {"id": 2, "source": 0, "target": 1, "label": 2},
+    ]
+    assert compacted["labels"] == ["Person", "Movie", "ACTED_IN"]
+    assert compacted["ids"] == ["4:x:1", "4:x:2", "5:x:1"]
+    # The payload may be cached, so it must not be modified
+    assert elements == cytoscape_elements()
+
+
+def test_ids_table_is_optional():
+    compacted = compact_export(cytoscape_elements(), ExportFormat.CYTOSCAPE)
+    assert "ids" not in compacted
+
+
+def test_edges_before_nodes_get_ids_on_first_sight():
+    payload = {
+        "edges": [
+            {
+                "data": {
+                    "id": "5:x:1",
+                    "source": "4:x:2",
+                    "target": "4:x:1",
+                    "label": "KNOWS",
+                }
+            }
+        ],
+        "nodes": [
+            {"data": {"id": "4:x:1", "label": "Person"}},
+            {"data": {"id": "4:x:2", "label": "Person"}},
+        ],
+    }
+    compacted = compact_export(payload, ExportFormat.CYTOSCAPE, include_ids=True)
+    assert compacted["edges"][0]["data"] == {
+        "id": 2,
+        "source": 0,
+        "target": 1,
+        "label": 0,
+    }
+    assert [e["data"]["id"] for e in compacted["nodes"]] == [1, 0]
+    assert compacted["ids"] == ["4:x:2", "4:x:1", "5:x:1"]
+    assert compacted["labels"] == ["KNOWS", "Person"]
+
+
+def test_d3_nodes_and_links():
+    payload = {
+        "nodes": [
+            {"id": "4:x:1", "label": "Person"},
+            {"id": "4:x:2", "label": "Person"},
+        ],
+        "links": [
+            {"id": "5:x:1", "source": "4:x:1", "target": "4:x:2", "label": "KNOWS"}
+        ],
+    }
+    compacted = compact_export(payload, ExportFormat.D3)
+    assert compacted == {
+        "nodes": [{"id": 0, "label": 0}, {"id": 1, "label": 0}],
+        "links": [{"id": 2, "source": 0, "target": 1, "label": 1}],
+        "labels": ["Person", "KNOWS"],
+    }
+
+
+def test_other_formats_are_unchanged():
+    payload = [{"id": "4:x:1"}]
+    assert compact_export(payload, ExportFormat.DEFAULT) is payload
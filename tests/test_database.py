@@ -0,0 +1,49 @@
+from neo4j_python_server.database import DriverRegistry
+from neo4j_python_server.models import Neo4jCredentials
+
+
+class FakeDriver:
+    def __init__(self, uri, auth=None):
+        self.uri = uri
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def creds(i: int) -> Neo4jCredentials:
+    return Neo4jCredentials(uri=f"bolt://host{i}:7687")
+
+
+def test_leased_driver_outlives_idle_timeout():
+    registry = DriverRegistry(factory=FakeDriver, idle_timeout=0)
+    with registry.lease(creds(0)) as driver:
+        # Another target's lease evicts idle drivers, but not leased ones
+        with registry.lease(creds(1)):
+            pass
+        assert not driver.closed
+    with registry.lease(creds(1)):
+        pass
+    assert driver.closed
+
+
+def test_lru_eviction_skips_leased_drivers():
+    registry = DriverRegistry(factory=FakeDriver, max_drivers=1)
+    with registry.lease(creds(0)) as leased:
+        with registry.lease(creds(1)) as other:
+            assert len(registry) == 2
+        assert not leased.closed
+        with registry.lease(creds(2)):
+            pass
+        assert other.closed
+        assert not leased.closed
+
+
+def test_discarded_driver_closes_on_last_release():
+    registry = DriverRegistry(factory=FakeDriver)
+    with registry.lease(creds(0)) as driver:
+        registry.discard(creds(0))
+        assert not driver.closed
+    assert driver.closed
+    with registry.lease(creds(0)) as replacement:
+        assert replacement is not driver
@@ -0,0 +1,276 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from neo4j import Record, exceptions
+from neo4j.graph import Graph, Node
+
+from neo4j_python_server import imports, models
+from neo4j_python_server.export import (
+    ExportFormat,
+    export_relationships,
+    first_label,
+    node_default,
+    node_graph,
+)
+from neo4j_python_server.imports import ImportBatches, import_graph
+from neo4j_python_server.models import Neo4jCredentials
+
+
+def relationship_records(count: int) -> list[Record]:
+    """A chain of count KNOWS relationships between count + 1 Person nodes."""
+    graph = Graph()
+    nodes = [
+        Node(graph, f"4:x:{i}", i, ["Person"], {"name": f"p{i}"})
+        for i in range(count + 1)
+    ]
+    knows = graph.relationship_type("KNOWS")
+    records = []
+    for i in range(count):
+        r = knows(graph, f"5:x:{i}", i, {"since": i})
+        r._start_node, r._end_node = nodes[i], nodes[i + 1]
+        records.append(Record(zip(["n", "r", "n2"], [nodes[i], r, nodes[i + 1]])))
+    return records
+
+
+class FakeDatabase:
+    """Stands in for async_write_db: creates nodes with new element ids and
+    only creates relationships whose endpoints exist."""
+
+    def __init__(self):
+        self.nodes = set()
+        self.relationships = 0
+
+    async def write(self, creds, query, params):
+        rows = params["rows"]
+        records = []
+        created = 0
+        if "CREATE (n" in query:
+            for row in rows:
+                element_id = f"new:{len(self.nodes)}"
+                self.nodes.add(element_id)
+                records.append({"key": row["key"], "element_id": element_id})
+        else:
+            for row in rows:
+                if row["source"] in self.nodes and row["target"] in self.nodes:
+                    created += 1
+            self.relationships += created
+        counters = dict.fromkeys(imports.COUNTERS, 0)
+        counters["nodes_created"] = len(records)
+        counters["relationships_created"] = created
+        return records, SimpleNamespace(counters=SimpleNamespace(**counters))
+
+
+def test_default_relationships_import_their_endpoints(monkeypatch):
+    exported = export_relationships(relationship_records(3), ExportFormat.DEFAULT)
+
+    batches = ImportBatches()
+    batches.add_exported(exported)
+    assert sum(len(rows) for rows in batches.nodes.values()) == 4
+    assert sum(len(rows) for rows in batches.relationships.values()) == 3
+
+    database = FakeDatabase()
+    monkeypatch.setattr(imports, "async_write_db", database.write)
+    result = asyncio.run(import_graph(Neo4jCredentials(), batches))
+
+    assert result["nodes_created"] == 4
+    assert result["relationships_created"] == 3
+    assert result["relationships_skipped"] == 0
+    assert len(database.nodes) == 4
+    assert database.relationships == 3
+
+
+class FakeResult:
+    def __init__(self, records, **counters):
+        self.records = records
+        self.summary = SimpleNamespace(
+            counters=SimpleNamespace(
+                **{**dict.fromkeys(imports.COUNTERS, 0), **counters}
+            )
+        )
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for record in self.records:
+            yield record
+
+    async def consume(self):
+        return self.summary
+
+
+class FakeGraph:
+    """Stands in for the streaming import's transactions, keeping nodes as
+    element id -> import key, or None once cleared, and failing the
+    fail_batch'th batch before it writes anything."""
+
+    def __init__(self, fail_batch=None):
+        self.nodes = {}
+        self.relationships = []
+        self.batches = 0
+        self.fail_batch = fail_batch
+
+    async def run(self, query, rows=None, prefix=None, keys=None):
+        if "MERGE" in query:
+            keys = {v: k for k, v in self.nodes.items()}
+            records, created = [], 0
+            for row in rows:
+                key = prefix + row["key"]
+                if key not in keys:
+                    keys[key] = f"new:{len(self.nodes)}"
+                    self.nodes[keys[key]] = key
+                    created += 1
+                records.append({"key": row["key"], "element_id": keys[key]})
+            return FakeResult(records, nodes_created=created)
+        if "IN $keys" in query:
+            return FakeResult(
+                [
+                    {"key": key, "element_id": element_id}
+                    for element_id, key in self.nodes.items()
+                    if key in keys
+                ]
+            )
+        created = [
+            r for r in rows if r["source"] in self.nodes and r["target"] in self.nodes
+        ]
+        self.relationships += created
+        return FakeResult([], relationships_created=len(created))
+
+    async def execute_write(self, creds, work, *args):
+        self.batches += 1
+        if self.batches == self.fail_batch:
+            raise RuntimeError("connection lost")
+        return await work(self, *args)
+
+    async def write(self, creds, query, params={}):
+        if "REMOVE" in query:
+            cleared = [
+                element_id
+                for element_id, key in self.nodes.items()
+                if key is not None
+                and key.startswith(params["prefix"])
+                and not any(key.startswith(p) for p in params["keep"])
+            ]
+            self.nodes.update(dict.fromkeys(cleared))
+            return [{"cleared": len(cleared)}], None
+        return [], None
+
+
+async def upload(count: int):
+    for i in range(count + 1):
+        yield models.Node(labels=["Person"], element_id=f"p{i}")
+    for i in range(count):
+        yield models.Relationship(
+            source_node=models.Node(labels=["Person"], element_id=f"p{i}"),
+            target_node=models.Node(labels=["Person"], element_id=f"p{i + 1}"),
+            type="KNOWS",
+        )
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    graph = FakeGraph(fail_batch=2)
+    monkeypatch.setattr(imports, "async_execute_write", graph.execute_write)
+    monkeypatch.setattr(imports, "async_write_db", graph.write)
+    monkeypatch.setattr(imports, "jobs", imports.OrderedDict())
+    return graph
+
+
+def test_resumed_stream_skips_committed_rows(graph):
+    job = imports.get_job(Neo4jCredentials(), None, resume=False)
+    with pytest.raises(RuntimeError):
+        asyncio.run(imports.ingest_stream(Neo4jCredentials(), upload(5), job, 4))
+    assert job.status == "failed"
+    assert job.rows_committed == 4
+
+    # Resumed with another batch size, endpoints from the failed attempt's
+    # committed batch are found by their import key
+    job = imports.get_job(Neo4jCredentials(), job.job_id, resume=True)
+    result = asyncio.run(
+        imports.ingest_stream(Neo4jCredentials(), upload(5), job, batch_size=3)
+    )
+    assert result["rows_committed"] == 11
+    assert result["nodes_created"] == 6
+    assert result["relationships_created"] == 5
+    assert result["relationships_skipped"] == 0
+    assert len(graph.nodes) == 6
+    assert not any(graph.nodes.values())
+
+
+def test_get_job_errors(graph):
+    creds = Neo4jCredentials()
+    with pytest.raises(HTTPException) as missing:
+        imports.get_job(creds, "no-such-job", resume=True)
+    assert missing.value.status_code == 404
+
+    job = imports.get_job(creds, None, resume=False)
+    with pytest.raises(HTTPException) as running:
+        imports.get_job(creds, job.job_id, resume=True)
+    assert running.value.status_code == 409
+
+    job.status, job.ended = "failed", time.monotonic()
+    with pytest.raises(HTTPException) as elsewhere:
+        imports.get_job(Neo4jCredentials(database="other"), job.job_id, resume=True)
+    assert elsewhere.value.status_code == 409
+
+
+def test_abandoned_jobs_clear_their_import_keys(graph, monkeypatch):
+    creds = Neo4jCredentials()
+
+    async def run():
+        failed = imports.get_job(creds, "failed", resume=False)
+        with pytest.raises(RuntimeError):
+            await imports.ingest_stream(creds, upload(5), failed, 4)
+        running = imports.get_job(creds, "running", resume=False)
+        graph.nodes["other:0"] = running.key_prefix + "p0"
+        # Left behind by a job from before a restart
+        graph.nodes["other:1"] = "restarted:p0"
+
+        assert await imports.clear_abandoned_import_keys(creds) == 1
+        assert graph.nodes["other:1"] is None
+        assert sum(key is not None for key in graph.nodes.values()) == 5
+
+        # Not resumed in time, so dropped with the next job lookup
+        monkeypatch.setattr(imports, "IMPORT_RESUME_SECONDS", 0)
+        imports.get_job(creds, None, resume=False)
+        assert "failed" not in imports.jobs
+        await asyncio.gather(*imports._cleanups)
+        assert [k for k in graph.nodes.values() if k is not None] == [
+            running.key_prefix + "p0"
+        ]
+
+    asyncio.run(run())
+
+
+def test_import_key_index_is_optional(monkeypatch):
+    calls = []
+
+    async def write(creds, query, params={}):
+        calls.append(query)
+        raise exceptions.Forbidden("Schema operations are not allowed")
+
+    monkeypatch.setattr(imports, "async_write_db", write)
+    creds = Neo4jCredentials(uri="bolt://no-schema-privileges:7687")
+    asyncio.run(imports.ensure_import_key_index(creds))
+    asyncio.run(imports.ensure_import_key_index(creds))
+    assert len(calls) == 1
+
+
+def test_exports_hide_import_keys():
+    graph = Graph()
+    node = Node(
+        graph,
+        "4:x:0",
+        0,
+        ["Person", imports.IMPORT_KEY_LABEL],
+        {"name": "p0", imports.IMPORT_KEY_PROPERTY: "job:p0"},
+    )
+    assert node_default(node) == {
+        "element_id": "4:x:0",
+        "labels": ["Person"],
+        "properties": {"name": "p0"},
+    }
+    assert node_graph(node, first_label(node))["label"] == "Person"
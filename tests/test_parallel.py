@@ -0,0 +1,23 @@
+import pytest
+from fastapi import HTTPException
+
+from neo4j_python_server.parallel import (
+    EXCLUDED,
+    check_parallel_options,
+    node_partitions,
+)
+
+
+def test_partitions_exclude_earlier_labels():
+    assert node_partitions(["A", "B", "C"]) == [
+        (["A"], [], {}),
+        (["B"], [EXCLUDED], {"excluded_labels": ["A"]}),
+        (["C"], [EXCLUDED], {"excluded_labels": ["A", "B"]}),
+    ]
+
+
+def test_unfiltered_parallel_reads_are_rejected():
+    with pytest.raises(HTTPException) as rejected:
+        check_parallel_options(None)
+    assert rejected.value.status_code == 400
+    check_parallel_options(["A"])
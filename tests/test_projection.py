@@ -0,0 +1,84 @@
+from neo4j import Record
+
+from neo4j_python_server.projection import (
+    ProjectedNode,
+    project_query,
+    projected_records,
+    properties_expression,
+)
+
+
+def test_properties_expression_without_cases():
+    assert properties_expression("n", {}) == "n {.*}"
+    assert properties_expression("n", {"*": ["name"]}) == "n {.`name`}"
+    assert properties_expression("n", {"*": []}) == "{}"
+
+
+def test_properties_expression_cases_per_label():
+    spec = {"Person": ["name", "born"], "Movie": [], "*": ["title"]}
+    assert properties_expression("n", spec) == (
+        "CASE WHEN n:`Person` THEN n {.`name`, .`born`} "
+        "WHEN n:`Movie` THEN {} "
+        "ELSE n {.`title`} END"
+    )
+
+
+def test_properties_expression_quotes_user_keys():
+    spec = {"Odd`Label": ["a`} RETURN 1 //", "first name"]}
+    assert properties_expression("n", spec) == (
+        "CASE WHEN n:`Odd``Label` THEN n {.`a``} RETURN 1 //`, .`first name`} "
+        "ELSE n {.*} END"
+    )
+
+
+def test_project_query_wraps_and_orders():
+    query = project_query("MATCH (n)-[r]->(n2)\nRETURN n, r, n2", ["n", "r"], {}, "n")
+    assert query == (
+        "CALL {\nMATCH (n)-[r]->(n2)\nRETURN n, r, n2\n}\n"
+        "RETURN {element_id: elementId(n), labels: labels(n), properties: n {.*}} AS n, "
+        "{element_id: elementId(r), type: type(r), start: elementId(startNode(r)), "
+        "end: elementId(endNode(r)), properties: r {.*}} AS r\n"
+        "ORDER BY n.element_id"
+    )
+
+
+def test_projected_records_unpacks_maps():
+    record = Record(
+        [
+            (
+                "n",
+                {
+                    "element_id": "4:x:1",
+                    "labels": ["Person"],
+                    "properties": {"name": "Ann"},
+                },
+            ),
+            (
+                "r",
+                {
+                    "element_id": "5:x:1",
+                    "type": "KNOWS",
+                    "start": "4:x:1",
+                    "end": "4:x:2",
+                    "properties": {},
+                },
+            ),
+        ]
+    )
+    (unpacked,) = projected_records([record], {"Person": ["name"]})
+    n, r = unpacked["n"], unpacked["r"]
+    assert isinstance(n, ProjectedNode)
+    assert (n.element_id, n.labels, n._properties) == (
+        "4:x:1",
+        ["Person"],
+        {"name": "Ann"},
+    )
+    assert r.type == "KNOWS"
+    # The start node is the returned one, the missing end node a bare stand-in
+    assert r.start_node is n
+    assert (r.end_node.element_id, r.end_node.labels) == ("4:x:2", [])
+
+
+def test_projected_records_without_spec():
+    records = [Record([("n", 1)])]
+    assert projected_records(records, None) is records
@@ -0,0 +1,95 @@
+import asyncio
+
+from neo4j import Record
+
+from neo4j_python_server import metadata
+from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.pagination import encode_cursor, paginate
+from neo4j_python_server.queries import (
+    EMPTY_NODES_QUERY,
+    EMPTY_RELATIONSHIPS_QUERY,
+    nodes_query,
+    quote_identifier,
+    relationships_query,
+    validate_labels,
+    validate_relationship_types,
+)
+
+
+def test_quote_identifier_escapes_backticks():
+    assert quote_identifier("Person") == "`Person`"
+    assert quote_identifier("My Label") == "`My Label`"
+    assert quote_identifier("a`) DETACH DELETE (n") == "`a``) DETACH DELETE (n`"
+
+
+def test_nodes_query_branches_per_label():
+    assert nodes_query(None, []) == "MATCH (n)\nRETURN n"
+    assert nodes_query([], []) == EMPTY_NODES_QUERY
+    assert nodes_query(["Person"], ["n.age > 1"]) == (
+        "MATCH (n:`Person`)\nWHERE n.age > 1\nRETURN n"
+    )
+
+    params = {}
+    conditions = []
+    page_clause = paginate("n", conditions, params, 10, encode_cursor("4:x:9"))
+    query = nodes_query(["Person", "Movie"], conditions, page_clause)
+    assert query == (
+        "CALL {\n"
+        "MATCH (n:`Person`)\nWHERE elementId(n) > $cursor\nRETURN n\n"
+        "UNION\n"
+        "MATCH (n:`Movie`)\nWHERE elementId(n) > $cursor\nRETURN n\n"
+        "}\nRETURN n\nORDER BY elementId(n)\nLIMIT $limit"
+    )
+    assert params == {"cursor": "4:x:9", "limit": 11}
+
+
+def test_relationships_query_filters():
+    assert relationships_query([], None, [], {}) == EMPTY_RELATIONSHIPS_QUERY
+    assert relationships_query(None, [], [], {}) == EMPTY_RELATIONSHIPS_QUERY
+
+    params = {}
+    query = relationships_query(None, ["KNOWS", "ACTED_IN"], [], params)
+    assert query == "MATCH (n)-[r:`KNOWS`|`ACTED_IN`]->(n2)\nRETURN n, r, n2"
+    assert params == {}
+
+    query = relationships_query(["Person", "Movie"], ["KNOWS"], [], params)
+    assert query.count("UNION") == 1
+    assert "MATCH (n:`Person`)-[r:`KNOWS`]->(n2)" in query
+    assert "MATCH (n:`Movie`)-[r:`KNOWS`]->(n2)" in query
+    assert "any(label IN labels(n2) WHERE label IN $labels)" in query
+    assert query.endswith("}\nRETURN n, r, n2")
+    assert params == {"labels": ["Person", "Movie"]}
+
+
+def test_unknown_names_reload_metadata(monkeypatch):
+    database = {"labels": ["Person"], "types": ["KNOWS"]}
+    reads = []
+
+    async def read_db(creds, query):
+        reads.append(query)
+        if "labels" in query:
+            return [Record([("label", l)]) for l in database["labels"]], None, None
+        return (
+            [Record([("relationshipType", t)]) for t in database["types"]],
+            None,
+            None,
+        )
+
+    monkeypatch.setattr(metadata, "async_read_db", read_db)
+    creds = Neo4jCredentials(uri="bolt://queries-test:7687")
+
+    async def run():
+        assert await validate_labels(creds, ["Person"]) == ["Person"]
+        # Created by another writer after the labels were cached
+        database["labels"].append("Movie")
+        database["types"].append("ACTED_IN")
+        assert await validate_labels(creds, ["Movie", "Person", "Nope"]) == [
+            "Movie",
+            "Person",
+        ]
+        assert await validate_relationship_types(creds, ["ACTED_IN"]) == ["ACTED_IN"]
+        # Known names are served from the cache
+        assert await validate_labels(creds, ["Movie"]) == ["Movie"]
+
+    asyncio.run(run())
+    assert len(reads) == 3
@@ -0,0 +1,26 @@
+from fastapi import Response
+
+from neo4j_python_server.models import Neo4jCredentials
+from neo4j_python_server.results import ResultCache
+
+
+def test_put_drops_results_read_before_invalidate():
+    cache = ResultCache(max_bytes=1024, ttl=60)
+    creds = Neo4jCredentials(uri="bolt://a:7687")
+    other = Neo4jCredentials(uri="bolt://b:7687")
+    generation = cache.generation(creds)
+    other_generation = cache.generation(other)
+
+    # An import into creds' database finishes while both reads run
+    cache.invalidate(creds)
+    cache.put(creds, ("a",), Response(b"stale"), generation)
+    cache.put(other, ("b",), Response(b"fresh"), other_generation)
+    assert cache.get(("a",)) is None
+    assert cache.get(("b",)).body == b"fresh"
+
+    cache.put(creds, ("a",), Response(b"fresh"), cache.generation(creds))
+    assert cache.get(("a",)).body == b"fresh"
+
+    cache.invalidate()
+    cache.put(other, ("b",), Response(b"stale"), other_generation)
+    assert len(cache) == 0
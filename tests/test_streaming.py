@@ -0,0 +1,51 @@
+import asyncio
+import logging
+
+from neo4j import Record
+from neo4j.graph import Graph, Node
+
+from neo4j_python_server import export, metrics
+from neo4j_python_server.export import ExportFormat
+from neo4j_python_server.streaming import stream_nodes
+
+
+async def node_records(count: int):
+    graph = Graph()
+    for i in range(count):
+        labels = ["Person"] if i % 2 else []
+        yield Record([("n", Node(graph, f"4:x:{i}", i, labels, {}))])
+
+
+async def collect(elements) -> list:
+    return [element async for element in elements]
+
+
+def test_streamed_node_logs_are_sampled(monkeypatch, caplog):
+    monkeypatch.setattr(export, "LOG_SAMPLE_EVERY", 10)
+    with caplog.at_level(logging.DEBUG, logger="neo4j_python_server"):
+        elements = asyncio.run(
+            collect(stream_nodes(node_records(25), ExportFormat.CYTOSCAPE))
+        )
+
+    assert len(elements) == 12
+    messages = [r.getMessage() for r in caplog.records]
+    assert [m for m in messages if m.startswith("labels (record")] == [
+        "labels (record 0): frozenset()",
+        "labels (record 10): frozenset()",
+        "labels (record 20): frozenset()",
+    ]
+    skipped = [m for m in messages if "no label" in m]
+    assert len(skipped) == 4
+    assert skipped[-1] == "Skipped 13 Nodes with no label"
+
+
+def test_streamed_export_time_is_recorded():
+    async def run():
+        request = metrics.RequestMetrics()
+        metrics._current.set(request)
+        await collect(stream_nodes(node_records(5), ExportFormat.DEFAULT))
+        return request
+
+    request = asyncio.run(run())
+    assert request.stages["export"] > 0
+    assert request.format == "default"